@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from api import checks, signals  # noqa: F401
+        from backend.db import close_unusable_connections
+
+        request_started.connect(close_unusable_connections)
@@ -0,0 +1,78 @@
+"""Асинхронные представления для самых нагруженных эндпоинтов чтения.
+Используются при запуске через ASGI (SERVER_MODE=asgi). Синхронные
+представления Django в ASGI выполняет в одном потоке (thread_sensitive),
+и запросы к ним обрабатываются по очереди. Здесь GET обрабатывается
+тем же представлением DRF, что и в WSGI, - с аутентификацией, правами
+доступа, ограничением частоты запросов и выбором формата ответа
+(Accept, ?format=), - но в пуле потоков, поэтому запросы обрабатываются
+параллельно, а медленные клиенты не занимают процесс. Ответ рендерится
+в том же потоке. Остальные методы передаются синхронным представлениям
+DRF так же, как в WSGI.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+
+from api.views import (IngredientViewSet, RecipeViewSet,
+                       ShoppingCartDownloadView, TagViewSet, catalog_response,
+                       is_catalog_request)
+from backend.db import db_task
+
+
+def rendered(response):
+    """Ответ DRF, отрендеренный в потоке пула. Ответ с методом render
+    обработчик Django в ASGI рендерит в потоке thread_sensitive."""
+    if not callable(getattr(response, "render", None)):
+        return response
+    response.render()
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    plain.cookies = response.cookies
+    return plain
+
+
+def async_read_view(sync_view):
+    """Обслуживает GET представлением DRF в пуле потоков, остальные
+    методы - так же, как Django обслуживает синхронное представление."""
+    read = db_task(lambda request, *args, **kwargs: rendered(
+        sync_view(request, *args, **kwargs)
+    ))
+    delegate = sync_to_async(sync_view)
+
+    @wraps(sync_view)
+    async def view(request, *args, **kwargs):
+        if request.method != "GET":
+            return await delegate(request, *args, **kwargs)
+        return await read(request, *args, **kwargs)
+    return view
+
+
+def async_catalog_view(name: str, view):
+    """Отдаёт снимок каталога до аутентификации, как api.views.catalog_view."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if is_catalog_request(request):
+            return await db_task(catalog_response)(request, name)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+tag_list = async_catalog_view("tags", async_read_view(
+    TagViewSet.as_view({"get": "list"})
+))
+
+ingredient_list = async_catalog_view("ingredients", async_read_view(
+    IngredientViewSet.as_view({"get": "list"})
+))
+
+recipe_detail = async_read_view(RecipeViewSet.as_view({
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+}))
+
+download_shopping_cart = async_read_view(ShoppingCartDownloadView.as_view())
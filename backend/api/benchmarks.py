@@ -0,0 +1,419 @@
+"""Модуль нагрузочных сценариев для API.
+Сценарий - это последовательность запросов к API, которая выполняется
+тестовым клиентом Django. Для каждого сценария замеряются перцентили
+времени ответа и количество SQL-запросов.
+"""
+
+import asyncio
+import importlib
+import math
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from statistics import mean, median
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+from api.serializers import (IngredientSerializer, RecipeReadSerializer,
+                             RecipeSerializer)
+from recipe.models import (Ingredient, IngredientAmountInRecipe, Recipe,
+                           ShoppingCart, Tag)
+from users.models import Subscribe
+
+User = get_user_model()
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class Scenario:
+    """Сценарий нагрузочного теста.
+    Attribute:
+        name(str):
+            Уникальное имя сценария, используется в отчёте.
+        steps(tuple):
+            Запросы сценария в виде пар (метод, путь).
+        auth(bool):
+            Выполнять ли запросы от имени пользователя с токеном.
+    """
+    name: str
+    steps: Tuple[Tuple[str, str], ...]
+    auth: bool = False
+    expected_statuses: Tuple[int, ...] = (200, 201, 204)
+
+
+@dataclass
+class BenchmarkContext:
+    """Данные из базы, на основе которых строятся сценарии."""
+    user: User
+    token: str
+    recipe_id: int
+    author_id: int
+    tag_slugs: List[str] = field(default_factory=list)
+    ingredient_ids: List[int] = field(default_factory=list)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def build_context(email: Optional[str] = None) -> BenchmarkContext:
+    """Выбирает пользователя с непустой корзиной и подписками,
+    а также рецепт и автора для сценариев."""
+    users = User.objects.all()
+    if email:
+        users = users.filter(email=email)
+    user = (
+        users.filter(shopping_cart__isnull=False, follower__isnull=False).first()
+        or users.first()
+    )
+    if user is None:
+        raise ValueError("В базе нет пользователей, выполните generate_data")
+    recipe = (
+        Recipe.objects.exclude(author=user).exclude(favorite_recipe__user=user)
+        .exclude(shopping_cart__user=user).first()
+    )
+    if recipe is None:
+        raise ValueError("В базе нет рецептов, выполните generate_data")
+    author = (
+        Subscribe.objects.filter(user=user).values_list("author", flat=True).first()
+        or recipe.author_id
+    )
+    token, _ = Token.objects.get_or_create(user=user)
+    return BenchmarkContext(
+        user=user,
+        token=token.key,
+        recipe_id=recipe.id,
+        author_id=author,
+        tag_slugs=list(Tag.objects.values_list("slug", flat=True)[:2]),
+        ingredient_ids=list(
+            IngredientAmountInRecipe.objects.filter(recipe=recipe)
+            .values_list("ingredient_id", flat=True)[:2]
+        ),
+    )
+
+
+def default_scenarios(context: BenchmarkContext) -> List[Scenario]:
+    """Основные сценарии: списки, фильтры, подписки, корзина и переключатели."""
+    tags = "&".join(f"tags={slug}" for slug in context.tag_slugs)
+    ingredients = "&".join(f"ingredients={pk}" for pk in context.ingredient_ids)
+    excluded = "&".join(
+        f"exclude_ingredients={pk}" for pk in context.ingredient_ids
+    )
+    recipe = context.recipe_id
+    return [
+        Scenario("tags_list", (("get", "/api/tags/"),)),
+        Scenario("ingredients_list", (("get", "/api/ingredients/"),)),
+        Scenario("ingredients_search", (("get", "/api/ingredients/?name=сах"),)),
+        Scenario("recipes_list", (("get", "/api/recipes/"),)),
+        Scenario("recipes_list_auth", (("get", "/api/recipes/"),), auth=True),
+        Scenario("recipes_list_limit_50", (("get", "/api/recipes/?limit=50"),)),
+        Scenario(
+            "recipes_cards_limit_50",
+            (("get", "/api/recipes/?limit=50&fields=id,name,image,cooking_time"),),
+            auth=True,
+        ),
+        Scenario("recipe_detail", (("get", f"/api/recipes/{recipe}/"),), auth=True),
+        Scenario("recipes_filter_tags", (("get", f"/api/recipes/?{tags}"),)),
+        Scenario("recipe_similar", (("get", f"/api/recipes/{recipe}/similar/"),)),
+        Scenario("recipes_trending", (("get", "/api/recipes/?ordering=trending"),)),
+        Scenario(
+            "recipes_popular_tags",
+            (("get", f"/api/recipes/?ordering=popular&{tags}"),),
+        ),
+        Scenario(
+            "recipes_filter_cooking_time",
+            (("get", "/api/recipes/?cooking_time__gte=10&cooking_time__lte=30"),),
+        ),
+        Scenario(
+            "recipes_filter_ingredients",
+            (("get", f"/api/recipes/?{ingredients}"),),
+        ),
+        Scenario(
+            "recipes_exclude_ingredients_tags",
+            (("get", f"/api/recipes/?{excluded}&{tags}"),),
+        ),
+        Scenario(
+            "recipes_filter_author",
+            (("get", f"/api/recipes/?author={context.author_id}"),),
+        ),
+        Scenario(
+            "recipes_filter_favorited",
+            (("get", "/api/recipes/?is_favorited=1"),),
+            auth=True,
+        ),
+        Scenario(
+            "recipes_filter_shopping_cart",
+            (("get", "/api/recipes/?is_in_shopping_cart=1"),),
+            auth=True,
+        ),
+        Scenario("subscriptions", (("get", "/api/users/subscriptions/"),), auth=True),
+        Scenario(
+            "subscriptions_recipes_limit",
+            (("get", "/api/users/subscriptions/?recipes_limit=3"),),
+            auth=True,
+        ),
+        Scenario("feed", (("get", "/api/recipes/feed/"),), auth=True),
+        Scenario(
+            "download_shopping_cart",
+            (("get", "/api/recipes/download_shopping_cart/"),),
+            auth=True,
+        ),
+        Scenario(
+            "favorite_toggle",
+            (
+                ("post", f"/api/recipes/{recipe}/favorite/"),
+                ("delete", f"/api/recipes/{recipe}/favorite/"),
+            ),
+            auth=True,
+        ),
+        Scenario(
+            "shopping_cart_toggle",
+            (
+                ("post", f"/api/recipes/{recipe}/shopping_cart/"),
+                ("delete", f"/api/recipes/{recipe}/shopping_cart/"),
+            ),
+            auth=True,
+        ),
+    ]
+
+
+def summarize(timings: List[float], queries: List[Optional[int]],
+              errors: int) -> Dict:
+    """Статистика по замерам итераций сценария."""
+    measured = [q for q in queries if q is not None]
+    result = {
+        "iterations": len(timings),
+        "errors": errors,
+        "mean_ms": round(mean(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "queries": median(measured) if measured else None,
+        "queries_max": max(measured) if measured else None,
+    }
+    result.update(
+        {f"p{p}_ms": round(percentile(timings, p), 3) for p in PERCENTILES}
+    )
+    return result
+
+
+def auth_headers(scenario: Scenario, token: str,
+                 key: str = "HTTP_AUTHORIZATION") -> Dict[str, str]:
+    """Заголовок с токеном. AsyncClient в Django 3.2 принимает
+    заголовки по именам HTTP, а не ключам META."""
+    return {key: f"Token {token}"} if scenario.auth else {}
+
+
+def run_scenario(client, scenario: Scenario, token: str,
+                 iterations: int, warmup: int) -> Dict:
+    """Выполняет сценарий и возвращает статистику по нему.
+    Время и количество запросов к БД считаются на всю итерацию сценария.
+    """
+    headers = auth_headers(scenario, token)
+    timings, queries, errors = [], [], 0
+    for iteration in range(warmup + iterations):
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            statuses = [
+                getattr(client, method)(path, **headers).status_code
+                for method, path in scenario.steps
+            ]
+            elapsed = (time.perf_counter() - started) * 1000
+        if iteration < warmup:
+            continue
+        timings.append(elapsed)
+        queries.append(len(captured))
+        errors += sum(s not in scenario.expected_statuses for s in statuses)
+    return summarize(timings, queries, errors)
+
+
+async def run_scenario_async(client, scenario: Scenario, token: str,
+                             iterations: int, warmup: int,
+                             concurrency: int = 1) -> Dict:
+    """Выполняет сценарий через AsyncClient. В каждой итерации запускается
+    concurrency копий сценария одновременно, время итерации - время
+    завершения последней из них. Запросы к БД выполняются в потоках
+    пула и не подсчитываются.
+    """
+    headers = auth_headers(scenario, token, key="authorization")
+
+    async def run_once():
+        return [
+            (await getattr(client, method)(path, **headers)).status_code
+            for method, path in scenario.steps
+        ]
+
+    timings, errors = [], 0
+    for iteration in range(warmup + iterations):
+        started = time.perf_counter()
+        runs = await asyncio.gather(*(run_once() for _ in range(concurrency)))
+        elapsed = (time.perf_counter() - started) * 1000
+        if iteration < warmup:
+            continue
+        timings.append(elapsed)
+        errors += sum(
+            s not in scenario.expected_statuses
+            for statuses in runs for s in statuses
+        )
+    return summarize(timings, [None] * len(timings), errors)
+
+
+def compare_recipe_serializers(user: User, page_size: int = 100,
+                               rounds: int = 5) -> Dict:
+    """Сравнивает RecipeSerializer и RecipeReadSerializer на странице
+    рецептов: время сериализации и совпадение результата."""
+    request = RequestFactory().get("/api/recipes/")
+    request.user = user
+    recipes = list(Recipe.objects.select_related("author")[:page_size])
+    result = {"page_size": len(recipes)}
+    outputs = {}
+    for serializer_class in (RecipeSerializer, RecipeReadSerializer):
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            data = serializer_class(
+                recipes, many=True, context={"request": request}
+            ).data
+            timings.append((time.perf_counter() - started) * 1000)
+        outputs[serializer_class] = JSONRenderer().render(data)
+        result[f"{serializer_class.__name__}_ms"] = round(median(timings), 3)
+    result["identical"] = (
+        outputs[RecipeSerializer] == outputs[RecipeReadSerializer]
+    )
+    result["speedup"] = round(
+        result["RecipeSerializer_ms"] / result["RecipeReadSerializer_ms"], 2
+    )
+    return result
+
+
+def compare_renderers(user: User, page_size: int = 100,
+                      rounds: int = 20) -> Dict:
+    """Сравнивает JSONRenderer и FastJSONRenderer на большой странице
+    рецептов и полном списке ингредиентов."""
+    request = RequestFactory().get("/api/recipes/")
+    request.user = user
+    payloads = {
+        "recipes_page": RecipeReadSerializer(
+            Recipe.objects.select_related("author")[:page_size],
+            many=True, context={"request": request},
+        ).data,
+        "ingredients": IngredientSerializer(
+            Ingredient.objects.all(), many=True
+        ).data,
+    }
+    result = {}
+    for name, data in payloads.items():
+        outputs, row = {}, {}
+        for renderer_class in (JSONRenderer, FastJSONRenderer):
+            renderer, timings = renderer_class(), []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                outputs[renderer_class] = renderer.render(data)
+                timings.append((time.perf_counter() - started) * 1000)
+            row[f"{renderer_class.__name__}_ms"] = round(median(timings), 3)
+        row["bytes"] = len(outputs[JSONRenderer])
+        row["identical"] = outputs[JSONRenderer] == outputs[FastJSONRenderer]
+        row["speedup"] = round(
+            row["JSONRenderer_ms"] / row["FastJSONRenderer_ms"], 2
+        )
+        result[name] = row
+    return result
+
+
+STARTUP_CODE = """
+import sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+print((time.perf_counter() - started) * 1000, len(sys.modules))
+"""
+
+
+def measure_startup(settings_module: str, runs: int = 5) -> Dict:
+    """Время запуска воркера с профилем настроек: django.setup(),
+    загрузка middleware и маршрутов в новом процессе."""
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    timings, modules = [], 0
+    for _ in range(runs):
+        output = subprocess.run(
+            (sys.executable, "-c", STARTUP_CODE),
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout.split()
+        timings.append(float(output[0]))
+        modules = int(output[1])
+    return {"startup_ms": round(median(timings), 3), "modules": modules}
+
+
+def compare_middleware(path: str = "/api/tags/",
+                       iterations: int = 200) -> Dict:
+    """Время запроса через цепочки middleware профилей backend.settings
+    и backend.settings_api. Остальные настройки берутся из текущего
+    процесса, поэтому разница показывает только накладные расходы
+    middleware."""
+    api_settings = importlib.import_module("backend.settings_api")
+    profiles = {
+        "backend.settings": {"MIDDLEWARE": settings.MIDDLEWARE},
+        "backend.settings_api": {
+            name: getattr(api_settings, name)
+            for name in ("MIDDLEWARE", "ADMIN_MIDDLEWARE", "ADMIN_PATH_PREFIX")
+        },
+    }
+    result = {}
+    for name, overrides in profiles.items():
+        with override_settings(**overrides):
+            client, timings = Client(), []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+        result[name] = {
+            "middleware": len(overrides["MIDDLEWARE"]),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+        }
+    return result
+
+
+def dataset_summary() -> Dict[str, int]:
+    """Размер набора данных, на котором выполнялся бенчмарк."""
+    return {
+        "users": User.objects.count(),
+        "recipes": Recipe.objects.count(),
+        "shopping_carts": ShoppingCart.objects.count(),
+        "subscriptions": Subscribe.objects.count(),
+    }
+
+
+def compare_results(previous: Dict, current: Dict,
+                    metrics: Tuple[str, ...] = ("p50_ms", "p95_ms", "queries")
+                    ) -> List[Tuple[str, str, float, float, Optional[float]]]:
+    """Сравнивает два отчёта: (сценарий, метрика, было, стало, изменение в %)."""
+    rows = []
+    for name, result in current.get("results", {}).items():
+        before = previous.get("results", {}).get(name)
+        if before is None:
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else None
+            rows.append((name, metric, old, new, change))
+    return rows
+
@@ -0,0 +1,189 @@
+"""Снимки каталогов тегов и ингредиентов.
+Списки тегов и ингредиентов без фильтров одинаковы для всех
+пользователей, поэтому они сохраняются в CATALOG_DIR готовым JSON
+(и его сжатой копией .gz) в файлах с хэшем содержимого в имени:
+tags.<хэш>.json. Текущая версия записана в файле tags.version.
+Изменение тега или ингредиента меняет поколение каталога (файл
+tags.generation) и удаляет файл версии, и снимок строится заново при
+следующем запросе или командой generate_catalogs. Снимок, при построении
+которого поколение изменилось, текущей версией не становится: он мог
+прочитать данные до фиксации изменения. Ответ
+отдаётся из памяти процесса или через X-Accel-Redirect nginx без
+обращений к базе данных и сериализатору.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+import uuid
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from api.renderers import FastJSONRenderer
+from api.serializers import IngredientSerializer, TagSerializer
+from recipe.models import Ingredient, Tag
+
+CATALOGS = {
+    "tags": (Tag, TagSerializer),
+    "ingredients": (Ingredient, IngredientSerializer),
+}
+# Сколько раз снимок строится заново, если каталог меняется во время
+# построения; после этого отдаётся последний построенный без сохранения.
+REBUILD_ATTEMPTS = 3
+
+
+class Snapshot(NamedTuple):
+    modified: Optional[float]
+    filename: str
+    content: bytes
+    compressed: bytes
+    etag: str
+
+    @property
+    def gzip_etag(self) -> str:
+        """ETag сжатого ответа: у тел с разным Content-Encoding
+        сильные ETag должны различаться."""
+        return self.etag[:-1] + '-gz"'
+
+
+_snapshots: Dict[str, Snapshot] = {}
+_lock = threading.Lock()
+
+
+def catalog_path(filename: str) -> str:
+    return os.path.join(settings.CATALOG_DIR, filename)
+
+
+def version_path(name: str) -> str:
+    return catalog_path(f"{name}.version")
+
+
+def generation_path(name: str) -> str:
+    return catalog_path(f"{name}.generation")
+
+
+def read_version(name: str) -> str:
+    with open(version_path(name), "r") as file:
+        return file.read().strip()
+
+
+def read_generation(name: str) -> str:
+    try:
+        with open(generation_path(name), "r") as file:
+            return file.read()
+    except FileNotFoundError:
+        return ""
+
+
+def version_modified(name: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(version_path(name))
+    except FileNotFoundError:
+        return None
+
+
+def replace_file(path: str, data: bytes) -> None:
+    """Атомарно заменяет файл. Временный файл у каждого процесса свой,
+    поэтому одновременные записи не портят друг друга."""
+    directory, filename = os.path.split(path)
+    with tempfile.NamedTemporaryFile(
+        dir=directory, prefix=f".{filename}.", suffix=".tmp", delete=False
+    ) as file:
+        file.write(data)
+    try:
+        # Файлы снимков читает и nginx (X-Accel-Redirect).
+        os.chmod(file.name, 0o644)
+        os.replace(file.name, path)
+    except OSError:
+        remove_file(file.name)
+        raise
+
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_catalog(name: str) -> Tuple[str, bool]:
+    """Сохраняет снимок каталога, делает его текущей версией и
+    возвращает её и признак того, что она осталась текущей: если за время
+    построения каталог изменился, файл версии удаляется.
+    Остаются файлы текущей и последней предыдущей версий: предыдущую
+    может отдавать nginx по уже выданному X-Accel-Redirect."""
+    model, serializer_class = CATALOGS[name]
+    os.makedirs(settings.CATALOG_DIR, exist_ok=True)
+    generation = read_generation(name)
+    content = FastJSONRenderer().render(
+        serializer_class(model.objects.all(), many=True).data
+    )
+    version = hashlib.sha256(content).hexdigest()[:32]
+    filename = f"{name}.{version}.json"
+    replace_file(catalog_path(filename), content)
+    replace_file(
+        catalog_path(filename + ".gz"), gzip.compress(content, 9, mtime=0)
+    )
+    replace_file(version_path(name), version.encode())
+    # invalidate_catalog меняет поколение до удаления файла версии,
+    # поэтому изменение, зафиксированное после чтения каталога, либо
+    # видно здесь, либо удалит записанный файл версии само.
+    if read_generation(name) != generation:
+        remove_file(version_path(name))
+        return version, False
+    snapshots = sorted(
+        (
+            existing for existing in os.listdir(settings.CATALOG_DIR)
+            if existing.startswith(f"{name}.") and existing.endswith(".json")
+            and existing != filename
+        ),
+        key=lambda existing: os.path.getmtime(catalog_path(existing)),
+        reverse=True,
+    )
+    for existing in snapshots[1:]:
+        for path in (existing, existing + ".gz"):
+            remove_file(catalog_path(path))
+    return version, True
+
+
+def invalidate_catalog(name: str) -> None:
+    """Снимок будет построен заново при следующем запросе."""
+    os.makedirs(settings.CATALOG_DIR, exist_ok=True)
+    replace_file(generation_path(name), uuid.uuid4().hex.encode())
+    remove_file(version_path(name))
+
+
+def read_snapshot(name: str, version: str,
+                  modified: Optional[float]) -> Snapshot:
+    filename = f"{name}.{version}.json"
+    with open(catalog_path(filename), "rb") as file:
+        content = file.read()
+    with open(catalog_path(filename + ".gz"), "rb") as file:
+        compressed = file.read()
+    return Snapshot(modified, filename, content, compressed, f'"{version}"')
+
+
+def load_catalog(name: str) -> Snapshot:
+    """Текущий снимок каталога, при отсутствии он строится.
+    Файлы читаются заново только после смены версии."""
+    with _lock:
+        snapshot = _snapshots.get(name)
+        try:
+            modified = os.path.getmtime(version_path(name))
+            if snapshot is None or snapshot.modified != modified:
+                snapshot = read_snapshot(name, read_version(name), modified)
+        except FileNotFoundError:
+            for _ in range(REBUILD_ATTEMPTS):
+                version, current = write_catalog(name)
+                if current:
+                    break
+            # Снимок, не ставший текущей версией, отдаётся без
+            # кэширования: modified=None не совпадёт с файлом версии.
+            snapshot = read_snapshot(
+                name, version, version_modified(name) if current else None
+            )
+        _snapshots[name] = snapshot
+    return snapshot
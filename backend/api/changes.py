@@ -0,0 +1,73 @@
+"""Представление журнала изменений (см. sync.feed) для клиентов.
+Для общих объектов, изменённых после курсора, в ответ включается их
+текущее состояние в компактном виде: рецепт - с id автора, id тегов и
+парами id, amount ингредиентов, без полей, зависящих от пользователя.
+Личные объекты (избранное, корзина, подписки) передаются только
+идентификатором рецепта или автора.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from api.serializers import (IngredientSerializer, RecipeReadSerializer,
+                             TagSerializer)
+from recipe.models import Ingredient, Recipe, Tag
+from sync.feed import ChangeEntry
+from sync.models import Change
+
+RECIPE_FIELDS = frozenset(RecipeReadSerializer.FIELDS) - {
+    "is_favorited", "is_in_shopping_cart"
+}
+
+
+def load_recipes(ids, request) -> Dict[int, Dict]:
+    queryset = RecipeReadSerializer.sparse_queryset(
+        Recipe.objects.filter(pk__in=ids), RECIPE_FIELDS, frozenset()
+    )
+    data = RecipeReadSerializer(queryset, many=True, context={
+        "request": request, "fields": RECIPE_FIELDS, "expand": frozenset(),
+    }).data
+    return {recipe["id"]: recipe for recipe in data}
+
+
+def load_model(model, serializer_class):
+    def load(ids, request) -> Dict[int, Dict]:
+        data = serializer_class(model.objects.filter(pk__in=ids), many=True).data
+        return {item["id"]: item for item in data}
+    return load
+
+
+LOADERS = {
+    Change.Entity.RECIPE: load_recipes,
+    Change.Entity.TAG: load_model(Tag, TagSerializer),
+    Change.Entity.INGREDIENT: load_model(Ingredient, IngredientSerializer),
+}
+
+
+def render_changes(changes: Iterable[ChangeEntry], request) -> List[Dict]:
+    """Изменения в порядке журнала. Объект, удалённый после изменения,
+    отдаётся как удалённый: его удаление придёт следующим."""
+    changes = list(changes)
+    ids = defaultdict(set)
+    for change in changes:
+        if not change.deleted and change.entity in LOADERS:
+            ids[change.entity].add(change.object_id)
+    objects = {
+        entity: LOADERS[entity](entity_ids, request)
+        for entity, entity_ids in ids.items()
+    }
+    result = []
+    for change in changes:
+        item = {
+            "entity": change.entity,
+            "id": change.object_id,
+            "deleted": change.deleted,
+        }
+        if not change.deleted and change.entity in LOADERS:
+            data = objects[change.entity].get(change.object_id)
+            if data is None:
+                item["deleted"] = True
+            else:
+                item["data"] = data
+        result.append(item)
+    return result
@@ -0,0 +1,93 @@
+"""Проверки конфигурации, выполняемые при запуске приложения.
+"""
+
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.core.checks import Error, Info, Tags, Warning, register
+from django.db import connections
+
+from backend.storage import ContentHashedMixin
+
+DATABASE_POOL_TAG = "database_pool"
+# Кэши, которые не видны другим процессам.
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(DATABASE_POOL_TAG, deploy=True)
+def check_database_connections(app_configs, **kwargs):
+    """Сообщает итоговую конфигурацию соединений с базой данных
+    и предупреждает, если суммарный размер пулов всех процессов
+    gunicorn превышает лимит соединений PostgreSQL."""
+    messages = []
+    processes = settings.GUNICORN_WORKERS
+    threads = settings.GUNICORN_THREADS
+    for alias in connections:
+        options = connections[alias].settings_dict
+        pool = options.get("POOL") or {}
+        pooled = options["ENGINE"] == "backend.db.postgresql_pool"
+        per_process = pool.get("MAX_SIZE", threads) if pooled else threads
+        total = processes * per_process
+        pool_size = f"{pool.get('MIN_SIZE')}..{per_process}" if pooled else "off"
+        messages.append(Info(
+            f"{alias}: engine={options['ENGINE']}, "
+            f"conn_max_age={options.get('CONN_MAX_AGE')}, "
+            f"health_checks={options.get('CONN_HEALTH_CHECKS', False)}, "
+            f"pool={pool_size}, "
+            f"workers={processes}, threads={threads}, "
+            f"max_connections={total}",
+            id="api.I001",
+        ))
+        if pooled and per_process < threads:
+            messages.append(Warning(
+                f"{alias}: размер пула ({per_process}) меньше числа потоков "
+                f"gunicorn ({threads}), потоки будут ждать соединения.",
+                hint="Увеличьте DB_POOL_MAX_SIZE или уменьшите GUNICORN_THREADS.",
+                id="api.W001",
+            ))
+        if total > settings.DB_MAX_CONNECTIONS:
+            messages.append(Warning(
+                f"{alias}: процессам может понадобиться {total} соединений, "
+                f"а лимит базы данных - {settings.DB_MAX_CONNECTIONS}.",
+                hint="Уменьшите GUNICORN_WORKERS, GUNICORN_THREADS "
+                     "или DB_POOL_MAX_SIZE.",
+                id="api.W002",
+            ))
+    return messages
+
+
+@register(Tags.caches)
+def check_feed_cache(app_configs, **kwargs):
+    """Ленты дополняет воркер run_jobs, а сбрасывают процессы API,
+    поэтому FEED_CACHE требует кэша, общего для всех процессов."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.FEED_CACHE and backend in LOCAL_CACHE_BACKENDS:
+        return [Error(
+            f"FEED_CACHE=True с кэшем {backend}: каждый процесс видит "
+            f"только свой кэш, и ленты не обновляются.",
+            hint="Укажите общий кэш через CACHE_BACKEND и CACHE_LOCATION "
+                 "или выключите FEED_CACHE.",
+            id="api.E001",
+        )]
+    return []
+
+
+@register()
+def check_file_storage(app_configs, **kwargs):
+    """Загрузки изображений (api.uploads) и учёт ссылок на файлы
+    (recipe.images) используют методы ContentHashedMixin."""
+    storage_class = get_storage_class()
+    if not issubclass(storage_class, ContentHashedMixin) or not callable(
+        getattr(storage_class, "touch", None)
+    ):
+        return [Error(
+            f"DEFAULT_FILE_STORAGE={settings.DEFAULT_FILE_STORAGE} не "
+            f"поддерживает загрузки изображений: нужны ContentHashedMixin "
+            f"и метод touch.",
+            hint="Укажите backend.storage.ContentHashedStorage, "
+                 "backend.storage.S3Storage или их наследника.",
+            id="api.E002",
+        )]
+    return []
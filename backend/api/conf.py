@@ -9,3 +9,6 @@ INGREDIENTS_ERROR_MESSAGE = "Ингредиенты в списке должны
 FILENAME = "ingredients_to_buy.txt"
 CONTENT_TYPE = "text/plain; charset=UTF-8"
 TOTAL_INGREDIENTS_HEADER = "Список ингредиентов: \n\n"
+FEED_CACHE_KEY = "feed:head:{}"
+CART_EXPORT_CACHE_KEY = "cart:export:{}:{}:{}"
+CART_EXPORT_FORMAT = "txt"
@@ -1,6 +1,7 @@
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as filters
 
-from recipe.models import Ingredient, Recipe
+from recipe.models import Ingredient, IngredientAmountInRecipe, Recipe, Tag
 
 
 class RecipeFilter(filters.FilterSet):
@@ -12,7 +13,23 @@ class RecipeFilter(filters.FilterSet):
         field_name="is_in_shopping_cart",
         method="shopping_cart_filter"
     )
-    tags = filters.AllValuesMultipleFilter(field_name="tags__slug")
+    tags = filters.ModelMultipleChoiceFilter(
+        queryset=Tag.objects.all(),
+        to_field_name="slug",
+        method="tags_filter"
+    )
+    ingredients = filters.ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(),
+        method="ingredients_filter"
+    )
+    exclude_ingredients = filters.ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(),
+        method="exclude_ingredients_filter"
+    )
+    ordering = filters.ChoiceFilter(
+        choices=(("trending", "trending"), ("popular", "popular")),
+        method="ordering_filter"
+    )
 
     def favorite_filter(self, queryset, _, value):
         if value and self.request.user.is_authenticated:
@@ -20,11 +37,60 @@ class RecipeFilter(filters.FilterSet):
         return queryset
 
     def shopping_cart_filter(self, queryset, _, value):
-        return Recipe.objects.filter(shopping_cart__user=self.request.user.id)
+        if value and self.request.user.is_authenticated:
+            return queryset.filter(shopping_cart__user=self.request.user.id)
+        return queryset
+
+    @staticmethod
+    def tags_filter(queryset, _, value):
+        """Рецепты с любым из тегов. EXISTS вместо JOIN не размножает
+        строки рецептов, поэтому DISTINCT не нужен."""
+        if not value:
+            return queryset
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef("pk"), tag__in=value
+            )
+        ))
+
+    @staticmethod
+    def ingredients_filter(queryset, _, value):
+        """Рецепты, в которых есть все переданные ингредиенты:
+        по EXISTS на каждый ингредиент (индекс ingredient_recipe_idx)."""
+        for ingredient in value:
+            queryset = queryset.filter(Exists(
+                IngredientAmountInRecipe.objects.filter(
+                    recipe=OuterRef("pk"), ingredient=ingredient
+                )
+            ))
+        return queryset
+
+    @staticmethod
+    def exclude_ingredients_filter(queryset, _, value):
+        """Рецепты без переданных ингредиентов: NOT EXISTS
+        по индексу recipe_ingredient_idx."""
+        if not value:
+            return queryset
+        return queryset.filter(~Exists(
+            IngredientAmountInRecipe.objects.filter(
+                recipe=OuterRef("pk"), ingredient__in=value
+            )
+        ))
+
+    @staticmethod
+    def ordering_filter(queryset, _, value):
+        """Сортировка по рейтингу из RecipeScore. Рецепты без рейтинга
+        (новые и без событий) идут после остальных."""
+        return queryset.order_by(
+            F(f"score__{value}").desc(nulls_last=True), "-date", "-id"
+        )
 
     class Meta:
         model = Recipe
-        fields = ("author",)
+        fields = {
+            "author": ("exact",),
+            "cooking_time": ("lte", "gte"),
+        }
 
 
 class IngredientFilter(filters.FilterSet):
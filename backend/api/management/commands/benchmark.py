@@ -0,0 +1,146 @@
+import json
+import platform
+from datetime import datetime
+
+import django
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+
+from api.benchmarks import (build_context, compare_middleware,
+                            compare_recipe_serializers, compare_renderers,
+                            compare_results, dataset_summary,
+                            default_scenarios, measure_startup, run_scenario,
+                            run_scenario_async)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет перцентили времени ответа и количество SQL-запросов "
+        "основных эндпоинтов API и сохраняет результат в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--scenario", action="append", default=[],
+                            help="Запустить только указанные сценарии.")
+        parser.add_argument("--email", help="Пользователь для сценариев.")
+        parser.add_argument("--asgi", action="store_true",
+                            help="Выполнять запросы через ASGI-маршруты "
+                                 "с асинхронными представлениями.")
+        parser.add_argument("--concurrency", type=int, default=1,
+                            help="Число одновременных запросов в режиме ASGI.")
+        parser.add_argument("--serializers", action="store_true",
+                            help="Сравнить RecipeSerializer и "
+                                 "RecipeReadSerializer на странице рецептов.")
+        parser.add_argument("--renderers", action="store_true",
+                            help="Сравнить JSONRenderer и FastJSONRenderer.")
+        parser.add_argument("--overhead", action="store_true",
+                            help="Сравнить время запуска и накладные расходы "
+                                 "middleware профилей backend.settings и "
+                                 "backend.settings_api.")
+        parser.add_argument("--startup-runs", type=int, default=5)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--output", help="Файл для сохранения результата.")
+        parser.add_argument("--compare", help="Отчёт предыдущего запуска.")
+
+    def handle(self, *args, **options):
+        try:
+            context = build_context(options["email"])
+        except ValueError as error:
+            raise CommandError(error)
+        scenarios = default_scenarios(context)
+        if options["scenario"]:
+            scenarios = [s for s in scenarios if s.name in options["scenario"]]
+        report = {
+            "meta": {
+                "started": datetime.now().isoformat(timespec="seconds"),
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "iterations": options["iterations"],
+                "server_mode": "asgi" if options["asgi"] else "wsgi",
+                "concurrency": options["concurrency"] if options["asgi"] else 1,
+                "warmup": options["warmup"],
+                "dataset": dataset_summary(),
+            },
+            "results": {},
+        }
+        urlconf = "backend.urls_asgi" if options["asgi"] else "backend.urls"
+        with override_settings(ALLOWED_HOSTS=["*"], ROOT_URLCONF=urlconf):
+            for scenario in scenarios:
+                if options["asgi"]:
+                    result = async_to_sync(run_scenario_async)(
+                        AsyncClient(), scenario, context.token,
+                        options["iterations"], options["warmup"],
+                        options["concurrency"],
+                    )
+                else:
+                    result = run_scenario(
+                        Client(), scenario, context.token,
+                        options["iterations"], options["warmup"],
+                    )
+                report["results"][scenario.name] = result
+                self.stdout.write(
+                    f"{scenario.name:<32} p50={result['p50_ms']:>9.2f}ms "
+                    f"p95={result['p95_ms']:>9.2f}ms "
+                    f"queries={result['queries']!s:<4} errors={result['errors']}"
+                )
+            if options["serializers"]:
+                result = compare_recipe_serializers(
+                    context.user, options["page_size"]
+                )
+                report["serializers"] = result
+                self.stdout.write(
+                    f"{'serializers':<32} RecipeSerializer="
+                    f"{result['RecipeSerializer_ms']:.2f}ms RecipeReadSerializer="
+                    f"{result['RecipeReadSerializer_ms']:.2f}ms "
+                    f"x{result['speedup']} identical={result['identical']}"
+                )
+                if not result["identical"]:
+                    raise CommandError(
+                        "Результат RecipeReadSerializer отличается от RecipeSerializer"
+                    )
+            if options["renderers"]:
+                report["renderers"] = compare_renderers(
+                    context.user, options["page_size"]
+                )
+                for name, result in report["renderers"].items():
+                    self.stdout.write(
+                        f"{name:<32} JSONRenderer={result['JSONRenderer_ms']:.2f}ms "
+                        f"FastJSONRenderer={result['FastJSONRenderer_ms']:.2f}ms "
+                        f"x{result['speedup']} identical={result['identical']}"
+                    )
+        if options["overhead"]:
+            report["overhead"] = {
+                "startup": {
+                    module: measure_startup(module, options["startup_runs"])
+                    for module in ("backend.settings", "backend.settings_api")
+                },
+            }
+            for module, result in report["overhead"]["startup"].items():
+                self.stdout.write(
+                    f"{'startup ' + module:<32} {result['startup_ms']:>9.2f}ms "
+                    f"modules={result['modules']}"
+                )
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                report["overhead"]["middleware"] = compare_middleware(
+                    iterations=options["iterations"] * 4
+                )
+            for module, result in report["overhead"]["middleware"].items():
+                self.stdout.write(
+                    f"{'request ' + module:<32} p50={result['p50_ms']:>9.2f}ms "
+                    f"p95={result['p95_ms']:>9.2f}ms "
+                    f"middleware={result['middleware']}"
+                )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options["compare"]:
+            with open(options["compare"], "r", encoding="utf-8") as file:
+                previous = json.load(file)
+            for name, metric, old, new, change in compare_results(previous, report):
+                delta = f"{change:+.1f}%" if change is not None else "n/a"
+                self.stdout.write(f"{name:<32} {metric:<8} {old} -> {new} ({delta})")
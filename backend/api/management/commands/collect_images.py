@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.uploads import UPLOAD_DIRECTORY
+from recipe.images import collect_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет файлы изображений рецептов, на которые не ссылается ни один "
+        "рецепт дольше IMAGE_GC_GRACE_HOURS часов, и брошенные прямые "
+        "загрузки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float,
+                            default=settings.IMAGE_GC_GRACE_HOURS)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Только посчитать файлы без ссылок.")
+
+    def handle(self, *args, **options):
+        deleted = collect_garbage(
+            timedelta(hours=options["grace_hours"]), options["dry_run"],
+            (UPLOAD_DIRECTORY,),
+        )
+        action = "Найдено" if options["dry_run"] else "Удалено"
+        self.stdout.write(f"{action} файлов без ссылок: {deleted}")
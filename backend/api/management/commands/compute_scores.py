@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from recipe.scores import compute_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рейтинги trending и popular с момента "
+        "предыдущего запуска. Рассчитана на запуск по расписанию."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true",
+                            help="Пересчитать рейтинги по всем событиям.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        run = compute_scores(options["full"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Обновлено рейтингов: {run.recipes}, события учтены до "
+            f"{run.computed_until:%Y-%m-%d %H:%M:%S}"
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.similarity import compute_similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает таблицу похожих рецептов для изменённых рецептов "
+        "или полностью (--full). Требует numpy и scipy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true",
+                            help="Пересчитать соседей всех рецептов.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            total = compute_similarity(options["full"], options["batch_size"])
+        except ImportError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано рецептов: {total}"))
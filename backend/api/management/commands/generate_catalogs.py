@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalogs import CATALOGS, write_catalog
+
+
+class Command(BaseCommand):
+    help = "Сохраняет снимки каталогов тегов и ингредиентов в CATALOG_DIR."
+
+    def add_arguments(self, parser):
+        # Без choices: argparse в Python 3.8-3.11 проверяет по ним и пустой
+        # список nargs="*", и команда без аргументов завершается ошибкой.
+        parser.add_argument("catalogs", nargs="*",
+                            help=f"Каталоги ({', '.join(CATALOGS)}), "
+                                 f"по умолчанию все.")
+
+    def handle(self, *args, **options):
+        unknown = set(options["catalogs"]) - set(CATALOGS)
+        if unknown:
+            raise CommandError(
+                f"Неизвестные каталоги: {', '.join(sorted(unknown))}. "
+                f"Доступны: {', '.join(CATALOGS)}"
+            )
+        for name in options["catalogs"] or CATALOGS:
+            version, current = write_catalog(name)
+            self.stdout.write(
+                f"{name}: {settings.CATALOG_DIR}/{name}.{version}.json"
+            )
+            if not current:
+                self.stderr.write(
+                    f"{name}: каталог изменился во время построения, "
+                    f"снимок будет построен заново при следующем запросе"
+                )
@@ -0,0 +1,229 @@
+"""Генератор синтетических данных для нагрузочного тестирования API.
+"""
+
+import csv
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipe.models import (
+    FavoriteRecipe, Ingredient, IngredientAmountInRecipe, Recipe, ShoppingCart, Tag
+)
+from users.models import Subscribe
+
+User = get_user_model()
+
+EMAIL_DOMAIN = "synthetic.foodgram"
+PASSWORD = "synthetic-password"
+BATCH_SIZE = 1000
+TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+    ("Десерт", "#CD5C5C", "dessert"),
+    ("Выпечка", "#DAA520", "bakery"),
+    ("Суп", "#4682B4", "soup"),
+    ("Салат", "#2E8B57", "salad"),
+    ("Постное", "#708090", "lenten"),
+)
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> list:
+    """Веса популярности по закону Ципфа: первые элементы встречаются чаще."""
+    return [1 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует синтетических пользователей, рецепты, избранное, "
+        "корзины и подписки для бенчмарков."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--ingredients-per-recipe", type=int, nargs=2,
+                            default=(3, 12), metavar=("MIN", "MAX"))
+        parser.add_argument("--tags-per-recipe", type=int, nargs=2,
+                            default=(1, 3), metavar=("MIN", "MAX"))
+        parser.add_argument("--favorites-per-user", type=int, default=20)
+        parser.add_argument("--cart-per-user", type=int, default=5)
+        parser.add_argument("--subscriptions-per-user", type=int, default=10)
+        parser.add_argument("--days", type=int, default=365,
+                            help="Период, по которому распределяются даты.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--clear", action="store_true",
+                            help="Удалить ранее сгенерированные данные.")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        if options["clear"]:
+            self.clear()
+        with transaction.atomic():
+            tags = self.create_tags()
+            ingredients = self.create_ingredients()
+            users = self.create_users(options["users"])
+            recipes = self.create_recipes(users, options["recipes"], options["days"])
+            self.create_recipe_relations(recipes, ingredients, tags, options)
+            self.create_user_relations(users, recipes, options)
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано: пользователей {len(users)}, рецептов {len(recipes)}"
+        ))
+
+    def clear(self):
+        users = User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}")
+        Recipe.objects.filter(author__in=users).delete()
+        users.delete()
+
+    @staticmethod
+    def create_tags() -> list:
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={"name": name, "color": color}
+            )
+        return list(Tag.objects.values_list("id", flat=True))
+
+    @staticmethod
+    def create_ingredients() -> list:
+        if not Ingredient.objects.exists():
+            with open("data/ingredients.csv", "r", encoding="utf-8") as file:
+                Ingredient.objects.bulk_create(
+                    (
+                        Ingredient(name=name, measurement_unit=unit)
+                        for name, unit in csv.reader(file, delimiter=",")
+                    ),
+                    batch_size=BATCH_SIZE,
+                )
+        return list(Ingredient.objects.order_by("id").values_list("id", flat=True))
+
+    @staticmethod
+    def create_users(count: int) -> list:
+        start = User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").count()
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    email=f"user{i}@{EMAIL_DOMAIN}",
+                    username=f"synthetic_user{i}",
+                    first_name=f"Имя{i}",
+                    last_name=f"Фамилия{i}",
+                    password=password,
+                )
+                for i in range(start, start + count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return list(
+            User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}")
+            .order_by("id").values_list("id", flat=True)
+        )
+
+    def create_recipes(self, users: list, count: int, days: int) -> list:
+        if not users:
+            return []
+        existing = set(
+            Recipe.objects.filter(author__in=users).values_list("id", flat=True)
+        )
+        weights = zipf_weights(len(users))
+        authors = self.random.choices(users, weights=weights, k=count)
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=author,
+                    name=f"Рецепт {i}",
+                    text=f"Описание синтетического рецепта {i}. " * 5,
+                    cooking_time=self.random.randint(5, 180),
+                )
+                for i, author in enumerate(authors)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        recipes = [
+            pk for pk in Recipe.objects.filter(author__in=users)
+            .order_by("id").values_list("id", flat=True)
+            if pk not in existing
+        ]
+        now = timezone.now()
+        Recipe.objects.bulk_update(
+            (
+                Recipe(id=pk, date=now - timedelta(
+                    seconds=self.random.randint(0, days * 24 * 3600)
+                ))
+                for pk in recipes
+            ),
+            ("date",),
+            batch_size=BATCH_SIZE,
+        )
+        return recipes
+
+    def create_recipe_relations(self, recipes, ingredients, tags, options):
+        ingredient_weights = zipf_weights(len(ingredients))
+        amounts, recipe_tags = [], []
+        for recipe in recipes:
+            size = self.random.randint(*options["ingredients_per_recipe"])
+            chosen = set(self.random.choices(
+                ingredients, weights=ingredient_weights, k=size
+            ))
+            amounts.extend(
+                IngredientAmountInRecipe(
+                    recipe_id=recipe,
+                    ingredient_id=ingredient,
+                    amount=self.random.randint(1, 500),
+                )
+                for ingredient in chosen
+            )
+            size = min(self.random.randint(*options["tags_per_recipe"]), len(tags))
+            recipe_tags.extend(
+                Recipe.tags.through(recipe_id=recipe, tag_id=tag)
+                for tag in self.random.sample(tags, size)
+            )
+        IngredientAmountInRecipe.objects.bulk_create(amounts, batch_size=BATCH_SIZE)
+        Recipe.tags.through.objects.bulk_create(recipe_tags, batch_size=BATCH_SIZE)
+
+    def sample_weighted(self, population, weights, size) -> set:
+        size = min(size, len(population))
+        if not size:
+            return set()
+        return set(self.random.choices(population, weights=weights, k=size))
+
+    def create_user_relations(self, users, recipes, options):
+        recipe_weights = zipf_weights(len(recipes))
+        author_weights = zipf_weights(len(users))
+        favorites, carts, subscriptions = [], [], []
+        for user in users:
+            favorites.extend(
+                FavoriteRecipe(user_id=user, recipe_id=recipe)
+                for recipe in self.sample_weighted(
+                    recipes, recipe_weights,
+                    self.random.randint(0, options["favorites_per_user"]),
+                )
+            )
+            carts.extend(
+                ShoppingCart(user_id=user, recipe_id=recipe)
+                for recipe in self.sample_weighted(
+                    recipes, recipe_weights,
+                    self.random.randint(0, options["cart_per_user"]),
+                )
+            )
+            subscriptions.extend(
+                Subscribe(user_id=user, author_id=author)
+                for author in self.sample_weighted(
+                    users, author_weights,
+                    self.random.randint(0, options["subscriptions_per_user"]),
+                )
+                if author != user
+            )
+        FavoriteRecipe.objects.bulk_create(
+            favorites, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        ShoppingCart.objects.bulk_create(
+            carts, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        Subscribe.objects.bulk_create(
+            subscriptions, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
@@ -0,0 +1,49 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.schema import generate_schema, operations, write_schema
+
+DOCS_SCHEMA = os.path.join(settings.BASE_DIR, "..", "docs", "openapi-schema.yml")
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует схему API в API_SCHEMA_DIR и сравнивает набор "
+        "эндпоинтов с docs/openapi-schema.yml. С --check завершается "
+        "ошибкой, если описанных в документации эндпоинтов нет в API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Завершиться ошибкой, если в API нет "
+                                 "эндпоинтов из документации.")
+        parser.add_argument("--no-write", action="store_true",
+                            help="Не сохранять схему.")
+        parser.add_argument("--docs", default=DOCS_SCHEMA,
+                            help="Файл документации для сравнения.")
+
+    def handle(self, *args, **options):
+        from drf_yasg.codecs import yaml_sane_load
+
+        schema = generate_schema()
+        if not options["no_write"]:
+            write_schema(schema)
+            self.stdout.write(f"Схема сохранена в {settings.API_SCHEMA_DIR}")
+        if not os.path.exists(options["docs"]):
+            if options["check"]:
+                raise CommandError(f"Файл {options['docs']} не найден")
+            return
+        with open(options["docs"], "r", encoding="utf-8") as file:
+            documented = operations(yaml_sane_load(file))
+        generated = operations(json.loads(json.dumps(schema)))
+        for title, difference in (
+            ("Нет в документации", generated - documented),
+            ("Нет в схеме", documented - generated),
+        ):
+            for path, method in sorted(difference):
+                self.stdout.write(f"{title}: {method.upper()} {path}")
+        if options["check"] and documented - generated:
+            raise CommandError("В API нет эндпоинтов из документации")
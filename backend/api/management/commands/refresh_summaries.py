@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from recipe.models import Recipe
+from recipe.summaries import SUMMARY_VERSION, refresh_stale_summaries
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводки тегов и ингредиентов рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true",
+                            help="Пересчитать все сводки, а не только устаревшие.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            Recipe.objects.filter(summary_version=SUMMARY_VERSION).update(
+                summary_version=0
+            )
+        total = refresh_stale_summaries(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано сводок: {total}"))
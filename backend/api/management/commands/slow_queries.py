@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from monitoring.models import SlowQuery
+from monitoring.queries import top_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Отчёт о самых медленных запросах к базе, записанных при "
+        "SLOW_QUERY_MS > 0 (см. monitoring.queries)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--order", choices=("total", "mean", "max", "calls"),
+                            default="total")
+        parser.add_argument("--view", help="Только запросы представления.")
+        parser.add_argument("--plans", action="store_true",
+                            help="Выводить планы EXPLAIN.")
+        parser.add_argument("--reset", action="store_true",
+                            help="Удалить записанные запросы.")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f"Удалено записей: {deleted}")
+            return
+        queries = top_queries(options["top"], options["order"], options["view"])
+        for number, query in enumerate(queries, 1):
+            self.stdout.write(
+                f"{number}. {query.view or '-'}: {query.calls} вызовов, "
+                f"всего {query.total_time:.1f} мс, в среднем {query.mean_time:.1f} мс, "
+                f"максимум {query.max_time:.1f} мс"
+            )
+            self.stdout.write(f"   {query.sql}")
+            if options["plans"] and query.plan:
+                for line in query.plan.splitlines():
+                    self.stdout.write(f"   | {line}")
@@ -0,0 +1,117 @@
+"""Промежуточные слои (middleware) приложения.
+"""
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+from backend.db.routers import RoutingState, routing_state
+from backend.middleware import HybridMiddleware
+
+PIN_COOKIE = "db_primary"
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """Направляет чтение безопасных запросов к представлениям api
+    на реплики базы данных.
+    После запроса с записью клиент получает cookie, и в течение
+    REPLICA_PIN_SECONDS его запросы читают из основной базы, чтобы
+    сразу видеть свои изменения (read-after-write).
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin(state, response)
+
+    @staticmethod
+    def pin(state: RoutingState, response):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        state = routing_state.get()
+        if state is None:
+            return None
+        view = getattr(view_func, "cls", view_func)
+        state.use_replica = (
+            request.method in SAFE_METHODS
+            and view.__module__.startswith("api.")
+            and not getattr(view, "read_from_primary", False)
+            and not getattr(view_func, "read_from_primary", False)
+        )
+        return None
+
+
+class AdminMiddleware(HybridMiddleware):
+    """Выполняет цепочку ADMIN_MIDDLEWARE только для запросов, путь
+    которых начинается с ADMIN_PATH_PREFIX. API аутентифицируется
+    токеном, поэтому сессии, CSRF и сообщения ему не нужны.
+    Обработчик Django вызывает process_view и process_exception только
+    у слоёв из MIDDLEWARE, поэтому они передаются вложенным слоям здесь.
+    Вложенные слои - MiddlewareMixin, с асинхронным get_response они
+    тоже асинхронные, и __call__ в ASGI возвращает их корутину.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.prefix = settings.ADMIN_PATH_PREFIX
+        self.middleware = []
+        handler = get_response
+        for path in reversed(settings.ADMIN_MIDDLEWARE):
+            handler = import_string(path)(handler)
+            self.middleware.insert(0, handler)
+        self.admin_handler = handler
+
+    def is_admin(self, request) -> bool:
+        return request.path_info.startswith(self.prefix)
+
+    def __call__(self, request):
+        if self.is_admin(request):
+            return self.admin_handler(request)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.is_admin(request):
+            return None
+        for middleware in self.middleware:
+            if hasattr(middleware, "process_view"):
+                response = middleware.process_view(
+                    request, view_func, view_args, view_kwargs
+                )
+                if response is not None:
+                    return response
+        return None
+
+    def process_exception(self, request, exception):
+        if not self.is_admin(request):
+            return None
+        for middleware in reversed(self.middleware):
+            if hasattr(middleware, "process_exception"):
+                response = middleware.process_exception(request, exception)
+                if response is not None:
+                    return response
+        return None
+
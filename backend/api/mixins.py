@@ -2,9 +2,12 @@
 для настройки основных представлений приложения.
 """
 
+from typing import FrozenSet, Iterable, Tuple
+
 from django.contrib.auth import get_user_model
 from django.db.models import Model
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 
@@ -74,3 +77,56 @@ class UserActionPostDeleteGenericApiMixin(GenericAPIView):
             instance.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+def parse_fields(params, param: str, allowed: Iterable[str]) -> FrozenSet[str]:
+    value = params.get(param, "")
+    fields = frozenset(field.strip() for field in value.split(",")) - {""}
+    unknown = fields.difference(allowed)
+    if unknown:
+        raise ValidationError(
+            {param: f"Неизвестные поля: {', '.join(sorted(unknown))}"}
+        )
+    return fields
+
+
+def parse_sparse_fields(params, fields: Iterable[str],
+                        expandable: Iterable[str]
+                        ) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Отдаваемые поля и поля, отдаваемые вложенными объектами,
+    по параметрам ?fields=, ?omit= и ?expand=."""
+    selected = frozenset(fields)
+    if "fields" in params:
+        selected = parse_fields(params, "fields", fields)
+    selected -= parse_fields(params, "omit", fields)
+    expand = frozenset(expandable)
+    if "expand" in params:
+        expand = parse_fields(params, "expand", expandable)
+    return selected, expand
+
+
+class SparseFieldsMixin:
+    """Выбор полей ответа параметрами запроса для GET.
+    ?fields=id,name - только перечисленные поля, ?omit=text - все, кроме
+    перечисленных, ?expand=author,tags - какие из expandable_fields
+    отдаются вложенными объектами (без параметра - все), остальные
+    сворачиваются до идентификаторов. Выбранные поля передаются
+    сериализатору в контексте ("fields", "expand"), а представление
+    не загружает данные для неотданных полей.
+    Attribute:
+        sparse_fields(tuple): Поля, которые можно выбирать.
+        expandable_fields(tuple): Поля-вложенные объекты.
+    """
+    sparse_fields: Tuple[str, ...] = ()
+    expandable_fields: Tuple[str, ...] = ()
+
+    def get_sparse_fields(self) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        return parse_sparse_fields(
+            self.request.query_params, self.sparse_fields, self.expandable_fields
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method == "GET":
+            context["fields"], context["expand"] = self.get_sparse_fields()
+        return context
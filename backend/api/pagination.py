@@ -1,5 +1,13 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class FeedPagination(CursorPagination):
+    """Курсорная пагинация ленты: стоимость запроса не зависит
+    от глубины страницы, новые рецепты не сдвигают уже полученные."""
+    ordering = ("-date", "-id")
+    page_size_query_param = 'limit'
+    max_page_size = 50
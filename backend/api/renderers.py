@@ -0,0 +1,45 @@
+"""Рендереры ответов API.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на основе orjson.
+    Результат побайтно совпадает с JSONRenderer при настройках по умолчанию
+    (UNICODE_JSON, COMPACT_JSON): даты, время, Decimal и ленивые строки
+    кодируются методом default стандартного JSONEncoder DRF.
+    Если orjson не установлен или запрошен вывод с отступами
+    (browsable API, `application/json; indent=4`),
+    используется стандартный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # JSONRenderer экранирует U+2028 и U+2029, чтобы ответ был
+        # допустимым JavaScript.
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b"\\u2028").replace(
+                PARAGRAPH_SEPARATOR, b"\\u2029"
+            )
+        return ret
@@ -0,0 +1,108 @@
+"""Заранее сгенерированная схема API.
+Схема строится drf_yasg один раз (командой generate_schema при запуске
+gunicorn или при первом запросе) и сохраняется в API_SCHEMA_DIR в виде
+swagger.json и swagger.yaml вместе со сжатыми копиями .gz. Представление
+отдаёт готовые файлы, поэтому drf_yasg импортируется только при генерации.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Set, Tuple
+
+from django.conf import settings
+
+SCHEMA_FORMATS = {
+    ".json": "application/json",
+    ".yaml": "application/yaml",
+}
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch")
+
+_files: Dict[str, Tuple[float, bytes, bytes, str]] = {}
+_lock = threading.Lock()
+
+
+def schema_path(format: str) -> str:
+    return os.path.join(settings.API_SCHEMA_DIR, f"swagger{format}")
+
+
+def schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Foodgram API",
+        default_version="v1",
+        description="ƒÓÍÛÏÂÌÚ‡ˆËˇ ‰Îˇ ÔËÎÓÊÂÌËˇ api ÔÓÂÍÚ‡ Foodgram",
+        contact=openapi.Contact(email="admin@mail.ru"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+def generate_schema():
+    """Строит схему API по всем представлениям."""
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    return OpenAPISchemaGenerator(schema_info()).get_schema(
+        request=None, public=True
+    )
+
+
+def write_schema(schema) -> None:
+    """Сохраняет схему во всех форматах, файлы заменяются атомарно."""
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    os.makedirs(settings.API_SCHEMA_DIR, exist_ok=True)
+    codecs = {".json": OpenAPICodecJson, ".yaml": OpenAPICodecYaml}
+    for format, codec in codecs.items():
+        content = codec(validators=()).encode(schema)
+        for path, data in (
+            (schema_path(format), content),
+            (schema_path(format) + ".gz", gzip.compress(content, 9, mtime=0)),
+        ):
+            # Временный файл свой у каждого процесса: схему могут
+            # одновременно записывать generate_schema и первый запрос.
+            with tempfile.NamedTemporaryFile(
+                dir=settings.API_SCHEMA_DIR, suffix=".tmp", delete=False
+            ) as file:
+                file.write(data)
+            try:
+                os.chmod(file.name, 0o644)
+                os.replace(file.name, path)
+            except OSError:
+                os.remove(file.name)
+                raise
+
+
+def load_schema(format: str) -> Tuple[bytes, bytes, str]:
+    """Содержимое файла схемы, его сжатая копия и ETag несжатого файла.
+    Если файла нет, схема генерируется. Файлы читаются заново только
+    после изменения, например после запуска generate_schema."""
+    path = schema_path(format)
+    with _lock:
+        if not os.path.exists(path):
+            write_schema(generate_schema())
+        modified = os.path.getmtime(path)
+        cached = _files.get(path)
+        if cached is None or cached[0] != modified:
+            with open(path, "rb") as file:
+                content = file.read()
+            with open(path + ".gz", "rb") as file:
+                compressed = file.read()
+            etag = '"{}"'.format(hashlib.sha256(content).hexdigest()[:32])
+            cached = _files[path] = (modified, content, compressed, etag)
+    return cached[1:]
+
+
+def operations(document: Dict) -> Set[Tuple[str, str]]:
+    """Пары (путь, метод) схемы Swagger 2 или OpenAPI 3.
+    Пути Swagger 2 дополняются basePath, чтобы их можно было сравнить
+    с docs/openapi-schema.yml."""
+    base_path = (document.get("basePath") or "").rstrip("/")
+    return {
+        (base_path + path, method)
+        for path, item in (document.get("paths") or {}).items()
+        for method in item
+        if method in HTTP_METHODS
+    }
@@ -1,20 +1,29 @@
-import base64
 from collections import OrderedDict
+from operator import attrgetter
 from typing import Dict, List
 
 from django.core.validators import MinValueValidator
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
-from django.db import transaction
+from django.db import models, transaction
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from rest_framework.validators import UniqueTogetherValidator
 
 from api.conf import (
     COOKING_MIN_VALUE, AMOUNT_MIN_VALUE, MIN_VALUE_ERROR_MESSAGE,
     TAGS_ERROR_MESSAGE, INGREDIENTS_ERROR_MESSAGE
 )
+from api.uploads import (
+    IMAGE_CONTENT_TYPES, REFERENCE_PREFIX, decode_image, discard_upload,
+    open_upload
+)
+from jobs.models import Job
 from recipe.models import (
-    Ingredient, IngredientAmountInRecipe, Recipe, ShoppingCart, Tag
+    FavoriteRecipe, Ingredient, IngredientAmountInRecipe, Recipe, ShoppingCart, Tag
+)
+from recipe.similarity import mark_stale
+from recipe.summaries import (
+    SUMMARY_VERSION, load_ingredients, load_tags, refresh_summaries
 )
 from users.models import Subscribe
 
@@ -22,13 +31,15 @@ User = get_user_model()
 
 
 class Base64ImageField(serializers.ImageField):
-    """Сериализатор для загрузки изображения."""
+    """Сериализатор для загрузки изображения: строка base64
+    (data:image/...;base64,...) или ссылка на загруженный файл
+    (upload:..., см. api.uploads)."""
 
     def to_internal_value(self, data: str) -> str:
-        if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
-            data = ContentFile(base64.b64decode(imgstr), name=f"temp.{ext}")
+        if isinstance(data, str) and data.startswith(REFERENCE_PREFIX):
+            data = open_upload(data, self.context.get("request").user)
+        elif isinstance(data, str) and data.startswith("data:image"):
+            data = decode_image(data)
         return super().to_internal_value(data)
 
 
@@ -47,14 +58,32 @@ class CustomUserSerializer(serializers.ModelSerializer):
             "is_subscribed",
         )
 
+    def get_fields(self):
+        """Поля, выбранные параметрами ?fields= и ?omit= (см.
+        api.mixins.SparseFieldsMixin); вложенный сериализатор
+        отдаёт все поля."""
+        fields = super().get_fields()
+        selected = self.context.get("fields")
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if selected is None or parent is not None:
+            return fields
+        return OrderedDict(
+            (name, field) for name, field in fields.items() if name in selected
+        )
+
     def get_is_subscribed(self, obj: User) -> bool:
         """Определяет - подписан ли текущий пользователь
         на просматриваемого пользователя.
+        Если queryset аннотирован полем subscribed, запрос не выполняется.
         Args:
             obj (User): Пользователь, на которого проверяется подписка.
         Returns:
             bool: True, если подписка есть. Во всех остальных случаях False.
         """
+        if hasattr(obj, "subscribed"):
+            return obj.subscribed
         user = self.context.get("request").user
         if user.is_anonymous:
             return False
@@ -228,6 +257,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         IngredientAmountInRecipe.objects.bulk_create(
             self.create_ingredients(ingredients, recipe)
         )
+        refresh_summaries((recipe,))
+        discard_upload(validated_data.get("image"))
         return recipe
 
     @transaction.atomic
@@ -242,7 +273,11 @@ class RecipeSerializer(serializers.ModelSerializer):
         if "tags" in self.validated_data:
             tags = validated_data.pop("tags")
             recipe.tags.set(tags)
-        return super().update(recipe, validated_data)
+        recipe = super().update(recipe, validated_data)
+        refresh_summaries((recipe,))
+        mark_stale((recipe.pk,))
+        discard_upload(validated_data.get("image"))
+        return recipe
 
     def to_representation(self, instance: Recipe) -> OrderedDict:
         """Отображение поля tags через обработку его сериализатора"""
@@ -250,6 +285,158 @@ class RecipeSerializer(serializers.ModelSerializer):
         return super().to_representation(instance)
 
 
+class RecipeListReadSerializer(serializers.ListSerializer):
+    """Загружает связанные данные сразу для всей страницы рецептов."""
+
+    def to_representation(self, data) -> List[Dict]:
+        recipes = list(data.all() if isinstance(data, models.Manager) else data)
+        self.child.prefetch(recipes)
+        return [self.child.to_representation(recipe) for recipe in recipes]
+
+
+class RecipeReadSerializer(serializers.BaseSerializer):
+    """Сериализатор рецептов только для чтения (list и retrieve).
+    Результат совпадает с RecipeSerializer, но словари собираются
+    напрямую из строк БД: теги и ингредиенты берутся из сводки рецепта,
+    подписки, избранное и корзина загружаются одним запросом на всю
+    страницу, без полей DRF для каждого объекта.
+    Поля из контекста "fields" и "expand" (см. SparseFieldsMixin)
+    ограничивают ответ, данные для остальных полей не загружаются.
+    Свёрнутые author, tags и ingredients отдаются в формате записи:
+    id автора, id тегов и пары id, amount.
+    Автора рецепта нужно загружать через select_related("author").
+    """
+    FIELDS = RecipeSerializer.Meta.fields
+    EXPANDABLE_FIELDS = ("author", "tags", "ingredients")
+
+    class Meta:
+        list_serializer_class = RecipeListReadSerializer
+
+    @staticmethod
+    def sparse_queryset(queryset, fields, expand):
+        """Не загружает автора и столбцы полей, которых нет в ответе."""
+        if "author" not in fields or "author" not in expand:
+            queryset = queryset.select_related(None)
+        deferred = [field for field in ("text", "image") if field not in fields]
+        if "tags" not in fields and "ingredients" not in fields:
+            deferred.append("summary")
+        return queryset.defer(*deferred)
+
+    @property
+    def selected_fields(self):
+        return self.context.get("fields", self.FIELDS)
+
+    @property
+    def expanded_fields(self):
+        return self.context.get("expand", self.EXPANDABLE_FIELDS)
+
+    def prefetch(self, recipes: List[Recipe]):
+        """Загружает связанные данные для переданных рецептов.
+        Теги и ингредиенты берутся из сводки рецепта, из связанных
+        таблиц загружаются только рецепты с устаревшей сводкой."""
+        fields = self.selected_fields
+        getters = {
+            "id": attrgetter("id"),
+            "name": attrgetter("name"),
+            "text": attrgetter("text"),
+            "tags": self.represent_tags,
+            "ingredients": self.represent_ingredients,
+            "image": self.represent_image,
+            "author": self.represent_author,
+            "cooking_time": attrgetter("cooking_time"),
+            "is_favorited": lambda recipe: recipe.id in self._favorited,
+            "is_in_shopping_cart": lambda recipe: recipe.id in self._in_cart,
+        }
+        self._getters = [
+            (field, getters[field]) for field in self.FIELDS if field in fields
+        ]
+        ids = [recipe.id for recipe in recipes]
+        self._summaries = {}
+        if "tags" in fields or "ingredients" in fields:
+            self._summaries = {
+                recipe.id: recipe.summary for recipe in recipes
+                if recipe.summary_version == SUMMARY_VERSION
+            }
+            stale = [
+                recipe.id for recipe in recipes if recipe.id not in self._summaries
+            ]
+            if stale:
+                tags = load_tags(stale) if "tags" in fields else {}
+                ingredients = (
+                    load_ingredients(stale) if "ingredients" in fields else {}
+                )
+                self._summaries.update(
+                    {pk: {"tags": tags.get(pk, []),
+                          "ingredients": ingredients.get(pk, [])}
+                     for pk in stale}
+                )
+        self._favorited = self._in_cart = self._subscribed = set()
+        user = self.context.get("request").user
+        if user.is_anonymous:
+            return
+        if "is_favorited" in fields:
+            self._favorited = set(
+                FavoriteRecipe.objects.filter(user=user, recipe_id__in=ids)
+                .values_list("recipe_id", flat=True)
+            )
+        if "is_in_shopping_cart" in fields:
+            self._in_cart = set(
+                ShoppingCart.objects.filter(user=user, recipe_id__in=ids)
+                .values_list("recipe_id", flat=True)
+            )
+        if "author" in fields and "author" in self.expanded_fields:
+            self._subscribed = set(
+                Subscribe.objects.filter(
+                    user=user,
+                    author_id__in={recipe.author_id for recipe in recipes},
+                ).values_list("author_id", flat=True)
+            )
+
+    def represent_tags(self, instance: Recipe):
+        tags = self._summaries[instance.id]["tags"]
+        if "tags" not in self.expanded_fields:
+            return [pk for pk, *_ in tags]
+        return [
+            {"id": pk, "name": name, "color": color, "slug": slug}
+            for pk, name, color, slug in tags
+        ]
+
+    def represent_ingredients(self, instance: Recipe):
+        ingredients = self._summaries[instance.id]["ingredients"]
+        if "ingredients" not in self.expanded_fields:
+            return [
+                {"id": pk, "amount": amount}
+                for pk, _, _, amount in ingredients
+            ]
+        return [
+            {"id": pk, "name": name, "measurement_unit": unit, "amount": amount}
+            for pk, name, unit, amount in ingredients
+        ]
+
+    def represent_author(self, instance: Recipe):
+        if "author" not in self.expanded_fields:
+            return instance.author_id
+        author = instance.author
+        return author and {
+            "email": author.email,
+            "id": author.id,
+            "username": author.username,
+            "first_name": author.first_name,
+            "last_name": author.last_name,
+            "is_subscribed": author.id in self._subscribed,
+        }
+
+    def represent_image(self, instance: Recipe):
+        if not instance.image:
+            return None
+        return self.context.get("request").build_absolute_uri(instance.image.url)
+
+    def to_representation(self, instance: Recipe) -> Dict:
+        if not hasattr(self, "_summaries"):
+            self.prefetch([instance])
+        return {field: getter(instance) for field, getter in self._getters}
+
+
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для вывода короткого рецепта"""
     image = Base64ImageField()
@@ -326,3 +513,34 @@ class SubscribeSerializer(serializers.ModelSerializer):
             bool: True, если подписка есть. Во всех остальных случаях False.
         """
         return Subscribe.objects.filter(user=obj.user, author=obj.author).exists()
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Сериализатор для вывода статуса фоновой задачи."""
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = (
+            "id",
+            "name",
+            "status",
+            "attempts",
+            "created",
+            "finished",
+            "result",
+            "download_url",
+        )
+        read_only_fields = fields
+
+    def get_download_url(self, job: Job):
+        if job.status != Job.Status.DONE or not job.result_file:
+            return None
+        return reverse(
+            "jobs-download", args=(job.pk,), request=self.context.get("request")
+        )
+
+
+class UploadSerializer(serializers.Serializer):
+    """Запрос формы прямой загрузки изображения (см. api.uploads)."""
+    content_type = serializers.ChoiceField(choices=tuple(IMAGE_CONTENT_TYPES))
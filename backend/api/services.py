@@ -1,46 +1,196 @@
 """Модуль вспомогательных функций.
 """
 
-from typing import List
+from typing import List, Optional
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db.models import (BigIntegerField, Exists, F, OuterRef, QuerySet,
+                              Sum)
+from django.http import HttpResponse, HttpResponseNotModified
 
-from api.conf import FILENAME, CONTENT_TYPE, TOTAL_INGREDIENTS_HEADER
-from recipe.models import IngredientAmountInRecipe
+from api.conf import (CART_EXPORT_CACHE_KEY, CART_EXPORT_FORMAT, FILENAME,
+                      CONTENT_TYPE, FEED_CACHE_KEY, TOTAL_INGREDIENTS_HEADER)
+from jobs.models import Job
+from jobs.registry import enqueue
+from recipe.models import IngredientAmountInRecipe, Recipe, ShoppingCart
+from recipe.units import canonical_unit, unit_conversions, unit_factor
+from users.models import Subscribe
 
 User = get_user_model()
 
 
-def make_ingredients(user: User) -> str:
-    """Записывает ингредиенты вложенные в рецепт.
-    Создаёт объект IngredientAmountInRecipe связывающий объекты Recipe и
-    Ingredient с указанием количества конкретного ингредиента.
+def cart_ingredients(user: User) -> QuerySet:
+    """Суммарное количество ингредиентов рецептов из корзины.
+    Количество переводится в основную единицу измерения (см. recipe.units),
+    поэтому один продукт в граммах и килограммах даёт одну строку.
     Returns:
-        Список с суммарным количеством каждого ингредиента
+        Словари с ключами name, unit и amount
     """
-    ingredients = (
+    conversions = unit_conversions()
+    return (
         IngredientAmountInRecipe.objects.filter(recipe__shopping_cart__user=user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(Sum("amount"))
+        .values(
+            name=F("ingredient__name"),
+            unit=canonical_unit("ingredient__measurement_unit", conversions),
+        )
+        .annotate(amount=Sum(
+            F("amount") * unit_factor("ingredient__measurement_unit", conversions),
+            output_field=BigIntegerField(),
+        ))
+        .order_by("name", "unit")
     )
+
+
+def make_ingredients(user: User) -> str:
+    """Формирует текст списка покупок из ингредиентов рецептов корзины.
+    Returns:
+        Список с суммарным количеством каждого ингредиента
+    """
     total_ingredients = TOTAL_INGREDIENTS_HEADER
-    for ingredient in ingredients:
-        name = ingredient["ingredient__name"]
-        unit = ingredient["ingredient__measurement_unit"]
-        amount = ingredient["amount__sum"]
+    for ingredient in cart_ingredients(user):
+        name = ingredient["name"]
+        unit = ingredient["unit"]
+        amount = ingredient["amount"]
         total_ingredients += f"{name} ({unit}) - {amount}\n"
     return total_ingredients
 
 
+def bump_cart_versions(users: QuerySet) -> None:
+    """Увеличивает версию списка покупок пользователей: их закэшированные
+    выгрузки и ETag перестают действовать."""
+    users.update(cart_version=F("cart_version") + 1)
+
+
+def cart_export_key(user: User) -> str:
+    return CART_EXPORT_CACHE_KEY.format(
+        user.pk, user.cart_version, CART_EXPORT_FORMAT
+    )
+
+
+def cart_etag(user: User) -> str:
+    return f'"{user.pk}-{user.cart_version}-{CART_EXPORT_FORMAT}"'
+
+
+def cart_export(user: User) -> bytes:
+    """Выгрузка списка покупок для текущей версии корзины из кэша,
+    при промахе она строится и сохраняется.
+    Версия берётся из user до построения списка: если корзина изменится
+    во время построения, следующая версия получит новую выгрузку."""
+    key = cart_export_key(user)
+    content = cache.get(key)
+    if content is None:
+        content = make_ingredients(user).encode()
+        cache.set(key, content, settings.CART_EXPORT_CACHE_TIMEOUT)
+    return content
+
+
+def cart_file_response(user: User, content: bytes) -> HttpResponse:
+    response = HttpResponse(content, content_type=CONTENT_TYPE)
+    response["Content-Disposition"] = f"attachment; filename={FILENAME}"
+    response["ETag"] = cart_etag(user)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def cached_cart_response(user: User, if_none_match: str) -> Optional[HttpResponse]:
+    """Ответ без построения списка покупок: 304, если у клиента
+    выгрузка текущей версии корзины, или выгрузка из кэша.
+    Returns:
+        HttpResponse или None, если выгрузки в кэше нет
+    """
+    etag = cart_etag(user)
+    if etag in if_none_match:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+    content = cache.get(cart_export_key(user))
+    if content is None:
+        return None
+    return cart_file_response(user, content)
+
+
 def create_ingredients_file(user: User) -> HttpResponse:
     """Добавляет в список ингредиентов заголовок и возвращает HttpResponse.
     """
-    filename = FILENAME
-    response = HttpResponse(
-        make_ingredients(user=user),
-        content_type=CONTENT_TYPE,
+    return cart_file_response(user, cart_export(user))
+
+
+def enqueue_cart_export(user: User) -> Optional[Job]:
+    """Ставит выгрузку списка покупок в очередь, если в корзине больше
+    CART_EXPORT_JOB_THRESHOLD рецептов. Незавершённая выгрузка
+    пользователя используется повторно.
+    Returns:
+        Задача выгрузки или None, если список формируется в запросе
+    """
+    threshold = settings.CART_EXPORT_JOB_THRESHOLD
+    if not threshold or ShoppingCart.objects.filter(user=user).count() <= threshold:
+        return None
+    job = Job.objects.filter(
+        user=user,
+        name="export_shopping_cart",
+        status__in=(Job.Status.QUEUED, Job.Status.RUNNING),
+    ).first()
+    return job or enqueue("export_shopping_cart", user=user)
+
+
+def feed_queryset(user: User) -> QuerySet:
+    """Рецепты авторов, на которых подписан пользователь.
+    Подписки проверяются через EXISTS, поэтому запрос не растёт
+    вместе с числом подписок и может идти по индексу recipe_date_idx
+    до первых page_size подходящих строк."""
+    return Recipe.objects.select_related("author").filter(
+        Exists(Subscribe.objects.filter(user=user, author=OuterRef("author")))
     )
-    response["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+
+
+def get_feed_head(user: User) -> Optional[List[int]]:
+    """Идентификаторы первых FEED_CACHE_SIZE рецептов ленты из кэша.
+    При промахе начало ленты вычисляется и сохраняется в кэш."""
+    if not settings.FEED_CACHE:
+        return None
+    key = FEED_CACHE_KEY.format(user.id)
+    head = cache.get(key)
+    if head is None:
+        head = list(
+            feed_queryset(user).order_by("-date", "-id")
+            .values_list("id", flat=True)[:settings.FEED_CACHE_SIZE]
+        )
+        cache.set(key, head, settings.FEED_CACHE_TIMEOUT)
+    return head
+
+
+def push_to_feeds(recipe: Recipe, batch_size: int = 1000):
+    """Добавляет новый рецепт в начало закэшированных лент подписчиков
+    автора. Ленты, которых нет в кэше, не создаются."""
+    followers = (
+        Subscribe.objects.filter(author_id=recipe.author_id)
+        .values_list("user_id", flat=True).iterator(chunk_size=batch_size)
+    )
+    keys = []
+    for user_id in followers:
+        keys.append(FEED_CACHE_KEY.format(user_id))
+        if len(keys) == batch_size:
+            _prepend_to_feeds(keys, recipe.id)
+            keys = []
+    if keys:
+        _prepend_to_feeds(keys, recipe.id)
+
+
+def _prepend_to_feeds(keys: List[str], recipe_id: int):
+    heads = cache.get_many(keys)
+    cache.set_many(
+        {
+            key: [recipe_id] + head[:settings.FEED_CACHE_SIZE - 1]
+            for key, head in heads.items()
+            if recipe_id not in head
+        },
+        settings.FEED_CACHE_TIMEOUT,
+    )
+
+
+def drop_feeds(user_ids):
+    """Удаляет закэшированное начало лент пользователей."""
+    cache.delete_many([FEED_CACHE_KEY.format(user_id) for user_id in user_ids])
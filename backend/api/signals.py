@@ -0,0 +1,88 @@
+"""Обработчики сигналов, поддерживающие кэш лент подписок, снимки
+каталогов и версии списков покупок."""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.catalogs import invalidate_catalog
+from api.services import bump_cart_versions, drop_feeds
+from jobs.registry import enqueue
+from recipe.models import (Ingredient, IngredientAmountInRecipe, Recipe,
+                           ShoppingCart, Tag, UnitConversion)
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if settings.FEED_CACHE and created and instance.author_id:
+        enqueue("push_to_feeds", {"recipe": instance.pk})
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    if settings.FEED_CACHE and instance.author_id:
+        followers = list(
+            Subscribe.objects.filter(author_id=instance.author_id)
+            .values_list("user_id", flat=True)
+        )
+        transaction.on_commit(lambda: drop_feeds(followers))
+
+
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def subscription_changed(sender, instance, **kwargs):
+    if settings.FEED_CACHE:
+        transaction.on_commit(lambda: drop_feeds((instance.user_id,)))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_catalog_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_catalog("tags"))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_catalog_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_catalog("ingredients"))
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def cart_changed(sender, instance, **kwargs):
+    bump_cart_versions(User.objects.filter(pk=instance.user_id))
+
+
+@receiver(post_save, sender=Recipe)
+def cart_recipe_changed(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        bump_cart_versions(User.objects.filter(shopping_cart__recipe=instance))
+
+
+@receiver(post_save, sender=IngredientAmountInRecipe)
+@receiver(post_delete, sender=IngredientAmountInRecipe)
+def cart_recipe_ingredients_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_cart_versions(
+            User.objects.filter(shopping_cart__recipe_id=instance.recipe_id)
+        )
+
+
+@receiver(post_save, sender=Ingredient)
+def cart_ingredient_changed(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        bump_cart_versions(
+            User.objects.filter(shopping_cart__recipe__ingredients=instance)
+        )
+
+
+@receiver(post_save, sender=UnitConversion)
+@receiver(post_delete, sender=UnitConversion)
+def cart_units_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_cart_versions(User.objects.filter(shopping_cart__isnull=False))
@@ -0,0 +1,27 @@
+"""Фоновые задачи API, выполняются воркером run_jobs."""
+
+from django.core.files.base import ContentFile
+
+from api.conf import FILENAME
+from api.services import cart_export, push_to_feeds
+from jobs.registry import task
+from recipe.models import Recipe
+
+
+@task("export_shopping_cart")
+def export_shopping_cart(job):
+    """Список покупок пользователя задачи в файл результата."""
+    job.result_file.save(
+        FILENAME, ContentFile(cart_export(job.user)), save=False
+    )
+    return {"filename": FILENAME}
+
+
+@task("push_to_feeds")
+def push_to_feeds_task(job):
+    """Новый рецепт в закэшированных лентах подписчиков автора."""
+    recipe = Recipe.objects.filter(pk=job.payload["recipe"]).first()
+    if recipe is None:
+        return {"pushed": False}
+    push_to_feeds(recipe)
+    return {"pushed": True}
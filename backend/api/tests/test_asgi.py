@@ -0,0 +1,182 @@
+import asyncio
+import shutil
+import tempfile
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.core.management import call_command
+from django.test import AsyncClient, SimpleTestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+from rest_framework.authtoken.models import Token
+
+from backend import settings_api
+from recipe.models import Recipe, ShoppingCart
+
+HYBRID_MIDDLEWARE = (
+    "monitoring.middleware.ProfilingMiddleware",
+    "monitoring.middleware.SlowQueryMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
+    "api.middleware.AdminMiddleware",
+)
+
+
+def adapted_methods(**settings):
+    """Методы, которые обработчик ASGI переключает в синхронный режим
+    через sync_to_async при сборке цепочки слоёв."""
+    adapted = []
+    adapt_method_mode = BaseHandler.adapt_method_mode
+
+    def record(self, is_async, method, method_is_async=None, *args, **kwargs):
+        if method_is_async is None:
+            method_is_async = asyncio.iscoroutinefunction(method)
+        if is_async and not method_is_async:
+            adapted.append(kwargs.get("name") or getattr(
+                method, "__qualname__", repr(method)
+            ))
+        return adapt_method_mode(
+            self, is_async, method, method_is_async, *args, **kwargs
+        )
+
+    BaseHandler.adapt_method_mode = record
+    try:
+        with override_settings(PROFILING=True, SLOW_QUERY_MS=100, **settings):
+            ASGIHandler().load_middleware(is_async=True)
+    finally:
+        BaseHandler.adapt_method_mode = adapt_method_mode
+    return adapted
+
+
+class AsgiMiddlewareTests(SimpleTestCase):
+
+    def assert_no_sync_adapter(self, adapted):
+        self.assertEqual(
+            [name for name in adapted if name.startswith("middleware ")], []
+        )
+        self.assertEqual(
+            [name for name in adapted if name.split(".")[0] in (
+                "ReplicaRoutingMiddleware", "SlowQueryMiddleware",
+                "ProfilingMiddleware", "AdminMiddleware",
+            )],
+            [],
+        )
+
+    def test_default_chain_has_no_sync_adapter(self):
+        self.assert_no_sync_adapter(adapted_methods())
+
+    def test_api_profile_chain_has_no_sync_adapter(self):
+        self.assert_no_sync_adapter(adapted_methods(
+            MIDDLEWARE=settings_api.MIDDLEWARE,
+            ADMIN_MIDDLEWARE=settings_api.ADMIN_MIDDLEWARE,
+            ADMIN_PATH_PREFIX=settings_api.ADMIN_PATH_PREFIX,
+        ))
+
+    @override_settings(
+        PROFILING=True, SLOW_QUERY_MS=100,
+        ADMIN_MIDDLEWARE=settings_api.ADMIN_MIDDLEWARE,
+        ADMIN_PATH_PREFIX=settings_api.ADMIN_PATH_PREFIX,
+    )
+    def test_project_middleware_follows_get_response(self):
+        async def async_get_response(request):
+            return None
+
+        for path in HYBRID_MIDDLEWARE:
+            middleware = import_string(path)
+            with self.subTest(path=path):
+                self.assertTrue(asyncio.iscoroutinefunction(
+                    middleware(async_get_response)
+                ))
+                self.assertFalse(asyncio.iscoroutinefunction(
+                    middleware(lambda request: None)
+                ))
+
+
+class AsgiResponseTests(TransactionTestCase):
+    """Асинхронные представления отвечают так же, как синхронные."""
+
+    def setUp(self):
+        catalog_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, catalog_dir)
+        settings = override_settings(CATALOG_DIR=catalog_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command(
+            "generate_data", users=3, recipes=5, favorites_per_user=2,
+            cart_per_user=2, subscriptions_per_user=1, stdout=StringIO(),
+        )
+        self.recipe = Recipe.objects.order_by("id").first()
+        user = ShoppingCart.objects.order_by("id").first().user
+        self.token = Token.objects.create(user=user).key
+
+    def wsgi_get(self, path, headers):
+        with override_settings(ROOT_URLCONF="backend.urls"):
+            return self.client.get(path, **{
+                "HTTP_" + name.upper().replace("-", "_"): value
+                for name, value in headers.items()
+            })
+
+    def asgi_get(self, path, headers):
+        with override_settings(ROOT_URLCONF="backend.urls_asgi"):
+            client = AsyncClient()
+
+            async def get():
+                return await client.get(path, **{
+                    name.lower(): value for name, value in headers.items()
+                })
+            response = async_to_sync(get)()
+            response.view = response.resolver_match.func
+            return response
+
+    def assert_same_response(self, path, **headers):
+        expected = self.wsgi_get(path, headers)
+        actual = self.asgi_get(path, headers)
+        self.assertTrue(asyncio.iscoroutinefunction(actual.view))
+        self.assertEqual(actual.status_code, expected.status_code)
+        for header in ("Content-Type", "WWW-Authenticate", "ETag", "Allow"):
+            self.assertEqual(actual.get(header), expected.get(header), header)
+        self.assertEqual(b"".join(actual), b"".join(expected))
+        return actual
+
+    def test_recipe_detail(self):
+        path = f"/api/recipes/{self.recipe.pk}/"
+        authorization = f"Token {self.token}"
+        for path, headers in (
+            (path, {}),
+            (path, {"Authorization": authorization}),
+            (path + "?fields=id,name&expand=author", {}),
+            (path + "?format=json", {"Authorization": authorization}),
+            (path, {"Accept": "application/xml"}),
+            (path, {"Authorization": "Token invalid"}),
+            ("/api/recipes/0/", {}),
+        ):
+            with self.subTest(path=path, headers=headers):
+                self.assert_same_response(path, **headers)
+
+    def test_catalogs(self):
+        for path in (
+            "/api/tags/", "/api/tags/?format=json",
+            "/api/ingredients/", "/api/ingredients/?name=соль",
+        ):
+            with self.subTest(path=path):
+                self.assert_same_response(path)
+        self.assert_same_response("/api/tags/", Accept="application/xml")
+
+    def test_browsable_api_format(self):
+        path = f"/api/recipes/{self.recipe.pk}/?format=api"
+        expected = self.wsgi_get(path, {})
+        actual = self.asgi_get(path, {})
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual["Content-Type"], expected["Content-Type"])
+
+    def test_shopping_cart_download(self):
+        path = "/api/recipes/download_shopping_cart/"
+        self.assert_same_response(path)
+        response = self.assert_same_response(
+            path, Authorization=f"Token {self.token}"
+        )
+        self.assert_same_response(
+            path, Authorization=f"Token {self.token}",
+            **{"If-None-Match": response["ETag"]},
+        )
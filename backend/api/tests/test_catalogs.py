@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from api import catalogs
+from api.catalogs import CATALOGS, load_catalog, read_version, version_path
+from recipe.models import Tag
+
+
+class CatalogTests(TestCase):
+
+    def setUp(self):
+        self.catalog_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.catalog_dir)
+        settings = override_settings(CATALOG_DIR=self.catalog_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        Tag.objects.create(name="Завтрак", color="#E26C2D", slug="breakfast")
+
+    def test_generate_all_catalogs_without_arguments(self):
+        call_command("generate_catalogs", stdout=StringIO())
+        for name in CATALOGS:
+            filename = f"{name}.{read_version(name)}.json"
+            self.assertTrue(
+                os.path.exists(os.path.join(self.catalog_dir, filename))
+            )
+        self.assertFalse([
+            filename for filename in os.listdir(self.catalog_dir)
+            if filename.endswith(".tmp")
+        ])
+
+    def test_generate_named_catalog(self):
+        call_command("generate_catalogs", "tags", stdout=StringIO())
+        self.assertEqual(
+            sorted(os.listdir(self.catalog_dir))[-1], "tags.version"
+        )
+        self.assertFalse(os.path.exists(
+            os.path.join(self.catalog_dir, "ingredients.version")
+        ))
+
+    def test_unknown_catalog(self):
+        with self.assertRaises(CommandError):
+            call_command("generate_catalogs", "recipes", stdout=StringIO())
+
+    def test_gzip_body_has_own_etag(self):
+        plain = self.client.get("/api/tags/")
+        compressed = self.client.get("/api/tags/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertNotEqual(plain["ETag"], compressed["ETag"])
+        for response, encoding in ((plain, ""), (compressed, "gzip")):
+            self.assertEqual(self.client.get(
+                "/api/tags/", HTTP_ACCEPT_ENCODING=encoding,
+                HTTP_IF_NONE_MATCH=response["ETag"],
+            ).status_code, 304)
+        self.assertEqual(self.client.get(
+            "/api/tags/", HTTP_IF_NONE_MATCH=compressed["ETag"],
+        ).status_code, 200)
+
+    def invalidate_during_build(self, times):
+        """Каталог тегов меняется во время следующих times построений."""
+        render = catalogs.FastJSONRenderer.render
+        calls = []
+
+        def changed_render(renderer, data, *args, **kwargs):
+            content = render(renderer, data, *args, **kwargs)
+            if len(calls) < times:
+                calls.append(data)
+                Tag.objects.create(
+                    name=f"Тег {len(calls)}", color="#E26C2D",
+                    slug=f"tag-{len(calls)}",
+                )
+                catalogs.invalidate_catalog("tags")
+            return content
+        return mock.patch.object(
+            catalogs.FastJSONRenderer, "render", changed_render
+        )
+
+    def test_rebuild_discarded_when_catalog_changes(self):
+        with self.invalidate_during_build(1):
+            snapshot = load_catalog("tags")
+        self.assertIn("Тег 1".encode(), snapshot.content)
+        self.assertIsNotNone(snapshot.modified)
+        self.assertEqual(read_version("tags"), snapshot.etag.strip('"'))
+
+    def test_stale_snapshot_is_not_current(self):
+        with self.invalidate_during_build(catalogs.REBUILD_ATTEMPTS):
+            snapshot = load_catalog("tags")
+        self.assertIsNone(snapshot.modified)
+        self.assertFalse(os.path.exists(version_path("tags")))
+        self.assertIn("Тег 3".encode(), load_catalog("tags").content)
+
+    def test_generate_reports_stale_catalog(self):
+        stderr = StringIO()
+        with self.invalidate_during_build(1):
+            call_command(
+                "generate_catalogs", "tags", stdout=StringIO(), stderr=stderr
+            )
+        self.assertIn("tags", stderr.getvalue())
+        self.assertFalse(os.path.exists(version_path("tags")))
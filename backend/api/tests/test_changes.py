@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipe.models import Tag
+from sync.feed import publish_changes
+from sync.models import ChangeCursor
+
+
+class ChangesViewTests(TestCase):
+
+    def create_tag(self, slug):
+        return Tag.objects.create(name=slug, color="#E26C2D", slug=slug)
+
+    def test_published_changes(self):
+        cursor = self.client.get("/api/changes/").data["cursor"]
+        tag = self.create_tag("breakfast")
+        publish_changes()
+        response = self.client.get("/api/changes/", {"since": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(change["entity"], change["id"])
+             for change in response.data["changes"]],
+            [("tag", tag.pk)],
+        )
+        self.assertGreater(response.data["cursor"], cursor)
+
+    def test_get_does_not_write(self):
+        self.create_tag("breakfast")
+        publish_changes()
+        self.create_tag("lunch")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/changes/", {"since": 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["changes"]), 1)
+        self.assertEqual([
+            query["sql"] for query in queries
+            if not query["sql"].lstrip().upper().startswith("SELECT")
+            or "FOR UPDATE" in query["sql"].upper()
+        ], [])
+        self.assertFalse(response.cookies)
+
+    def test_write_does_not_publish(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_tag("breakfast")
+        response = self.client.get("/api/changes/", {"since": 0})
+        self.assertEqual(response.data["changes"], [])
+
+    def test_missing_cursor_row(self):
+        ChangeCursor.objects.all().delete()
+        response = self.client.get("/api/changes/")
+        self.assertEqual(response.data["cursor"], 0)
+        self.assertEqual(
+            self.client.get("/api/changes/", {"since": 0}).status_code, 200
+        )
@@ -0,0 +1,81 @@
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import override_settings
+
+from api.middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from api.views import RecipeViewSet
+from recipe.models import Recipe
+
+REPLICAS = ["replica0", "replica1", "replica2"]
+
+
+def read():
+    return Recipe.objects.all().db
+
+
+def write():
+    return router.db_for_write(Recipe)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingTests(TransactionTestCase):
+
+    def handle(self, callback, method="get", view=None, cookies=None):
+        """Выполняет callback вместо представления view за
+        ReplicaRoutingMiddleware и возвращает ответ и результат callback."""
+        view = view or RecipeViewSet.as_view({"get": "list", "post": "create"})
+        request = getattr(RequestFactory(), method)("/api/recipes/")
+        request.COOKIES.update(cookies or {})
+        result = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            result.append(callback())
+            return HttpResponse()
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request), result[0]
+
+    def test_safe_read_goes_to_replica(self):
+        response, alias = self.handle(read)
+        self.assertIn(alias, REPLICAS)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_request_reads_from_one_replica(self):
+        for _ in range(10):
+            response, aliases = self.handle(lambda: {read() for _ in range(20)})
+            self.assertEqual(len(aliases), 1)
+
+    def test_unsafe_method_reads_from_primary(self):
+        response, alias = self.handle(read, method="post")
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_read_outside_api_goes_to_primary(self):
+        def view(request):
+            return HttpResponse()
+        view.__module__ = "recipe.admin"
+        response, alias = self.handle(read, view=view)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_write_goes_to_primary_and_pins_reads(self):
+        response, aliases = self.handle(lambda: (read(), write(), read()))
+        self.assertIn(aliases[0], REPLICAS)
+        self.assertEqual(aliases[1:], (DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_read_in_atomic_goes_to_primary(self):
+        def callback():
+            with transaction.atomic():
+                return read(), write()
+        response, aliases = self.handle(callback)
+        self.assertEqual(aliases, (DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS))
+
+    def test_pin_cookie_reads_from_primary(self):
+        response, alias = self.handle(write)
+        cookies = {PIN_COOKIE: response.cookies[PIN_COOKIE].value}
+        response, alias = self.handle(read, cookies=cookies)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_read_without_request_goes_to_primary(self):
+        self.assertEqual(read(), DEFAULT_DB_ALIAS)
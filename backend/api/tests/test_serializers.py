@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmarks import compare_recipe_serializers
+from api.serializers import RecipeReadSerializer, RecipeSerializer
+from recipe.models import (FavoriteRecipe, Ingredient,
+                           IngredientAmountInRecipe, Recipe)
+from recipe.summaries import refresh_stale_summaries
+
+
+class RecipeReadSerializerTests(TestCase):
+    """RecipeReadSerializer отдаёт то же, что RecipeSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_data", users=5, recipes=20, favorites_per_user=5,
+            cart_per_user=5, subscriptions_per_user=2, stdout=StringIO(),
+        )
+        # Ингредиенты добавлены не по возрастанию id ингредиента.
+        recipe = Recipe.objects.order_by("id").first()
+        recipe.ingredients_in_recipe.all().delete()
+        IngredientAmountInRecipe.objects.bulk_create(
+            IngredientAmountInRecipe(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for amount, ingredient in enumerate(
+                Ingredient.objects.order_by("-id")[:5], start=1
+            )
+        )
+        refresh_stale_summaries()
+        cls.user = FavoriteRecipe.objects.order_by("id").first().user
+
+    def render(self, serializer_class, user):
+        request = RequestFactory().get("/api/recipes/")
+        request.user = user
+        recipes = Recipe.objects.select_related("author").order_by("id")
+        return JSONRenderer().render(serializer_class(
+            recipes, many=True, context={"request": request}
+        ).data)
+
+    def assert_identical(self):
+        for user in (AnonymousUser(), self.user):
+            with self.subTest(user=user):
+                self.assertEqual(
+                    self.render(RecipeReadSerializer, user),
+                    self.render(RecipeSerializer, user),
+                )
+
+    def test_fresh_summaries(self):
+        self.assert_identical()
+
+    def test_stale_summary(self):
+        recipe = Recipe.objects.order_by("id").first()
+        Recipe.objects.filter(pk=recipe.pk).update(
+            summary={"tags": [], "ingredients": []}, summary_version=0
+        )
+        self.assert_identical()
+
+    def test_benchmark_comparison(self):
+        self.assertTrue(compare_recipe_serializers(self.user, rounds=1)["identical"])
@@ -0,0 +1,64 @@
+import base64
+from unittest import mock
+
+from django.core.checks import Error
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from rest_framework.exceptions import ValidationError
+
+from api import uploads
+from api.checks import check_file_storage
+
+
+class DecodeImageTests(SimpleTestCase):
+    content = bytes(range(256)) * 40
+
+    def decode(self, encoded):
+        with mock.patch.object(uploads, "DECODE_CHUNK_SIZE", 64):
+            with uploads.decode_image("data:image/png;base64," + encoded) as file:
+                return file.read()
+
+    def test_plain(self):
+        self.assertEqual(
+            self.decode(base64.b64encode(self.content).decode()), self.content
+        )
+
+    def test_line_wrapped(self):
+        encoded = base64.encodebytes(self.content).decode()
+        self.assertEqual(self.decode(encoded), self.content)
+        self.assertEqual(
+            self.decode(" " + encoded.replace("\n", "\r\n\t") + " "),
+            self.content,
+        )
+
+    def test_corrupted(self):
+        encoded = base64.b64encode(self.content).decode()
+        for corrupted in (encoded[:-1], encoded[:100] + "!" + encoded[100:],
+                          encoded[:100] + "ж" + encoded[100:]):
+            with self.subTest(corrupted=corrupted[95:105]):
+                with self.assertRaises(ValidationError):
+                    self.decode(corrupted)
+
+    @override_settings(IMAGE_MAX_SIZE=1000)
+    def test_too_large(self):
+        with self.assertRaises(ValidationError):
+            self.decode(base64.encodebytes(self.content[:1001]).decode())
+        self.assertEqual(
+            self.decode(base64.encodebytes(self.content[:1000]).decode()),
+            self.content[:1000],
+        )
+
+
+class FileStorageCheckTests(SimpleTestCase):
+
+    def test_content_hashed_storage(self):
+        self.assertEqual(check_file_storage(None), [])
+
+    @override_settings(
+        DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage"
+    )
+    def test_plain_storage(self):
+        self.assertEqual(
+            [(type(message), message.id) for message in check_file_storage(None)],
+            [(Error, "api.E002")],
+        )
@@ -0,0 +1,131 @@
+"""Загрузка изображений рецептов без base64 в теле запроса.
+Клиент получает форму загрузки (POST /api/uploads/), отправляет файл
+по её адресу (в S3 - напрямую в хранилище по подписанной форме, в
+файловом хранилище - в API, UploadFileView) и передаёт в поле image
+рецепта ссылку reference. Ссылка подписана, её может использовать
+только запросивший загрузку пользователь. Загруженный файл лежит в
+каталоге uploads/ и удаляется после сохранения рецепта, брошенные
+загрузки удаляет collect_images.
+Изображения в base64 по-прежнему принимаются: размер проверяется до
+декодирования, а декодируется строка частями во временный файл.
+"""
+
+import base64
+import binascii
+import posixpath
+import tempfile
+import uuid
+from functools import partial
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+UPLOAD_DIRECTORY = "uploads"
+REFERENCE_PREFIX = "upload:"
+SALT = "api.uploads"
+IMAGE_CONTENT_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+DECODE_CHUNK_SIZE = 64 * 1024
+# Пробельные символы ASCII: base64 из почты и PEM разбит на строки.
+WHITESPACE = " \t\n\r\f\v"
+STRIP_WHITESPACE = str.maketrans("", "", WHITESPACE)
+SIZE_ERROR_MESSAGE = "Размер изображения больше {} байт"
+
+
+def upload_max_age() -> float:
+    """Сколько секунд принимается ссылка: пока загруженный файл
+    не может удалить collect_images."""
+    return settings.IMAGE_GC_GRACE_HOURS * 3600
+
+
+def create_upload(user, content_type: str) -> Dict:
+    """Имя файла загрузки, ссылка на него для рецепта и форма прямой
+    загрузки в хранилище (None, если файл принимает API)."""
+    name = posixpath.join(
+        UPLOAD_DIRECTORY, uuid.uuid4().hex + IMAGE_CONTENT_TYPES[content_type]
+    )
+    token = signing.dumps({"user": user.pk, "name": name}, salt=SALT)
+    return {
+        "name": name,
+        "token": token,
+        "reference": REFERENCE_PREFIX + token,
+        "form": default_storage.upload_form(
+            name, content_type, settings.IMAGE_MAX_SIZE, settings.UPLOAD_EXPIRES
+        ),
+    }
+
+
+def upload_name(token: str, user, max_age: Optional[float] = None) -> str:
+    """Имя файла загрузки по подписанному токену."""
+    try:
+        data = signing.loads(
+            token, salt=SALT,
+            max_age=upload_max_age() if max_age is None else max_age,
+        )
+    except signing.BadSignature:
+        raise ValidationError("Ссылка на загрузку недействительна или устарела")
+    if data["user"] != user.pk:
+        raise ValidationError("Ссылка на загрузку выдана другому пользователю")
+    return data["name"]
+
+
+def open_upload(reference: str, user) -> File:
+    """Загруженный файл по ссылке из поля image рецепта."""
+    name = upload_name(reference[len(REFERENCE_PREFIX):], user)
+    if not default_storage.exists(name):
+        raise ValidationError("Файл по ссылке на загрузку не загружен")
+    if default_storage.size(name) > settings.IMAGE_MAX_SIZE:
+        raise ValidationError(SIZE_ERROR_MESSAGE.format(settings.IMAGE_MAX_SIZE))
+    file = default_storage.open(name)
+    file.name = posixpath.basename(name)
+    file.upload_name = name
+    return file
+
+
+def discard_upload(file) -> None:
+    """Удаляет файл загрузки после сохранения рецепта."""
+    name = getattr(file, "upload_name", None)
+    if name:
+        transaction.on_commit(partial(default_storage.delete, name))
+
+
+def decode_image(data: str) -> File:
+    """Файл из строки data:image/<формат>;base64,<данные>. Пробельные
+    символы в данных (переносы строк) пропускаются."""
+    header, _, encoded = data.partition(";base64,")
+    extension = header.split("/")[-1]
+    length = len(encoded) - sum(map(encoded.count, WHITESPACE))
+    size = length * 3 // 4 - encoded.rstrip(WHITESPACE)[-2:].count("=")
+    if size > settings.IMAGE_MAX_SIZE:
+        raise ValidationError(SIZE_ERROR_MESSAGE.format(settings.IMAGE_MAX_SIZE))
+    file = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    # Части декодируются независимо, поэтому в каждой длина кратна 4,
+    # а остаток переносится в следующую.
+    remainder = ""
+    try:
+        for start in range(0, len(encoded), DECODE_CHUNK_SIZE):
+            chunk = remainder + encoded[
+                start:start + DECODE_CHUNK_SIZE
+            ].translate(STRIP_WHITESPACE)
+            end = len(chunk) - len(chunk) % 4
+            file.write(base64.b64decode(chunk[:end], validate=True))
+            remainder = chunk[end:]
+        if remainder:
+            raise binascii.Error("Incorrect padding")
+    except ValueError:
+        # binascii.Error или символы не из ASCII.
+        file.close()
+        raise ValidationError("Изображение в base64 повреждено")
+    file.seek(0)
+    return File(file, name=f"temp.{extension}")
@@ -2,28 +2,35 @@ from django.conf import settings
 from django.conf.urls import url
 from django.conf.urls.static import static
 from django.urls import include, path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
 
-from api.views import (CustomUserViewSet, IngredientViewSet,
-                       RecipePostDeleteFavoriteView, RecipeViewSet,
+from api.views import (ChangesView, CustomUserViewSet, IngredientViewSet,
+                       JobViewSet, RecipePostDeleteFavoriteView, RecipeViewSet,
                        ShoppingCartDownloadView, ShoppingCartPostDeleteView,
                        SubscribeListViewSet, SubscribePostDeleteView,
-                       TagViewSet)
+                       TagViewSet, UploadFileView, UploadView, api_schema,
+                       catalog_view)
 
 router = DefaultRouter()
 router.register("tags", TagViewSet, basename="tags")
 router.register("ingredients", IngredientViewSet, basename="ingredients")
 router.register("recipes", RecipeViewSet, basename="recipes")
+router.register("jobs", JobViewSet, basename="jobs")
 
 router.register("users/subscriptions", SubscribeListViewSet, basename="subscriptions")
 router.register(r"users", CustomUserViewSet, basename="users")
 
 urlpatterns = [
+    path("tags/", catalog_view("tags", TagViewSet.as_view({"get": "list"}))),
+    path("ingredients/", catalog_view(
+        "ingredients", IngredientViewSet.as_view({"get": "list"})
+    )),
     path(r"recipes/download_shopping_cart/", ShoppingCartDownloadView.as_view()),
     path(r"users/<int:pk>/subscribe/", SubscribePostDeleteView.as_view()),
+    path("changes/", ChangesView.as_view(), name="changes"),
+    path("uploads/", UploadView.as_view(), name="uploads"),
+    path("uploads/<str:token>/", UploadFileView.as_view(), name="upload-file"),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
@@ -34,30 +41,31 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Foodgram API",
-        default_version="v1",
-        description="ƒÓÍÛÏÂÌÚ‡ˆËˇ ‰Îˇ ÔËÎÓÊÂÌËˇ api ÔÓÂÍÚ‡ Foodgram",
-        contact=openapi.Contact(email="admin@mail.ru"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
-urlpatterns += [
-    url(
-        r"^swagger(?P<format>\.json|\.yaml)$",
-        schema_view.without_ui(cache_timeout=0),
-        name="schema-json",
-    ),
-    url(
-        r"^swagger/$",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    url(
-        r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
-    ),
-]
+if settings.API_DOCS:
+    from drf_yasg.views import get_schema_view
+
+    from api.schema import schema_info
+
+    # Страницы swagger и redoc загружают схему по SWAGGER_SETTINGS["SPEC_URL"],
+    # то есть из заранее сгенерированного файла, а сами схему не строят.
+    schema_view = get_schema_view(
+        schema_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+    urlpatterns += [
+        url(
+            r"^swagger(?P<format>\.json|\.yaml)$",
+            api_schema,
+            name="schema-json",
+        ),
+        url(
+            r"^swagger/$",
+            schema_view.with_ui("swagger", cache_timeout=0),
+            name="schema-swagger-ui",
+        ),
+        url(
+            r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
+        ),
+    ]
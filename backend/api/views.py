@@ -1,31 +1,70 @@
+import os
+from functools import wraps
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db.models import Exists, OuterRef
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from rest_framework import mixins, viewsets
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import GenericAPIView
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
+from api.catalogs import load_catalog
+from api.changes import render_changes
+from api.conf import CONTENT_TYPE
 from api.filters import IngredientFilter, RecipeFilter
-from api.mixins import (RecipeActionPostDeleteMixin,
+from api.mixins import (RecipeActionPostDeleteMixin, SparseFieldsMixin,
                         UserActionPostDeleteGenericApiMixin)
 from api.permissions import AdminOrReadOnly, IsAdminAuthorOrReadOnly
-from api.pagination import CustomPagination
+from api.pagination import CustomPagination, FeedPagination
+from api.schema import SCHEMA_FORMATS, load_schema
 from api.serializers import (CustomUserSerializer, IngredientSerializer,
-                             RecipeSerializer, ShortRecipeSerializer,
-                             SubscribeSerializer, TagSerializer)
-from api.services import create_ingredients_file
+                             JobSerializer, RecipeReadSerializer,
+                             RecipeSerializer,
+                             ShortRecipeSerializer,
+                             SubscribeSerializer, TagSerializer,
+                             UploadSerializer)
+from api.services import (cached_cart_response, create_ingredients_file,
+                          enqueue_cart_export, feed_queryset, get_feed_head)
+from api.uploads import SIZE_ERROR_MESSAGE, create_upload, upload_name
+from jobs.models import Job
 from recipe.models import FavoriteRecipe, Ingredient, Recipe, ShoppingCart, Tag
+from sync.feed import current_position, is_pruned, read_changes
 from users.models import Subscribe
 
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(SparseFieldsMixin, UserViewSet):
     """ViewSet для работы с пользователями."""
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     pagination_class = CustomPagination
+    sparse_fields = CustomUserSerializer.Meta.fields
+
+    def get_queryset(self):
+        """Подписки на пользователей страницы проверяются подзапросом
+        в том же запросе, если поле is_subscribed нужно в ответе."""
+        queryset = super().get_queryset()
+        user = self.request.user
+        if (
+            self.request.method == "GET"
+            and user.is_authenticated
+            and "is_subscribed" in self.get_sparse_fields()[0]
+        ):
+            queryset = queryset.annotate(subscribed=Exists(
+                Subscribe.objects.filter(user=user, author=OuterRef("pk"))
+            ))
+        return queryset
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -38,18 +77,84 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet для работы с рецептами."""
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.select_related("author")
     serializer_class = RecipeSerializer
     pagination_class = CustomPagination
     permission_classes = IsAdminAuthorOrReadOnly,
     filter_backends = DjangoFilterBackend,
     filterset_class = RecipeFilter
+    sparse_fields = RecipeReadSerializer.FIELDS
+    expandable_fields = RecipeReadSerializer.EXPANDABLE_FIELDS
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_serializer_class() is RecipeReadSerializer:
+            queryset = RecipeReadSerializer.sparse_queryset(
+                queryset, *self.get_sparse_fields()
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        """Для чтения используется быстрый RecipeReadSerializer.
+        Формы browsable API и OPTIONS запрашивают сериализатор
+        с подменённым методом запроса, а генератор схемы API - без
+        запроса; все они получают RecipeSerializer с описанием полей."""
+        if getattr(self, "swagger_fake_view", False):
+            return RecipeSerializer
+        if (
+            self.action in ("list", "retrieve", "feed")
+            and self.request.method == "GET"
+        ):
+            return RecipeReadSerializer
+        return RecipeSerializer
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination,
+        filter_backends=(),
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь.
+        Первая страница берётся по закэшированным идентификаторам
+        начала ленты, если кэш ленты включён."""
+        queryset = feed_queryset(request.user)
+        paginator = self.paginator
+        page_size = paginator.get_page_size(request)
+        if not request.query_params.get(paginator.cursor_query_param):
+            head = get_feed_head(request.user)
+            if head is not None and page_size < settings.FEED_CACHE_SIZE:
+                queryset = Recipe.objects.select_related("author").filter(
+                    pk__in=head[:page_size + 1]
+                )
+        page = self.paginate_queryset(RecipeReadSerializer.sparse_queryset(
+            queryset, *self.get_sparse_fields()
+        ))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, filter_backends=(), pagination_class=None)
+    def similar(self, request, pk=None):
+        """Похожие рецепты из таблицы, рассчитанной compute_similarity.
+        Количество ограничивается параметром limit."""
+        recipe = self.get_object()
+        try:
+            limit = int(request.query_params.get("limit", ""))
+        except ValueError:
+            limit = settings.SIMILAR_RECIPES_COUNT
+        queryset = Recipe.objects.filter(
+            neighbor_of__recipe=recipe
+        ).order_by("-neighbor_of__score", "id")[:max(limit, 0)]
+        serializer = ShortRecipeSerializer(
+            queryset, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
 
 class RecipePostDeleteFavoriteView(RecipeActionPostDeleteMixin):
     """GenericApiView для добавления рецепта в избранное.
@@ -101,8 +206,231 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class ShoppingCartDownloadView(GenericAPIView):
-    """Представление для загрузки списка покупок"""
+    """Представление для загрузки списка покупок.
+    Выгрузка кэшируется по версии корзины пользователя и отдаётся с ETag.
+    Для больших корзин без выгрузки в кэше возвращает 202 и задачу,
+    файл которой скачивается по download_url после её выполнения."""
     permission_classes = IsAuthenticated,
+    serializer_class = JobSerializer
 
     def get(self, request, *args, **kwargs):
+        response = cached_cart_response(
+            request.user, request.META.get("HTTP_IF_NONE_MATCH", "")
+        )
+        if response is not None:
+            return response
+        job = enqueue_cart_export(request.user)
+        if job is not None:
+            serializer = self.get_serializer(job)
+            return Response(
+                serializer.data,
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Location": reverse(
+                    "jobs-detail", args=(job.pk,), request=request
+                )},
+            )
         return create_ingredients_file(request.user)
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet для просмотра фоновых задач пользователя."""
+    serializer_class = JobSerializer
+    permission_classes = IsAuthenticated,
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Job.objects.none()
+        return Job.objects.filter(user=self.request.user)
+
+    @action(detail=True)
+    def download(self, request, pk=None):
+        """Файл результата выполненной задачи."""
+        job = self.get_object()
+        if job.status != Job.Status.DONE or not job.result_file:
+            raise NotFound("Результат задачи ещё не готов")
+        return FileResponse(
+            job.result_file.open("rb"),
+            as_attachment=True,
+            filename=(job.result or {}).get("filename")
+            or os.path.basename(job.result_file.name),
+            content_type=CONTENT_TYPE,
+        )
+
+
+class ChangesView(GenericAPIView):
+    """Журнал изменений для синхронизации клиентов (см. sync.feed).
+    ?since=<cursor> - изменения после курсора: общие объекты и личные
+    объекты пользователя, по limit за запрос. Без since возвращается
+    только текущий курсор: клиент загружает данные целиком и дальше
+    запрашивает изменения после него. Если часть журнала после курсора
+    уже удалена, возвращается 410 и нужна полная синхронизация.
+    Только читает: записи журнала публикуют записавшие их процессы."""
+    permission_classes = AllowAny,
+
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since is None:
+            return Response(
+                {"cursor": current_position(), "has_more": False, "changes": []}
+            )
+        if not since.isdigit():
+            raise ValidationError(
+                {"since": "Курсор должен быть неотрицательным целым числом"}
+            )
+        since = int(since)
+        limit = request.query_params.get("limit", "")
+        limit = int(limit) if limit.isdigit() and int(limit) > 0 else None
+        if is_pruned(since):
+            return Response(
+                {"detail": "Журнал после курсора удалён, нужна полная синхронизация"},
+                status=status.HTTP_410_GONE,
+            )
+        changes, cursor, has_more = read_changes(
+            since, request.user, min(limit or settings.SYNC_PAGE_SIZE,
+                                     settings.SYNC_PAGE_SIZE)
+        )
+        return Response({
+            "cursor": cursor,
+            "has_more": has_more,
+            "changes": render_changes(changes, request),
+        })
+
+
+class UploadView(GenericAPIView):
+    """Форма прямой загрузки изображения рецепта (см. api.uploads).
+    Файл отправляется POST multipart/form-data на url с полями fields
+    и самим файлом в поле file, затем reference передаётся в поле
+    image рецепта."""
+    permission_classes = IsAuthenticated,
+    serializer_class = UploadSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = create_upload(
+            request.user, serializer.validated_data["content_type"]
+        )
+        form = upload["form"] or {
+            "url": reverse(
+                "upload-file", args=(upload["token"],), request=request
+            ),
+            "fields": {},
+        }
+        return Response(
+            {
+                "reference": upload["reference"],
+                "url": form["url"],
+                "fields": form["fields"],
+                "max_size": settings.IMAGE_MAX_SIZE,
+                "expires": settings.UPLOAD_EXPIRES,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class UploadFileView(GenericAPIView):
+    """Приём файла прямой загрузки для хранилищ, которые не принимают
+    загрузки сами (файловое хранилище). Размер проверяется по
+    Content-Length до чтения тела запроса."""
+    permission_classes = IsAuthenticated,
+    parser_classes = MultiPartParser,
+    # Запас на заголовки частей multipart/form-data.
+    form_overhead = 16 * 1024
+
+    def post(self, request, token):
+        name = upload_name(token, request.user, settings.UPLOAD_EXPIRES)
+        length = request.META.get("CONTENT_LENGTH")
+        if not length or not length.isdigit():
+            return Response(
+                {"detail": "Нужен заголовок Content-Length"},
+                status=status.HTTP_411_LENGTH_REQUIRED,
+            )
+        too_large = Response(
+            {"detail": SIZE_ERROR_MESSAGE.format(settings.IMAGE_MAX_SIZE)},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        if int(length) > settings.IMAGE_MAX_SIZE + self.form_overhead:
+            return too_large
+        file = request.FILES.get("file")
+        if file is None:
+            raise ValidationError({"file": "Файл не передан"})
+        if file.size > settings.IMAGE_MAX_SIZE:
+            return too_large
+        if default_storage.exists(name):
+            return Response(
+                {"detail": "Файл уже загружен"}, status=status.HTTP_409_CONFLICT
+            )
+        default_storage.save_as(name, file)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def api_schema(request, format):
+    """Заранее сгенерированная схема API (см. api.schema).
+    Отдаётся сжатой, если клиент принимает gzip, и с ETag."""
+    content, compressed, etag = load_schema(format)
+    accepts_gzip = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if accepts_gzip:
+        # У тел с разным Content-Encoding сильные ETag должны различаться.
+        etag = etag[:-1] + '-gz"'
+    if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+        response = HttpResponseNotModified()
+    elif accepts_gzip:
+        response = HttpResponse(compressed, content_type=SCHEMA_FORMATS[format])
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(content, content_type=SCHEMA_FORMATS[format])
+    response["ETag"] = etag
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = f"public, max-age={settings.API_SCHEMA_MAX_AGE}"
+    return response
+
+
+def is_catalog_request(request) -> bool:
+    """Запрос полного каталога без фильтров, который можно обслужить
+    снимком. Browsable API по-прежнему получает HTML от DRF."""
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.GET
+        and "text/html" not in request.META.get("HTTP_ACCEPT", "")
+    )
+
+
+def catalog_response(request, name: str) -> HttpResponse:
+    """Снимок каталога (см. api.catalogs) с ETag. При заданном
+    CATALOG_ACCEL_PREFIX файл отдаёт nginx по X-Accel-Redirect."""
+    snapshot = load_catalog(name)
+    if settings.CATALOG_ACCEL_PREFIX:
+        # Сжатый или нет файл выбирает nginx, поэтому ETag слабый.
+        etag = "W/" + snapshot.etag
+    elif "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+        etag = snapshot.gzip_etag
+    else:
+        etag = snapshot.etag
+    if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+        response = HttpResponseNotModified()
+    elif settings.CATALOG_ACCEL_PREFIX:
+        response = HttpResponse(content_type="application/json")
+        response["X-Accel-Redirect"] = (
+            settings.CATALOG_ACCEL_PREFIX + snapshot.filename
+        )
+    elif etag == snapshot.gzip_etag:
+        response = HttpResponse(snapshot.compressed, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(snapshot.content, content_type="application/json")
+    response["ETag"] = etag
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def catalog_view(name: str, view):
+    """Отдаёт снимок каталога без аутентификации и обращений к базе,
+    остальные запросы передаёт представлению view."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if is_catalog_request(request):
+            return catalog_response(request, name)
+        return view(request, *args, **kwargs)
+    return wrapper
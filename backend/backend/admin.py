@@ -0,0 +1,27 @@
+"""Общие настройки админки проекта."""
+
+from django.db.models import Q
+
+
+class IndexedSearchMixin:
+    """Поиск в админке по индексам.
+    Стандартный поиск объединяет через OR icontains по всем полям
+    search_fields, включая поля связанных таблиц, и такой запрос не может
+    использовать индексы. Здесь каждый элемент search_lookups сопоставляет
+    полю (внешнему ключу или pk) функцию, которая по строке поиска
+    возвращает queryset подходящих объектов с поиском по индексу, а
+    условия объединяются через field__in (подзапрос).
+    search_fields по-прежнему нужен, чтобы админка показала поле поиска
+    и разрешила autocomplete_fields.
+    """
+    search_lookups = {}
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not self.search_lookups:
+            return super().get_search_results(request, queryset, search_term)
+        condition = Q()
+        for field, lookup in self.search_lookups.items():
+            condition |= Q(**{f"{field}__in": lookup(term).values("pk")})
+        return queryset.filter(condition), False
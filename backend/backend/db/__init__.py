@@ -0,0 +1,66 @@
+"""Управление соединениями с базой данных."""
+
+import time
+from functools import wraps
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connections
+
+DEFAULT_HEALTH_CHECK_IDLE = 30
+
+
+def health_check_due(settings_dict: dict, used_at: Optional[float]) -> bool:
+    """Нужно ли проверить соединение: проверка включена, а соединение
+    не использовалось дольше CONN_HEALTH_CHECK_IDLE секунд или ещё
+    не проверялось."""
+    if not settings_dict.get("CONN_HEALTH_CHECKS"):
+        return False
+    idle = settings_dict.get("CONN_HEALTH_CHECK_IDLE", DEFAULT_HEALTH_CHECK_IDLE)
+    return used_at is None or time.monotonic() - used_at > idle
+
+
+def close_unusable_connections(**kwargs):
+    """Закрывает постоянные соединения, которые перестали отвечать.
+    Подключается к сигналу request_started и повторяет поведение
+    настройки CONN_HEALTH_CHECKS из Django 4.1: соединение, оборванное
+    сервером или сетью, закрывается до начала обработки запроса,
+    а не приводит к ошибке в середине него. Запрос SELECT 1 выполняется
+    только после ошибки в соединении или долгого простоя, а не перед
+    каждым запросом.
+    """
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        used_at = getattr(connection, "health_check_used_at", None)
+        if (
+            connection.errors_occurred
+            or health_check_due(connection.settings_dict, used_at)
+        ) and not connection.is_usable():
+            connection.close()
+        connection.health_check_used_at = time.monotonic()
+
+
+def close_before_fork() -> None:
+    """Закрывает соединения процесса и пулы соединений перед fork,
+    чтобы дочерние процессы не унаследовали сокеты к базе данных."""
+    connections.close_all()
+    for connection in connections.all():
+        close_pools = getattr(connection, "close_pools", None)
+        if close_pools is not None:
+            close_pools()
+
+
+def db_task(func):
+    """Выполняет функцию с обращениями к БД в отдельном потоке (ASGI).
+    Соединения потоков пула не закрываются сигналами запроса,
+    поэтому они проверяются до и после выполнения функции.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=False)
@@ -0,0 +1,144 @@
+"""Бэкенд PostgreSQL с пулом соединений psycopg2.
+Соединения берутся из пула процесса при открытии и возвращаются в него
+при закрытии, поэтому закрытие соединения в конце запроса не приводит
+к новому TCP/SSL-рукопожатию и аутентификации в PostgreSQL.
+Размер пула задаётся ключом POOL в настройках базы данных:
+    "POOL": {"MIN_SIZE": 1, "MAX_SIZE": 4, "TIMEOUT": 10}
+С CONN_HEALTH_CHECKS соединение проверяется при возврате в пул, если
+в нём произошла ошибка, и при выдаче из пула, если оно простаивало
+дольше CONN_HEALTH_CHECK_IDLE секунд.
+"""
+
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from psycopg2 import pool
+
+from backend.db import health_check_due
+
+DEFAULT_MIN_SIZE = 1
+DEFAULT_MAX_SIZE = 4
+DEFAULT_TIMEOUT = 10
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Свободное соединение в пуле не появилось за отведённое время."""
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Соединение пула. released_at - время создания или последнего
+    возврата в пул (time.monotonic()): у соединений psycopg2 нет
+    __dict__, поэтому атрибут есть только у подкласса."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.released_at = time.monotonic()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Обёртка над стандартным бэкендом postgresql, использующая
+    ThreadedConnectionPool. Пулы общие для всех потоков процесса
+    и создаются отдельно для каждого алиаса базы данных.
+    """
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool_options(self) -> dict:
+        return self.settings_dict.get("POOL") or {}
+
+    def get_pool(self, conn_params: dict):
+        """Возвращает пул и семафор для текущего алиаса, создавая их
+        при первом обращении."""
+        with self._pools_lock:
+            if self.alias not in self._pools:
+                max_size = self.pool_options.get("MAX_SIZE", DEFAULT_MAX_SIZE)
+                self._pools[self.alias] = (
+                    pool.ThreadedConnectionPool(
+                        self.pool_options.get("MIN_SIZE", DEFAULT_MIN_SIZE),
+                        max_size,
+                        **{"connection_factory": PooledConnection, **conn_params},
+                    ),
+                    threading.BoundedSemaphore(max_size),
+                )
+            return self._pools[self.alias]
+
+    @classmethod
+    def close_pools(cls) -> None:
+        """Закрывает соединения всех пулов процесса, например перед fork."""
+        with cls._pools_lock:
+            for connection_pool, _ in cls._pools.values():
+                connection_pool.closeall()
+            cls._pools.clear()
+
+    def is_healthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        connection_pool, semaphore = self.get_pool(conn_params)
+        timeout = self.pool_options.get("TIMEOUT", DEFAULT_TIMEOUT)
+        if not semaphore.acquire(timeout=timeout):
+            raise PoolTimeout(
+                f"Нет свободных соединений в пуле '{self.alias}' за {timeout} с"
+            )
+        connection = None
+        try:
+            connection = connection_pool.getconn()
+            while connection.closed or (
+                health_check_due(
+                    self.settings_dict, getattr(connection, "released_at", None)
+                )
+                and not self.is_healthy(connection)
+            ):
+                connection_pool.putconn(connection, close=True)
+                connection = None
+                connection = connection_pool.getconn()
+            self.configure_pooled_connection(connection)
+        except Exception:
+            if connection is not None:
+                connection_pool.putconn(connection, close=True)
+            semaphore.release()
+            raise
+        return connection
+
+    def configure_pooled_connection(self, connection) -> None:
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = options["isolation_level"]
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection_pool, semaphore = self._pools[self.alias]
+        try:
+            broken = (
+                self.errors_occurred
+                and self.settings_dict.get("CONN_HEALTH_CHECKS")
+                and not self.is_healthy(self.connection)
+            )
+            if isinstance(self.connection, PooledConnection):
+                self.connection.released_at = time.monotonic()
+            with self.wrap_database_errors:
+                connection_pool.putconn(self.connection, close=broken)
+        finally:
+            semaphore.release()
@@ -0,0 +1,81 @@
+"""Маршрутизация запросов между основной базой данных и репликами.
+Чтение уходит на реплику только в безопасных (GET, HEAD, OPTIONS)
+запросах к представлениям api, для которых ReplicaRoutingMiddleware
+установил состояние маршрутизации. Все чтения запроса идут на одну
+реплику, выбранную при первом чтении. Любая запись в рамках запроса
+переключает все последующие чтения этого запроса на основную базу,
+чтение внутри транзакции основной базы тоже выполняется в ней.
+"""
+
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@dataclass
+class RoutingState:
+    """Состояние маршрутизации текущего запроса.
+    Attribute:
+        use_replica(bool):
+            Разрешено ли читать с реплики.
+        pinned(bool):
+            Запрос закреплён за основной базой: в нём была запись
+            или клиент недавно что-то записывал.
+        wrote(bool):
+            В рамках запроса была запись в основную базу.
+        replica(str):
+            Реплика, с которой читает запрос.
+    """
+    use_replica: bool = False
+    pinned: bool = False
+    wrote: bool = False
+    replica: Optional[str] = None
+
+
+routing_state: ContextVar[Optional[RoutingState]] = ContextVar(
+    "routing_state", default=None
+)
+
+
+def read_from_primary(view):
+    """Представление всегда читает из основной базы данных.
+    Для классов представлений можно также указать атрибут
+    read_from_primary = True."""
+    view.read_from_primary = True
+    return view
+
+
+class PrimaryReplicaRouter:
+    """Роутер: запись - в основную базу, чтение - в случайную, но одну
+    на весь запрос реплику из settings.DATABASE_REPLICAS, если это
+    разрешено состоянием запроса."""
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or state.pinned
+            or not settings.DATABASE_REPLICAS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
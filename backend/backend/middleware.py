@@ -0,0 +1,40 @@
+"""Основа промежуточных слоёв, работающих и в WSGI, и в ASGI.
+"""
+
+import asyncio
+
+
+class HybridMiddleware:
+    """Слой, который в ASGI работает асинхронно.
+    Синхронный слой Django 3.2 в ASGI вызывает через
+    sync_to_async(thread_sensitive=True), то есть в одном потоке на все
+    запросы, и запросы проходят через него по очереди. Если следующий
+    слой асинхронный, этот слой помечается как корутина, как
+    MiddlewareMixin, и __call__ возвращает корутину __acall__.
+    Наследники реализуют оба метода. process_view в ASGI выполняется
+    прямо в цикле событий, поэтому он не должен обращаться к базе данных.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            process_view = getattr(self, "process_view", None)
+            if process_view is not None:
+                async def async_process_view(*args):
+                    return process_view(*args)
+                self.process_view = async_process_view
+
+    @property
+    def is_async(self) -> bool:
+        return asyncio.iscoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
@@ -26,13 +26,23 @@ INSTALLED_APPS = [
     "rest_framework",
     "corsheaders",
     "djoser",
-    "drf_yasg",
     "api",
     "users",
     "recipe",
+    "jobs",
+    "sync",
+    "monitoring",
 ]
 
+# Документация API (/api/swagger/, /api/redoc/, /api/swagger.json).
+# Без неё drf_yasg не устанавливается в приложение и не импортируется.
+API_DOCS = os.getenv('API_DOCS', default='True') == 'True'
+if API_DOCS:
+    INSTALLED_APPS.append("drf_yasg")
+
 MIDDLEWARE = [
+    "monitoring.middleware.ProfilingMiddleware",
+    "monitoring.middleware.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -41,9 +51,14 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
 ]
 
-ROOT_URLCONF = "backend.urls"
+# wsgi - синхронные воркеры gunicorn, asgi - воркеры uvicorn
+# с асинхронными представлениями для эндпоинтов чтения.
+SERVER_MODE = os.getenv('SERVER_MODE', default='wsgi')
+
+ROOT_URLCONF = "backend.urls_asgi" if SERVER_MODE == "asgi" else "backend.urls"
 
 TEMPLATES = [
     {
@@ -62,16 +77,74 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "backend.wsgi.application"
+ASGI_APPLICATION = "backend.asgi.application"
+
 
+GUNICORN_WORKERS = int(os.getenv('GUNICORN_WORKERS', default=1))
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', default=1))
+
+# Пул соединений psycopg2 создаётся в каждом процессе gunicorn, поэтому
+# по умолчанию его размер равен числу потоков в процессе. Соединения
+# возвращаются в пул после каждого запроса (CONN_MAX_AGE = 0).
+DB_POOL = os.getenv('DB_POOL', default='False') == 'True'
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', default=100))
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': (
+            'backend.db.postgresql_pool' if DB_POOL
+            else os.getenv('DB_ENGINE', default='django.db.backends.postgresql')
+        ),
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', default=60))
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True'
+        ),
+        'CONN_HEALTH_CHECK_IDLE': int(
+            os.getenv('DB_CONN_HEALTH_CHECK_IDLE', default=30)
+        ),
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', default=1)),
+            'MAX_SIZE': int(
+                os.getenv('DB_POOL_MAX_SIZE', default=GUNICORN_THREADS)
+            ),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', default=10)),
+        },
+    }
+}
+
+# Реплики для чтения: для PostgreSQL - хосты (DB_REPLICA_HOSTS),
+# для SQLite - пути к файлам баз данных (DB_REPLICA_NAMES).
+DATABASE_REPLICAS = []
+for index, value in enumerate(filter(None, (
+        os.getenv('DB_REPLICA_HOSTS', default='').split(',')
+        + os.getenv('DB_REPLICA_NAMES', default='').split(',')
+))):
+    alias = f'replica{index}'
+    key = 'NAME' if 'sqlite' in DATABASES['default']['ENGINE'] else 'HOST'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        key: value.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['backend.db.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', default=5))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
     }
 }
 
@@ -108,6 +181,30 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# backend.storage.ContentHashedStorage - файлы на диске в MEDIA_ROOT,
+# backend.storage.S3Storage - в S3-совместимом хранилище (нужен boto3).
+DEFAULT_FILE_STORAGE = os.getenv(
+    'DEFAULT_FILE_STORAGE', default="backend.storage.ContentHashedStorage"
+)
+AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME', default='foodgram')
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')
+AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME')
+AWS_S3_PUBLIC_URL = os.getenv('AWS_S3_PUBLIC_URL')
+AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
+# Наибольший размер изображения рецепта в байтах (base64 и прямая загрузка).
+IMAGE_MAX_SIZE = int(os.getenv('IMAGE_MAX_SIZE', default=5 * 1024 * 1024))
+# Сколько секунд действует форма прямой загрузки изображения.
+UPLOAD_EXPIRES = int(os.getenv('UPLOAD_EXPIRES', default=600))
+# Файлы изображений без ссылок удаляются командой collect_images
+# не раньше, чем через столько часов после последнего использования.
+IMAGE_GC_GRACE_HOURS = float(os.getenv('IMAGE_GC_GRACE_HOURS', default=24))
+
+# Хэши в именах статики и сжатые копии .gz/.br, создаются collectstatic.
+# Требует выполнить collectstatic перед запуском.
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', default='False') == 'True'
+if STATIC_MANIFEST:
+    STATICFILES_STORAGE = "backend.storage.CompressedManifestStaticFilesStorage"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -127,6 +224,15 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.TokenAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 6,
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
@@ -143,3 +249,64 @@ DJOSER = {
         "user": "api.serializers.CustomUserSerializer",
     },
 }
+
+# Кэш начала ленты подписок. Кэш общий для процессов, только если
+# CACHE_BACKEND указывает на memcached или базу данных.
+FEED_CACHE = os.getenv('FEED_CACHE', default='False') == 'True'
+FEED_CACHE_SIZE = int(os.getenv('FEED_CACHE_SIZE', default=60))
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', default=600))
+
+# Рейтинги рецептов, пересчитываются командой compute_scores.
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', default=48))
+TRENDING_FAVORITE_WEIGHT = float(os.getenv('TRENDING_FAVORITE_WEIGHT', default=1))
+TRENDING_CART_WEIGHT = float(os.getenv('TRENDING_CART_WEIGHT', default=2))
+# Пересчёт перечитывает события за это время до предыдущего: транзакция,
+# добавившая событие, могла зафиксироваться уже после него. Должно быть
+# больше самой долгой транзакции записи.
+SCORES_OVERLAP_SECONDS = int(os.getenv('SCORES_OVERLAP_SECONDS', default=600))
+
+# Похожие рецепты, пересчитываются командой compute_similarity.
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', default=10))
+SIMILARITY_TAG_WEIGHT = float(os.getenv('SIMILARITY_TAG_WEIGHT', default=0.5))
+
+# Очередь фоновых задач, воркер - команда run_jobs.
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', default=3))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', default=30))
+JOBS_TIMEOUT = int(os.getenv('JOBS_TIMEOUT', default=3600))
+JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', default=7))
+# Корзины, в которых больше рецептов, выгружаются фоновой задачей, 0 - никогда.
+CART_EXPORT_JOB_THRESHOLD = int(os.getenv('CART_EXPORT_JOB_THRESHOLD', default=200))
+# Сколько секунд выгрузка списка покупок хранится в кэше. Ключ кэша
+# содержит версию корзины, поэтому изменения видны сразу.
+CART_EXPORT_CACHE_TIMEOUT = int(os.getenv('CART_EXPORT_CACHE_TIMEOUT', default=86400))
+
+# Профилирование запросов, см. monitoring.profiling. Запрос профилируется,
+# если сотрудник прислал заголовок PROFILE_HEADER или с вероятностью
+# PROFILE_SAMPLE_RATE.
+PROFILING = os.getenv('PROFILING', default='False') == 'True'
+PROFILE_HEADER = os.getenv('PROFILE_HEADER', default='X-Profile')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', default=0))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', default=0.005))
+PROFILE_MAX_COUNT = int(os.getenv('PROFILE_MAX_COUNT', default=200))
+PROFILE_RETENTION_DAYS = int(os.getenv('PROFILE_RETENTION_DAYS', default=7))
+# Запросы к базе дольше стольких миллисекунд записываются в SlowQuery
+# с планом EXPLAIN, см. monitoring.queries. 0 - не записывать.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', default=0))
+SLOW_QUERY_QUEUE_SIZE = int(os.getenv('SLOW_QUERY_QUEUE_SIZE', default=1000))
+
+# Заранее сгенерированная схема API, см. api.schema.
+API_SCHEMA_DIR = os.getenv('API_SCHEMA_DIR', default=os.path.join(BASE_DIR, "schema"))
+API_SCHEMA_MAX_AGE = int(os.getenv('API_SCHEMA_MAX_AGE', default=3600))
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+
+# Снимки каталогов тегов и ингредиентов, см. api.catalogs. С префиксом
+# внутреннего location nginx файлы отдаются через X-Accel-Redirect.
+CATALOG_DIR = os.getenv('CATALOG_DIR', default=os.path.join(BASE_DIR, "catalogs"))
+CATALOG_ACCEL_PREFIX = os.getenv('CATALOG_ACCEL_PREFIX', default='')
+
+# Журнал изменений /api/changes/: изменений за запрос, срок хранения
+# для prune_changes и интервал публикации для publish_changes, секунды.
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', default=500))
+SYNC_RETENTION_DAYS = int(os.getenv('SYNC_RETENTION_DAYS', default=30))
+SYNC_PUBLISH_INTERVAL = float(os.getenv('SYNC_PUBLISH_INTERVAL', default=1))
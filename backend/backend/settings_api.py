@@ -0,0 +1,43 @@
+"""Профиль настроек для процессов, которые обслуживают API.
+Включается через DJANGO_SETTINGS_MODULE=backend.settings_api.
+Отличия от backend.settings:
+    - сессии, CSRF, аутентификация Django, сообщения и защита от
+      clickjacking работают только для /admin/ (api.middleware.AdminMiddleware);
+    - не загружаются django_extensions и, без API_DOCS=True, drf_yasg;
+    - API отвечает только JSON, без browsable API, которому нужны сессии.
+"""
+
+import os
+
+from backend.settings import *  # noqa: F401,F403
+from backend.settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+API_DOCS = os.getenv('API_DOCS', default='False') == 'True'
+
+TRIMMED_APPS = ("django_extensions",) if API_DOCS else ("django_extensions", "drf_yasg")
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in TRIMMED_APPS]
+
+ADMIN_PATH_PREFIX = "/admin/"
+ADMIN_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE if middleware not in ADMIN_MIDDLEWARE
+]
+MIDDLEWARE.insert(
+    MIDDLEWARE.index("django.middleware.common.CommonMiddleware") + 1,
+    "api.middleware.AdminMiddleware",
+)
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ("api.renderers.FastJSONRenderer",),
+}
+
+# Проверки админки ищут слои сессий, аутентификации и сообщений
+# в MIDDLEWARE, а здесь они подключены через AdminMiddleware.
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
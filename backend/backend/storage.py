@@ -0,0 +1,270 @@
+"""Хранилища статики и медиафайлов с неизменяемыми именами.
+Имя файла зависит от его содержимого, поэтому nginx и CDN могут
+кэшировать файлы бессрочно: новое содержимое всегда получает новый URL.
+Медиафайлы хранятся на диске (ContentHashedStorage) или в S3-совместимом
+хранилище (S3Storage, выбирается DEFAULT_FILE_STORAGE). S3Storage
+принимает загрузку файлов клиентом напрямую по подписанной форме
+(см. api.uploads).
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import tempfile
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = ClientError = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css", ".js", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico",
+    ".eot", ".ttf", ".otf",
+)
+# Файлы меньше этого размера сжимать бессмысленно.
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который после collectstatic сохраняет
+    рядом с файлами с хэшем в имени сжатые копии .gz и .br (если
+    установлен brotli) для gzip_static и brotli_static в nginx."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name: str):
+        with self.open(name) as file:
+            content = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        compressors = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            compressors.append((".br", lambda data: brotli.compress(data, quality=11)))
+        for suffix, compress in compressors:
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+class ContentHashedMixin:
+    """Сохраняет загруженные файлы под именем из SHA-256 их содержимого.
+    Если файл с таким содержимым уже сохранён, он не записывается повторно,
+    а только обновляется время его изменения методом touch(name), который
+    реализует каждое хранилище. Ссылки рецептов на файлы учитывает
+    recipe.images.
+    Проверка exists только экономит запись: одновременно сохраняемые
+    одинаковые файлы получают одно имя (get_available_name его не меняет),
+    и _save хранилища считает уже существующий файл успехом."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = ContentFile(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(directory, digest.hexdigest()[:32] + extension)
+        if self.exists(name):
+            # Время изменения - время последнего использования файла,
+            # по нему recipe.images не удаляет только что загруженный файл.
+            self.touch(name)
+            return name
+        return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        """Имя не меняется: файл с тем же именем - тот же файл."""
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(
+                f"Имя файла {name} длиннее {max_length} символов"
+            )
+        return name
+
+    def save_as(self, name: str, content) -> str:
+        """Сохраняет файл под заданным именем, без хэша содержимого."""
+        return self._save(name, content)
+
+    def upload_form(self, name: str, content_type: str, max_size: int,
+                    expires: int) -> Optional[Dict]:
+        """Форма для загрузки файла name клиентом напрямую в хранилище:
+        {"url": ..., "fields": {...}}. None - хранилище так загружать
+        не умеет, файл принимает API."""
+        return None
+
+
+class ContentHashedStorage(ContentHashedMixin, FileSystemStorage):
+    """Файлы с хэшем содержимого в имени на диске, в MEDIA_ROOT."""
+
+    def _save(self, name, content):
+        """Пишет файл во временный и создаёт под именем name жёсткую
+        ссылку на него: ссылка создаётся атомарно и только если файла
+        ещё нет, поэтому файл под именем name всегда записан целиком."""
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=directory, prefix=".", suffix=".tmp", delete=False
+        ) as file:
+            for chunk in content.chunks():
+                file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        try:
+            os.chmod(file.name, self.file_permissions_mode or 0o644)
+            os.link(file.name, full_path)
+        except FileExistsError:
+            self.touch(name)
+        finally:
+            os.remove(file.name)
+        return name.replace("\\", "/")
+
+    def touch(self, name: str) -> None:
+        os.utime(self.path(name))
+
+
+@deconstructible
+class S3Storage(ContentHashedMixin, Storage):
+    """Файлы с хэшем содержимого в имени в S3-совместимом хранилище
+    (AWS S3, MinIO). Нужен boto3. Настройки AWS_* называются так же,
+    как в django-storages; AWS_S3_PUBLIC_URL - адрес, по которому
+    клиенты получают файлы (CDN или сам бакет)."""
+    CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    def __init__(self, bucket: Optional[str] = None,
+                 endpoint_url: Optional[str] = None,
+                 public_url: Optional[str] = None):
+        if boto3 is None:
+            raise ImportError("Для хранения файлов в S3 установите boto3")
+        self.bucket = bucket or settings.AWS_STORAGE_BUCKET_NAME
+        self.endpoint_url = endpoint_url or settings.AWS_S3_ENDPOINT_URL
+        self.public_url = (
+            public_url or settings.AWS_S3_PUBLIC_URL
+            or f"{self.endpoint_url}/{self.bucket}"
+        ).rstrip("/")
+
+    @cached_property
+    def client(self):
+        return boto3.client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            region_name=settings.AWS_S3_REGION_NAME,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        )
+
+    @staticmethod
+    def content_type(name: str) -> str:
+        return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    def head(self, name: str) -> Optional[Dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    def _open(self, name, mode="rb"):
+        # Файл скачивается частями во временный файл: Pillow и
+        # FileResponse нужен файл с seek.
+        file = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        self.client.download_fileobj(self.bucket, name, file)
+        file.seek(0)
+        return File(file, name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        self.client.upload_fileobj(
+            content, self.bucket, name,
+            ExtraArgs={
+                "ContentType": self.content_type(name),
+                "CacheControl": self.CACHE_CONTROL,
+            },
+        )
+        return name
+
+    def touch(self, name: str) -> None:
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=name,
+            CopySource={"Bucket": self.bucket, "Key": name},
+            MetadataDirective="REPLACE",
+            ContentType=self.content_type(name),
+            CacheControl=self.CACHE_CONTROL,
+        )
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def exists(self, name):
+        return self.head(name) is not None
+
+    def listdir(self, path):
+        prefix = path.strip("/") + "/" if path.strip("/") else ""
+        directories, files = [], []
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket, Prefix=prefix, Delimiter="/"
+        )
+        for page in pages:
+            directories.extend(
+                posixpath.basename(item["Prefix"].rstrip("/"))
+                for item in page.get("CommonPrefixes", ())
+            )
+            files.extend(
+                posixpath.basename(item["Key"]) for item in page.get("Contents", ())
+            )
+        return directories, files
+
+    def size(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=name)["ContentLength"]
+
+    def get_modified_time(self, name):
+        modified = self.client.head_object(
+            Bucket=self.bucket, Key=name
+        )["LastModified"]
+        return modified if settings.USE_TZ else timezone.make_naive(modified)
+
+    def url(self, name):
+        return f"{self.public_url}/{name}"
+
+    def upload_form(self, name, content_type, max_size, expires):
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=name,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=expires,
+        )
@@ -0,0 +1,126 @@
+import threading
+import time
+from unittest import mock
+
+from django.db import connection as default_connection
+from django.test import SimpleTestCase
+
+from backend.db.postgresql_pool import base
+
+ALIAS = "pool_test"
+
+
+class FakePool:
+    """ThreadedConnectionPool без сервера: выдаёт соединения-заглушки."""
+
+    def __init__(self, minconn, maxconn, **conn_params):
+        self.factory = conn_params.get(
+            "connection_factory", base.psycopg2.extensions.connection
+        )
+        self.idle = []
+        self.put = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        if issubclass(self.factory, base.PooledConnection):
+            connection = mock.MagicMock(spec=self.factory)
+            connection.released_at = time.monotonic()
+        else:
+            # Как у psycopg2: новые атрибуты соединению не присвоить.
+            connection = mock.MagicMock(spec_set=self.factory)
+        connection.closed = False
+        return connection
+
+    def putconn(self, connection, close=False):
+        self.put.append((connection, close))
+        if not close:
+            self.idle.append(connection)
+
+    def closeall(self):
+        self.idle.clear()
+
+
+class PoolTests(SimpleTestCase):
+
+    def setUp(self):
+        patches = (
+            mock.patch.object(base.pool, "ThreadedConnectionPool", FakePool),
+            mock.patch.object(base.psycopg2.extras, "register_default_jsonb"),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(base.DatabaseWrapper._pools.pop, ALIAS, None)
+        self.wrapper = base.DatabaseWrapper({
+            **default_connection.settings_dict,
+            "ENGINE": "backend.db.postgresql_pool",
+            "OPTIONS": {},
+            "CONN_HEALTH_CHECKS": True,
+            "CONN_HEALTH_CHECK_IDLE": 30,
+            "POOL": {"MAX_SIZE": 2, "TIMEOUT": 0.01},
+        }, ALIAS)
+
+    @property
+    def semaphore(self) -> threading.BoundedSemaphore:
+        return base.DatabaseWrapper._pools[ALIAS][1]
+
+    def checkout(self):
+        self.wrapper.connection = self.wrapper.get_new_connection({})
+        return self.wrapper.connection
+
+    def checkin(self):
+        self.wrapper._close()
+        self.wrapper.connection = None
+
+    def test_close_releases_slot(self):
+        for _ in range(5):
+            self.checkout()
+            self.checkin()
+        connection_pool = base.DatabaseWrapper._pools[ALIAS][0]
+        self.assertEqual(len(connection_pool.put), 5)
+        self.assertTrue(all(not close for _, close in connection_pool.put))
+        self.assertEqual(self.semaphore._value, 2)
+
+    def test_close_releases_slot_when_putconn_fails(self):
+        self.checkout()
+        connection_pool = base.DatabaseWrapper._pools[ALIAS][0]
+        with mock.patch.object(connection_pool, "putconn",
+                               side_effect=base.psycopg2.InterfaceError):
+            with self.assertRaises(Exception):
+                self.checkin()
+        self.assertEqual(self.semaphore._value, 2)
+
+    def test_pool_timeout(self):
+        self.checkout()
+        self.checkout()
+        with self.assertRaises(base.PoolTimeout):
+            self.checkout()
+
+    def test_recently_released_connection_is_not_checked(self):
+        connection = self.checkout()
+        self.checkin()
+        connection.reset_mock()
+        self.assertIs(self.checkout(), connection)
+        connection.cursor.assert_not_called()
+
+    def test_idle_connection_is_checked(self):
+        connection = self.checkout()
+        self.checkin()
+        connection.released_at -= 60
+        connection.reset_mock()
+        self.assertIs(self.checkout(), connection)
+        connection.cursor.return_value.__enter__.return_value.execute \
+            .assert_called_once_with("SELECT 1")
+
+    def test_broken_idle_connection_is_replaced(self):
+        connection = self.checkout()
+        self.checkin()
+        connection.released_at -= 60
+        connection.cursor.side_effect = base.psycopg2.OperationalError
+        replacement = self.checkout()
+        self.assertIsNot(replacement, connection)
+        connection_pool = base.DatabaseWrapper._pools[ALIAS][0]
+        self.assertIn((connection, True), connection_pool.put)
+        self.checkin()
+        self.assertEqual(self.semaphore._value, 2)
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from backend.storage import ContentHashedStorage
+
+
+class ContentHashedStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentHashedStorage(location=self.location)
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, filename), self.location)
+            for root, _, filenames in os.walk(self.location)
+            for filename in filenames
+        )
+
+    def test_same_content_same_name(self):
+        first = self.storage.save("recipes/a.JPG", ContentFile(b"image"))
+        second = self.storage.save("recipes/b.jpg", ContentFile(b"image"))
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith("recipes/") and first.endswith(".jpg"))
+        self.assertEqual(self.files(), [first])
+        with self.storage.open(first) as file:
+            self.assertEqual(file.read(), b"image")
+
+    def test_concurrent_save_keeps_hashed_name(self):
+        name = self.storage.save("recipes/a.jpg", ContentFile(b"image"))
+        path = self.storage.path(name)
+        os.utime(path, (time.time() - 3600,) * 2)
+        # Второй процесс проверил exists до того, как первый записал файл.
+        with mock.patch.object(ContentHashedStorage, "exists",
+                               return_value=False):
+            again = self.storage.save("recipes/b.jpg", ContentFile(b"image"))
+        self.assertEqual(again, name)
+        self.assertEqual(self.files(), [name])
+        self.assertGreater(os.path.getmtime(path), time.time() - 60)
+
+    def test_save_as_keeps_name(self):
+        name = self.storage.save_as("uploads/x.png", ContentFile(b"data"))
+        self.assertEqual(name, "uploads/x.png")
+        self.assertEqual(self.files(), ["uploads/x.png"])
+        self.assertEqual(os.stat(self.storage.path(name)).st_mode & 0o777, 0o644)
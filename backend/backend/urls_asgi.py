@@ -0,0 +1,18 @@
+"""Маршруты для запуска через ASGI: самые нагруженные эндпоинты чтения
+обслуживаются асинхронными представлениями, остальные - как в WSGI.
+"""
+
+from django.urls import path
+
+from api import async_views
+from backend.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/tags/", async_views.tag_list),
+    path("api/ingredients/", async_views.ingredient_list),
+    path("api/recipes/<int:pk>/", async_views.recipe_detail),
+    path(
+        "api/recipes/download_shopping_cart/",
+        async_views.download_shopping_cart,
+    ),
+] + sync_urlpatterns
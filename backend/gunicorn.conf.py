@@ -0,0 +1,39 @@
+"""Настройки gunicorn. Число процессов и потоков задаётся переменными
+окружения, те же значения используются в settings.py для расчёта
+размера пула соединений с базой данных.
+"""
+
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", default="wsgi")
+
+bind = "0:8000"
+if SERVER_MODE == "asgi":
+    wsgi_app = "backend.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "backend.wsgi:application"
+workers = int(os.getenv("GUNICORN_WORKERS", default=1))
+threads = int(os.getenv("GUNICORN_THREADS", default=1))
+
+
+def on_starting(server):
+    """Выводит итоговую конфигурацию соединений с базой данных,
+    генерирует схему API и снимки каталогов до запуска воркеров.
+    Соединения и пулы мастера закрываются до fork: иначе воркеры
+    унаследуют его сокеты к базе данных и будут делить их."""
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    from backend.db import close_before_fork
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+    try:
+        call_command("check", deploy=True, tags=["database_pool"])
+        if settings.API_DOCS:
+            call_command("generate_schema")
+        call_command("generate_catalogs")
+    finally:
+        close_before_fork()
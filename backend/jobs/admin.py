@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "name", "user", "status", "attempts", "created", "finished"
+    )
+    list_filter = ("status", "name")
+    list_select_related = ("user",)
+    search_fields = ("name", "user__email")
+    readonly_fields = ("created", "started", "finished", "error")
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,77 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import claim_jobs, prune_jobs, requeue_stale_jobs, run_job
+
+# Как часто удаляются старые задачи, секунды.
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Воркер очереди фоновых задач. Выполняет задачи в пуле потоков "
+        "или процессов; можно запускать несколько воркеров одновременно."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4,
+                            help="Размер пула.")
+        parser.add_argument("--pool", choices=("thread", "process"),
+                            default="thread")
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="Интервал опроса очереди, секунды.")
+        parser.add_argument("--once", action="store_true",
+                            help="Выполнить готовые задачи и завершиться.")
+        parser.add_argument("--retention-days", type=int,
+                            default=settings.JOBS_RETENTION_DAYS,
+                            help="Через сколько дней удаляются завершённые "
+                                 "задачи и их файлы.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        workers = options["workers"]
+        if options["pool"] == "process":
+            # spawn, а не fork: дочерние процессы не должны наследовать
+            # открытые соединения с базой данных.
+            executor = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        else:
+            executor = ThreadPoolExecutor(workers)
+        running = set()
+        next_prune = 0
+        with executor:
+            while not self.stopping:
+                if time.monotonic() >= next_prune:
+                    prune_jobs(options["retention_days"])
+                    next_prune = time.monotonic() + PRUNE_INTERVAL
+                requeue_stale_jobs()
+                for job_id in claim_jobs(workers - len(running)):
+                    running.add(executor.submit(run_job, job_id))
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                done, running = wait(
+                    running, timeout=options["poll"], return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    if future.exception() is not None:
+                        self.stderr.write(f"Ошибка воркера: {future.exception()}")
+            wait(running)
+
+    def stop(self, signum, frame):
+        self.stdout.write("Остановка после завершения текущих задач")
+        self.stopping = True
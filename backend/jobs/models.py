@@ -0,0 +1,78 @@
+"""Модуль моделей очереди фоновых задач."""
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class Job(models.Model):
+    """Фоновая задача. Задачи выбираются воркером run_jobs через
+    SELECT ... FOR UPDATE SKIP LOCKED, поэтому воркеров может быть несколько.
+    Attribute:
+        name(str):
+            Имя задачи в реестре jobs.registry.
+        payload(dict):
+            Аргументы задачи.
+        user(User):
+            Пользователь, для которого выполняется задача. Только он
+            видит задачу через API.
+        status(str):
+            queued, running, done или failed.
+        attempts(int):
+            Количество начатых попыток.
+        max_attempts(int):
+            После стольких неудачных попыток задача получает статус failed.
+        run_at(datetime):
+            Задача не выполняется раньше этого времени.
+        result(dict):
+            Результат задачи.
+        result_file(File):
+            Файл, созданный задачей, например список покупок.
+        error(str):
+            Traceback последней неудачной попытки.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", _("В очереди")
+        RUNNING = "running", _("Выполняется")
+        DONE = "done", _("Выполнена")
+        FAILED = "failed", _("Ошибка")
+
+    name = models.CharField(_("Задача"), max_length=100)
+    payload = models.JSONField(_("Аргументы"), default=dict, blank=True)
+    user = models.ForeignKey(
+        to=User,
+        related_name="jobs",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        verbose_name=_("Пользователь"),
+    )
+    status = models.CharField(
+        _("Статус"), max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(_("Попыток"), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_("Максимум попыток"), default=3)
+    run_at = models.DateTimeField(_("Запустить после"), default=timezone.now)
+    created = models.DateTimeField(_("Создана"), auto_now_add=True)
+    started = models.DateTimeField(_("Начата"), null=True, blank=True)
+    finished = models.DateTimeField(_("Завершена"), null=True, blank=True)
+    result = models.JSONField(_("Результат"), null=True, blank=True)
+    result_file = models.FileField(
+        _("Файл результата"), upload_to="jobs/", null=True, blank=True
+    )
+    error = models.TextField(_("Ошибка"), blank=True)
+
+    class Meta:
+        ordering = ("-created",)
+        verbose_name = _("Фоновая задача")
+        verbose_name_plural = _("Фоновые задачи")
+        indexes = (
+            models.Index(fields=("status", "run_at"), name="job_queue_idx"),
+        )
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,51 @@
+"""Реестр фоновых задач.
+Задачи объявляются в модулях tasks.py приложений декоратором task и
+получают объект Job. Возвращаемое значение сохраняется в Job.result,
+поэтому должно сериализоваться в JSON.
+    @task("export_shopping_cart")
+    def export_shopping_cart(job):
+        ...
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+
+from jobs.models import Job
+
+TASKS: Dict[str, Callable[[Job], object]] = {}
+
+
+def task(name: str):
+    """Регистрирует функцию как задачу с именем name."""
+    def decorator(func):
+        if name in TASKS:
+            raise ValueError(f"Задача {name} уже зарегистрирована")
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def get_task(name: str) -> Callable[[Job], object]:
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise LookupError(f"Задача {name} не зарегистрирована")
+
+
+def enqueue(name: str, payload: Optional[dict] = None, user=None,
+            run_at: Optional[datetime] = None,
+            max_attempts: Optional[int] = None) -> Job:
+    """Ставит задачу в очередь."""
+    get_task(name)
+    job = Job(
+        name=name,
+        payload=payload or {},
+        user=user,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if run_at is not None:
+        job.run_at = run_at
+    job.save()
+    return job
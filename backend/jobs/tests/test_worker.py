@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import enqueue, task
+from jobs.worker import claim_jobs, prune_jobs, requeue_stale_jobs, run_job
+
+
+@task("tests.echo")
+def echo(job):
+    if job.payload.get("fail"):
+        raise ValueError("Ошибка задачи")
+    return job.payload
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_DELAY=30, JOBS_TIMEOUT=60)
+class WorkerTests(TransactionTestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_claim_marks_ready_jobs_running(self):
+        ready = [enqueue("tests.echo", {"number": number}) for number in range(3)]
+        enqueue("tests.echo", run_at=timezone.now() + timedelta(hours=1))
+        claimed = claim_jobs(2)
+        self.assertEqual(claimed, [job.pk for job in ready[:2]])
+        self.assertEqual(claim_jobs(10), [ready[2].pk])
+        self.assertEqual(claim_jobs(10), [])
+        for job in Job.objects.filter(pk__in=claimed):
+            self.assertEqual(job.status, Job.Status.RUNNING)
+            self.assertEqual(job.attempts, 1)
+            self.assertIsNotNone(job.started)
+
+    def test_run_job_stores_result(self):
+        job = enqueue("tests.echo", {"number": 1})
+        claim_jobs(1)
+        self.assertEqual(run_job(job.pk), Job.Status.DONE)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {"number": 1})
+        self.assertIsNotNone(job.finished)
+
+    def test_failed_job_is_retried_then_fails(self):
+        job = enqueue("tests.echo", {"fail": True})
+        claim_jobs(1)
+        with self.assertLogs("jobs.worker", "ERROR"):
+            self.assertEqual(run_job(job.pk), Job.Status.QUEUED)
+        job.refresh_from_db()
+        self.assertIn("Ошибка задачи", job.error)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(claim_jobs(1), [])
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(claim_jobs(1), [job.pk])
+        with self.assertLogs("jobs.worker", "ERROR"):
+            self.assertEqual(run_job(job.pk), Job.Status.FAILED)
+
+    def test_stale_running_jobs_are_requeued(self):
+        retried = enqueue("tests.echo")
+        exhausted = enqueue("tests.echo", max_attempts=1)
+        fresh = enqueue("tests.echo")
+        claim_jobs(3)
+        Job.objects.exclude(pk=fresh.pk).update(
+            started=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(requeue_stale_jobs(), 2)
+        statuses = dict(Job.objects.values_list("pk", "status"))
+        self.assertEqual(statuses, {
+            retried.pk: Job.Status.QUEUED,
+            exhausted.pk: Job.Status.FAILED,
+            fresh.pk: Job.Status.RUNNING,
+        })
+
+    def test_prune_removes_old_jobs_and_files(self):
+        old = enqueue("tests.echo")
+        old.result_file.save("old.txt", ContentFile(b"old"), save=False)
+        Job.objects.filter(pk=old.pk).update(
+            status=Job.Status.DONE, result_file=old.result_file.name,
+            finished=timezone.now() - timedelta(days=10),
+        )
+        recent = enqueue("tests.echo")
+        Job.objects.filter(pk=recent.pk).update(
+            status=Job.Status.DONE, finished=timezone.now()
+        )
+        storage = old.result_file.storage
+        self.assertTrue(storage.exists(old.result_file.name))
+        self.assertEqual(prune_jobs(days=7), 1)
+        self.assertFalse(storage.exists(old.result_file.name))
+        self.assertEqual(list(Job.objects.values_list("pk", flat=True)),
+                         [recent.pk])
+
+    def test_run_jobs_once(self):
+        jobs = [enqueue("tests.echo", {"number": number}) for number in range(3)]
+        # С SQLite запускается один воркер: таблица блокируется целиком.
+        call_command("run_jobs", once=True, workers=1, stdout=StringIO())
+        self.assertEqual(
+            set(Job.objects.filter(pk__in=[job.pk for job in jobs])
+                .values_list("status", flat=True)),
+            {Job.Status.DONE},
+        )
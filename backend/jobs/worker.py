@@ -0,0 +1,99 @@
+"""Выполнение задач из очереди.
+Воркер забирает задачи пачкой в короткой транзакции с
+SELECT ... FOR UPDATE SKIP LOCKED и помечает их running, а сами задачи
+выполняются вне транзакции в пуле потоков или процессов. SQLite не
+поддерживает блокировки строк, с ним нужно запускать один воркер.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def claim_jobs(limit: int) -> List[int]:
+    """Забирает до limit готовых к выполнению задач."""
+    now = timezone.now()
+    with transaction.atomic():
+        job_ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by("run_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        Job.objects.filter(pk__in=job_ids).update(
+            status=Job.Status.RUNNING,
+            started=now,
+            attempts=F("attempts") + 1,
+        )
+    return job_ids
+
+
+def requeue_stale_jobs() -> int:
+    """Возвращает в очередь задачи, которые выполняются дольше
+    JOBS_TIMEOUT секунд: их воркер, скорее всего, был остановлен."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+    stale = Job.objects.filter(status=Job.Status.RUNNING, started__lt=deadline)
+    return (
+        stale.filter(attempts__lt=F("max_attempts"))
+        .update(status=Job.Status.QUEUED, run_at=timezone.now())
+        + stale.update(status=Job.Status.FAILED, finished=timezone.now(),
+                       error="Превышено время выполнения")
+    )
+
+
+def prune_jobs(days: int) -> int:
+    """Удаляет выполненные и неудачные задачи, завершённые больше days
+    дней назад, вместе с файлами результатов. Возвращает количество
+    удалённых задач."""
+    old = Job.objects.filter(
+        status__in=(Job.Status.DONE, Job.Status.FAILED),
+        finished__lt=timezone.now() - timedelta(days=days),
+    )
+    for job in old.exclude(result_file="").exclude(result_file__isnull=True):
+        job.result_file.delete(save=False)
+    deleted, _ = old.delete()
+    return deleted
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Экспоненциальная задержка перед повтором."""
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(job_id: int) -> str:
+    """Выполняет задачу и сохраняет её результат или ошибку.
+    Функция верхнего уровня, чтобы её можно было передать в пул процессов."""
+    close_old_connections()
+    try:
+        job = Job.objects.get(pk=job_id)
+        try:
+            job.result = get_task(job.name)(job)
+        except Exception:
+            job.error = traceback.format_exc()
+            logger.exception("Задача %s #%s завершилась ошибкой", job.name, job.pk)
+            if job.attempts < job.max_attempts:
+                job.status = Job.Status.QUEUED
+                job.run_at = timezone.now() + retry_delay(job.attempts)
+            else:
+                job.status = Job.Status.FAILED
+                job.finished = timezone.now()
+        else:
+            job.status = Job.Status.DONE
+            job.finished = timezone.now()
+        job.save(update_fields=(
+            "status", "result", "result_file", "error", "run_at", "finished"
+        ))
+        return job.status
+    finally:
+        close_old_connections()
@@ -0,0 +1,126 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from monitoring.models import RequestProfile, SlowQuery
+from monitoring.profiling import format_stats
+
+# Формат выгрузки: поле, тип содержимого, имя файла.
+PROFILE_FORMATS = {
+    "pstats": ("stats", "application/octet-stream", "profile-{}.pstats"),
+    "collapsed": ("collapsed", "text/plain; charset=UTF-8", "profile-{}.collapsed.txt"),
+}
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "created", "method", "path", "view", "status", "duration",
+        "trigger", "user", "downloads",
+    )
+    list_filter = ("trigger", "method", "status")
+    list_select_related = ("user",)
+    search_fields = ("path", "view")
+    fields = (
+        "created", "method", "path", "view", "user", "status", "duration",
+        "trigger", "downloads", "top_functions",
+    )
+    readonly_fields = fields
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match.url_name.endswith("_changelist"):
+            queryset = queryset.defer("stats", "collapsed")
+        return queryset
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:object_id>/download/<str:format>/",
+                self.admin_site.admin_view(self.download_view),
+                name="monitoring_requestprofile_download",
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id, format):
+        if format not in PROFILE_FORMATS:
+            raise Http404
+        field, content_type, filename = PROFILE_FORMATS[format]
+        profile = self.get_object(request, object_id)
+        if profile is None:
+            raise Http404
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        response = HttpResponse(getattr(profile, field), content_type=content_type)
+        response["Content-Disposition"] = (
+            f"attachment; filename={filename.format(profile.pk)}"
+        )
+        return response
+
+    @admin.display(description="Скачать")
+    def downloads(self, profile):
+        return format_html(
+            '<a href="{}">pstats</a> / <a href="{}">flamegraph</a>',
+            reverse("admin:monitoring_requestprofile_download",
+                    args=(profile.pk, "pstats")),
+            reverse("admin:monitoring_requestprofile_download",
+                    args=(profile.pk, "collapsed")),
+        )
+
+    @admin.display(description="Функции по суммарному времени")
+    def top_functions(self, profile):
+        return format_html("<pre>{}</pre>", format_stats(bytes(profile.stats)))
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        "short_sql", "view", "calls", "total_time", "mean_time", "max_time",
+        "last_seen",
+    )
+    list_filter = ("view",)
+    search_fields = ("sql", "view")
+    fields = (
+        "fingerprint", "view", "calls", "total_time", "mean_time", "max_time",
+        "first_seen", "last_seen", "formatted_sql", "formatted_plan",
+    )
+    readonly_fields = fields
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match.url_name.endswith("_changelist"):
+            queryset = queryset.defer("plan")
+        return queryset
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Запрос")
+    def short_sql(self, query):
+        return query.sql[:120]
+
+    @admin.display(description="Среднее время, мс")
+    def mean_time(self, query):
+        return round(query.mean_time, 1)
+
+    @admin.display(description="Запрос")
+    def formatted_sql(self, query):
+        return format_html("<pre>{}</pre>", query.sql)
+
+    @admin.display(description="План")
+    def formatted_plan(self, query):
+        return format_html("<pre>{}</pre>", query.plan)
+
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "monitoring"
+    verbose_name = "Мониторинг"
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from monitoring.queries import install_wrapper
+
+        if settings.SLOW_QUERY_MS:
+            connection_created.connect(
+                install_wrapper, dispatch_uid="monitoring.slow_queries"
+            )
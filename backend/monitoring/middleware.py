@@ -0,0 +1,125 @@
+"""Промежуточные слои мониторинга."""
+
+import random
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from backend.db import db_task
+from backend.middleware import HybridMiddleware
+from monitoring.models import RequestProfile
+from monitoring.profiling import RequestProfiler, save_profile, view_name
+from monitoring.queries import current_view
+
+
+def is_staff(request) -> bool:
+    """Запрос от сотрудника. Слой стоит до аутентификации Django и DRF,
+    поэтому пользователь определяется аутентификаторами DRF (токен)."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            user = Request(request, authenticators=[
+                authenticator()
+                for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ]).user
+        except APIException:
+            return False
+    return user.is_staff
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """Профилирует запрос (см. monitoring.profiling), если сотрудник
+    прислал заголовок PROFILE_HEADER или запрос попал в выборку
+    PROFILE_SAMPLE_RATE. В ответ на запрос с заголовком добавляется
+    X-Profile-Id - номер профиля в админке.
+    Без PROFILING=True слой исключается из цепочки при запуске, а
+    запросы вне профилирования стоят проверки заголовка и случайного
+    числа. Слой стоит первым, чтобы профиль включал остальные слои.
+    В ASGI профилируемый запрос выполняется из отдельного потока через
+    async_to_sync: синхронные представления и обращения к базе
+    выполняются в этом потоке и попадают в профиль, асинхронные слои
+    и представления выполняются в цикле событий и в профиль не попадают."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.header = "HTTP_" + settings.PROFILE_HEADER.upper().replace("-", "_")
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+
+    def sampled(self) -> bool:
+        return bool(self.sample_rate) and random.random() < self.sample_rate
+
+    def trigger(self, request):
+        if self.header in request.META and is_staff(request):
+            return RequestProfile.Trigger.HEADER
+        if self.sampled():
+            return RequestProfile.Trigger.SAMPLE
+        return None
+
+    def profile(self, request, trigger, get_response):
+        response, result = RequestProfiler(settings.PROFILE_SAMPLE_INTERVAL).run(
+            get_response, request
+        )
+        profile = save_profile(request, response, result, trigger)
+        if trigger == RequestProfile.Trigger.HEADER:
+            response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        trigger = self.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self.profile(request, trigger, self.get_response)
+
+    async def __acall__(self, request):
+        if self.header in request.META:
+            # is_staff читает токен из базы данных.
+            trigger = await db_task(self.trigger)(request)
+        elif self.sampled():
+            trigger = RequestProfile.Trigger.SAMPLE
+        else:
+            trigger = None
+        if trigger is None:
+            return await self.get_response(request)
+        return await db_task(self.profile)(
+            request, trigger, async_to_sync(self.get_response)
+        )
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """Передаёт записи медленных запросов (monitoring.queries) имя
+    представления, которое их выполняет. Без SLOW_QUERY_MS слой
+    исключается из цепочки при запуске."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_MS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = current_view.set("")
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    async def __acall__(self, request):
+        token = current_view.set("")
+        try:
+            return await self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    @staticmethod
+    def process_view(request, view_func, view_args, view_kwargs):
+        current_view.set(view_name(request))
+        return None
@@ -0,0 +1,107 @@
+"""Модуль моделей мониторинга производительности."""
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class RequestProfile(models.Model):
+    """Профиль одного запроса (см. monitoring.profiling).
+    Attribute:
+        method(str), path(str):
+            Метод и путь запроса с параметрами.
+        view(str):
+            Имя маршрута или представления.
+        user(User):
+            Пользователь, от имени которого выполнен запрос.
+        status(int):
+            Код ответа.
+        duration(float):
+            Время обработки запроса с профилированием, мс.
+        trigger(str):
+            Причина профилирования: заголовок сотрудника или выборка.
+        stats(bytes):
+            Статистика cProfile в формате pstats.
+        collapsed(str):
+            Стеки потока запроса в свёрнутом формате для flamegraph.
+    """
+
+    class Trigger(models.TextChoices):
+        HEADER = "header", _("Заголовок")
+        SAMPLE = "sample", _("Выборка")
+
+    created = models.DateTimeField(_("Создан"), auto_now_add=True)
+    method = models.CharField(_("Метод"), max_length=10)
+    path = models.CharField(_("Путь"), max_length=2000)
+    view = models.CharField(_("Представление"), max_length=200, blank=True)
+    user = models.ForeignKey(
+        to=User,
+        related_name="+",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        verbose_name=_("Пользователь"),
+    )
+    status = models.PositiveSmallIntegerField(_("Код ответа"))
+    duration = models.FloatField(_("Длительность, мс"))
+    trigger = models.CharField(
+        _("Причина"), max_length=10, choices=Trigger.choices
+    )
+    stats = models.BinaryField(_("Статистика pstats"))
+    collapsed = models.TextField(_("Свёрнутые стеки"), blank=True)
+
+    class Meta:
+        ordering = ("-id",)
+        verbose_name = _("Профиль запроса")
+        verbose_name_plural = _("Профили запросов")
+
+    def __str__(self):
+        return f"{self.method} {self.path} #{self.pk}"
+
+
+class SlowQuery(models.Model):
+    """Медленные SQL-запросы одного вида из одного представления
+    (см. monitoring.queries).
+    Attribute:
+        fingerprint(str):
+            Хэш запроса без значений параметров.
+        view(str):
+            Представление, выполнившее запрос; пусто вне запросов
+            (команды, воркер задач).
+        sql(str):
+            Запрос без значений параметров.
+        calls(int):
+            Количество медленных выполнений.
+        total_time(float), max_time(float):
+            Суммарное и наибольшее время выполнения, мс.
+        plan(str):
+            План EXPLAIN (без ANALYZE) самого долгого выполнения.
+    """
+    fingerprint = models.CharField(_("Отпечаток"), max_length=32)
+    view = models.CharField(_("Представление"), max_length=200, blank=True)
+    sql = models.TextField(_("Запрос"))
+    calls = models.PositiveIntegerField(_("Вызовов"), default=0)
+    total_time = models.FloatField(_("Суммарное время, мс"), default=0)
+    max_time = models.FloatField(_("Наибольшее время, мс"), default=0)
+    plan = models.TextField(_("План"), blank=True)
+    first_seen = models.DateTimeField(_("Впервые"), auto_now_add=True)
+    last_seen = models.DateTimeField(_("Последний раз"), auto_now=True)
+
+    class Meta:
+        ordering = ("-total_time",)
+        verbose_name = _("Медленный запрос")
+        verbose_name_plural = _("Медленные запросы")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("fingerprint", "view"), name="unique_slow_query"
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.view or '-'}: {self.sql[:80]}"
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0
@@ -0,0 +1,148 @@
+"""Профилирование отдельных запросов.
+Запрос профилируется cProfile, а поток-сэмплер каждые
+PROFILE_SAMPLE_INTERVAL секунд снимает стек потока запроса
+(sys._current_frames). cProfile даёт точные количества вызовов и время
+функций (pstats, snakeviz), а стеки - свёрнутый формат "a;b;c 12" для
+flamegraph.pl и speedscope. Профили хранятся в RequestProfile: не больше
+PROFILE_MAX_COUNT последних и не старше PROFILE_RETENTION_DAYS дней.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Any, NamedTuple, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from monitoring.models import RequestProfile
+
+
+class ProfileResult(NamedTuple):
+    duration: float
+    stats: bytes
+    collapsed: str
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return (
+        f"{frame.f_globals.get('__name__', '?')}:"
+        f"{getattr(code, 'co_qualname', code.co_name)}"
+    )
+
+
+class StackSampler(threading.Thread):
+    """Считает стеки потока thread_id от кадра root и глубже."""
+
+    def __init__(self, thread_id: int, root, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and frame is not self.root:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+            # Стек, снятый после stop, - это остановка самого сэмплера.
+            if names and not self.stopped.is_set():
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> str:
+        self.stopped.set()
+        self.join()
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class RequestProfiler:
+    """Профилирует вызов функции в текущем потоке."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    def run(self, func, *args) -> Tuple[Any, ProfileResult]:
+        """Результат func(*args) и его профиль."""
+        sampler = StackSampler(threading.get_ident(), sys._getframe(), self.interval)
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            value = func(*args)
+        finally:
+            profile.disable()
+            duration = (time.perf_counter() - started) * 1000
+            collapsed = sampler.stop()
+        profile.create_stats()
+        return value, ProfileResult(duration, marshal.dumps(profile.stats), collapsed)
+
+
+class StoredStats:
+    """Статистика из RequestProfile.stats для pstats.Stats."""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+def format_stats(data: bytes, limit: int = 40) -> str:
+    """Функции с наибольшим суммарным временем, как в pstats."""
+    output = io.StringIO()
+    pstats.Stats(StoredStats(data), stream=output).sort_stats(
+        "cumulative"
+    ).print_stats(limit)
+    return output.getvalue()
+
+
+def view_name(request) -> str:
+    """Имя маршрута запроса или путь к функции представления."""
+    match = request.resolver_match
+    return (match.view_name or match._func_path)[:200] if match else ""
+
+
+def save_profile(request, response, result: ProfileResult,
+                 trigger: str) -> RequestProfile:
+    user = getattr(request, "user", None)
+    profile = RequestProfile.objects.create(
+        method=request.method,
+        path=request.get_full_path()[:2000],
+        view=view_name(request),
+        user=user if user is not None and user.is_authenticated else None,
+        status=response.status_code,
+        duration=result.duration,
+        trigger=trigger,
+        stats=result.stats,
+        collapsed=result.collapsed,
+    )
+    prune_profiles()
+    return profile
+
+
+def prune_profiles() -> None:
+    """Удаляет профили сверх PROFILE_MAX_COUNT последних и старше
+    PROFILE_RETENTION_DAYS дней."""
+    RequestProfile.objects.filter(
+        created__lt=timezone.now() - timedelta(days=settings.PROFILE_RETENTION_DAYS)
+    ).delete()
+    oldest_kept = list(
+        RequestProfile.objects.order_by("-id").values_list("id", flat=True)
+        [settings.PROFILE_MAX_COUNT - 1:settings.PROFILE_MAX_COUNT]
+    )
+    if oldest_kept:
+        RequestProfile.objects.filter(id__lt=oldest_kept[0]).delete()
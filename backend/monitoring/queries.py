@@ -0,0 +1,187 @@
+"""Запись медленных SQL-запросов.
+Обёртка execute_wrappers подключается к каждому соединению с базой
+(сигнал connection_created) и замеряет время запросов. Запрос дольше
+SLOW_QUERY_MS миллисекунд вместе с именем представления (current_view,
+его устанавливает SlowQueryMiddleware) ставится в очередь, а фоновый
+поток сводит такие запросы в SlowQuery по отпечатку - тексту запроса
+без значений параметров - и сохраняет план EXPLAIN самого долгого
+выполнения. EXPLAIN выполняется без ANALYZE, то есть запрос повторно
+не выполняется. Значения параметров не сохраняются.
+Если очередь заполнена, запросы не записываются: запись не должна
+замедлять обработку запросов.
+"""
+
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from monitoring.models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+current_view: ContextVar[str] = ContextVar("current_view", default="")
+# Запросы самого фонового потока не записываются.
+_recording: ContextVar[bool] = ContextVar("recording", default=False)
+
+NORMALIZATIONS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+"), "(...)"),
+    (re.compile(r"\s+"), " "),
+)
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+class QueryRecord(NamedTuple):
+    alias: str
+    sql: str
+    params: Optional[tuple]
+    many: bool
+    duration: float
+    view: str
+
+
+def normalize(sql: str) -> str:
+    """Текст запроса без значений: литералы и параметры заменяются на ?,
+    списки IN (...) и VALUES любой длины - на (...)."""
+    for pattern, replacement in NORMALIZATIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+
+
+class SlowQueryRecorder(threading.Thread):
+    """Фоновый поток, который сводит медленные запросы в SlowQuery."""
+
+    def __init__(self):
+        super().__init__(name="slow-query-recorder", daemon=True)
+        self.queue = queue.Queue(maxsize=settings.SLOW_QUERY_QUEUE_SIZE)
+
+    def submit(self, record: QueryRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def run(self):
+        _recording.set(True)
+        while True:
+            record = self.queue.get()
+            try:
+                save_query(record)
+            except Exception:
+                logger.exception("Не удалось записать медленный запрос")
+            finally:
+                if self.queue.empty():
+                    connections.close_all()
+
+
+def explain(record: QueryRecord) -> str:
+    """План запроса без его выполнения."""
+    if record.many or not record.sql.lstrip().upper().startswith(EXPLAINABLE):
+        return ""
+    connection = connections[record.alias]
+    # В PostgreSQL ANALYZE выключен и по умолчанию, здесь - явно.
+    options = {"analyze": False} if connection.vendor == "postgresql" else {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"{connection.ops.explain_query_prefix(**options)} {record.sql}",
+                record.params,
+            )
+            return "\n".join(
+                " ".join(str(value) for value in row) for row in cursor.fetchall()
+            )
+    except DatabaseError as error:
+        return f"EXPLAIN не выполнен: {error}"
+
+
+def save_query(record: QueryRecord) -> None:
+    """Добавляет выполнение запроса к записи SlowQuery, а для нового
+    или самого долгого выполнения сохраняет план."""
+    sql = normalize(record.sql)
+    key = {"fingerprint": fingerprint(sql), "view": record.view[:200]}
+    slow_queries = SlowQuery.objects.filter(**key)
+    stored = slow_queries.values_list("max_time", flat=True).first()
+    if stored is None:
+        SlowQuery.objects.bulk_create(
+            (SlowQuery(sql=sql, **key),), ignore_conflicts=True
+        )
+    changes = {}
+    if stored is None or record.duration > stored:
+        changes["plan"] = explain(record)
+    slow_queries.update(
+        calls=F("calls") + 1,
+        total_time=F("total_time") + record.duration,
+        max_time=Greatest("max_time", record.duration),
+        last_seen=timezone.now(),
+        **changes,
+    )
+
+
+_recorder: Optional[SlowQueryRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> SlowQueryRecorder:
+    """Фоновый поток записи, запускается при первом медленном запросе.
+    Поток, запущенный до fork (например, в мастере gunicorn), в дочернем
+    процессе не работает, и там запускается новый."""
+    global _recorder
+    if _recorder is None or not _recorder.is_alive():
+        with _recorder_lock:
+            if _recorder is None or not _recorder.is_alive():
+                _recorder = SlowQueryRecorder()
+                _recorder.start()
+    return _recorder
+
+
+def record_slow_queries(execute, sql, params, many, context):
+    """Обёртка execute_wrappers, замеряющая время запроса."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= settings.SLOW_QUERY_MS and not _recording.get():
+            get_recorder().submit(QueryRecord(
+                context["connection"].alias,
+                sql,
+                None if many else params,
+                many,
+                duration,
+                current_view.get(),
+            ))
+
+
+def install_wrapper(sender, connection, **kwargs):
+    """Подключает обёртку к новому соединению (сигнал connection_created)."""
+    if record_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_slow_queries)
+
+
+def top_queries(limit: int, order: str = "total", view: Optional[str] = None):
+    """Медленные запросы по убыванию суммарного (total), среднего (mean)
+    или наибольшего (max) времени либо количества вызовов (calls)."""
+    queryset = SlowQuery.objects.annotate(mean=F("total_time") / F("calls"))
+    if view is not None:
+        queryset = queryset.filter(view=view)
+    field = {"total": "total_time", "mean": "mean", "max": "max_time",
+             "calls": "calls"}[order]
+    return queryset.order_by(f"-{field}")[:limit]
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from monitoring.middleware import ProfilingMiddleware
+from monitoring.models import RequestProfile
+from monitoring.profiling import format_stats
+
+
+def get_response(request):
+    return HttpResponse(sum(range(1000)))
+
+
+@override_settings(PROFILING=True, PROFILE_SAMPLE_RATE=0,
+                   PROFILE_HEADER="X-Profile", PROFILE_MAX_COUNT=2)
+class ProfilingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        User = get_user_model()
+        self.staff = Token.objects.create(user=User.objects.create_user(
+            "staff@example.com", "password", username="staff",
+            first_name="Анна", last_name="Иванова", is_staff=True,
+        )).key
+        self.user = Token.objects.create(user=User.objects.create_user(
+            "user@example.com", "password", username="user",
+            first_name="Иван", last_name="Петров",
+        )).key
+
+    def request(self, token=None, header=True):
+        headers = {}
+        if token is not None:
+            headers["HTTP_AUTHORIZATION"] = f"Token {token}"
+        if header:
+            headers["HTTP_X_PROFILE"] = "1"
+        return ProfilingMiddleware(get_response)(
+            self.factory.get("/api/recipes/?page=2", **headers)
+        )
+
+    def test_staff_header_profiles_request(self):
+        response = self.request(self.staff)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response["X-Profile-Id"], str(profile.pk))
+        self.assertEqual(profile.trigger, RequestProfile.Trigger.HEADER)
+        self.assertEqual(profile.path, "/api/recipes/?page=2")
+        self.assertEqual(profile.status, 200)
+        self.assertIn("get_response", format_stats(bytes(profile.stats)))
+
+    def test_header_is_ignored_for_other_users(self):
+        for token in (self.user, "invalid", None):
+            with self.subTest(token=token):
+                response = self.request(token)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_no_profile_without_header(self):
+        self.request(self.staff, header=False)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_request(self):
+        response = self.request(header=False)
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(
+            RequestProfile.objects.get().trigger, RequestProfile.Trigger.SAMPLE
+        )
+
+    @override_settings(PROFILING=False)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(get_response)
+
+    def test_old_profiles_are_pruned(self):
+        for _ in range(3):
+            self.request(self.staff)
+        self.assertEqual(RequestProfile.objects.count(), 2)
@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+
+from monitoring import queries
+from monitoring.models import SlowQuery
+from monitoring.queries import (QueryRecord, SlowQueryRecorder, fingerprint,
+                                normalize, save_query)
+
+
+def record(sql, duration, params=(), many=False, view="recipes-list"):
+    return QueryRecord(connection.alias, sql, params, many, duration, view)
+
+
+class NormalizeTests(SimpleTestCase):
+
+    def test_values_are_removed(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE a = 'x''y' AND b = 12 AND c = %s"),
+            "SELECT * FROM t WHERE a = ? AND b = ? AND c = ?",
+        )
+
+    def test_lists_of_any_length_match(self):
+        self.assertEqual(
+            fingerprint(normalize("SELECT 1 FROM t WHERE id IN (%s, %s)")),
+            fingerprint(normalize("SELECT 1 FROM t WHERE id IN (%s, %s, %s)")),
+        )
+        self.assertEqual(
+            normalize('INSERT INTO "t" VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" VALUES (...)',
+        )
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertEqual(normalize('SELECT "t1"."col2" FROM t1'),
+                         'SELECT "t1"."col2" FROM t1')
+
+
+@override_settings(SLOW_QUERY_MS=100, SLOW_QUERY_QUEUE_SIZE=2)
+class RecorderTests(TestCase):
+
+    def test_save_aggregates_by_fingerprint(self):
+        sql = 'SELECT "recipe_tag"."id" FROM "recipe_tag" WHERE "recipe_tag"."id" = %s'
+        save_query(record(sql, 150, (1,)))
+        save_query(record(sql, 300, (2,)))
+        save_query(record(sql, 200, (3,)))
+        slow_query = SlowQuery.objects.get()
+        self.assertEqual(slow_query.calls, 3)
+        self.assertAlmostEqual(slow_query.total_time, 650)
+        self.assertAlmostEqual(slow_query.max_time, 300)
+        self.assertNotIn("1", slow_query.sql.split("=")[-1])
+        self.assertTrue(slow_query.plan)
+        self.assertFalse(slow_query.plan.startswith("EXPLAIN не выполнен"))
+
+    def test_views_are_separate(self):
+        sql = 'SELECT "recipe_tag"."id" FROM "recipe_tag"'
+        save_query(record(sql, 150, view="a"))
+        save_query(record(sql, 150, view="b"))
+        self.assertEqual(SlowQuery.objects.count(), 2)
+
+    def test_executemany_is_not_explained(self):
+        save_query(record('INSERT INTO "recipe_tag" VALUES (%s)', 150,
+                          params=None, many=True))
+        self.assertEqual(SlowQuery.objects.get().plan, "")
+
+    def test_only_slow_queries_are_submitted(self):
+        recorder = mock.Mock()
+        context = {"connection": connection}
+        execute = mock.Mock(return_value="result")
+        with mock.patch.object(queries, "get_recorder", return_value=recorder), \
+                mock.patch.object(queries.time, "perf_counter",
+                                  side_effect=[0, 0.05, 0, 0.2]):
+            queries.record_slow_queries(execute, "SELECT 1", (), False, context)
+            self.assertEqual(
+                queries.record_slow_queries(execute, "SELECT 2", (), False,
+                                            context),
+                "result",
+            )
+        recorder.submit.assert_called_once()
+        self.assertEqual(recorder.submit.call_args[0][0].sql, "SELECT 2")
+
+    def test_recorder_queries_are_not_recorded(self):
+        recorder = mock.Mock()
+        token = queries._recording.set(True)
+        try:
+            with mock.patch.object(queries, "get_recorder",
+                                   return_value=recorder), \
+                    mock.patch.object(queries.time, "perf_counter",
+                                      side_effect=[0, 1]):
+                queries.record_slow_queries(
+                    mock.Mock(), "SELECT 1", (), False, {"connection": connection}
+                )
+        finally:
+            queries._recording.reset(token)
+        recorder.submit.assert_not_called()
+
+    def test_full_queue_drops_records(self):
+        recorder = SlowQueryRecorder()
+        for number in range(5):
+            recorder.submit(record(f"SELECT {number}", 150))
+        self.assertEqual(recorder.queue.qsize(), 2)
+
+    def test_dead_recorder_is_replaced(self):
+        # Поток, унаследованный при fork, в дочернем процессе не работает.
+        dead = SlowQueryRecorder()
+        with mock.patch.object(queries, "_recorder", dead), \
+                mock.patch.object(SlowQueryRecorder, "start") as start:
+            recorder = queries.get_recorder()
+            self.assertIsNot(recorder, dead)
+            start.assert_called_once_with()
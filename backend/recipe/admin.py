@@ -1,8 +1,36 @@
 from django.contrib import admin
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 
+from backend.admin import IndexedSearchMixin
 from recipe.models import (
-    FavoriteRecipe, Ingredient, IngredientAmountInRecipe, Recipe, ShoppingCart, Tag
+    FavoriteRecipe, ImageBlob, Ingredient, IngredientAmountInRecipe, Recipe,
+    ShoppingCart, Tag, UnitConversion
 )
+from recipe.similarity import mark_stale
+from recipe.summaries import refresh_summaries
+from users.admin import matching_users
+
+
+def matching_recipes(term: str):
+    """Рецепты по части названия (триграммный индекс в PostgreSQL)
+    или по автору."""
+    return Recipe.objects.filter(
+        Q(name__icontains=term) | Q(author__in=matching_users(term).values("pk"))
+    )
+
+
+def count_subquery(model):
+    """Количество связанных с рецептом строк model. Подзапрос считается
+    только для строк страницы, в отличие от JOIN с GROUP BY."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef("pk"))
+            .order_by().values("recipe").annotate(total=Count("pk"))
+            .values("total")
+        ),
+        Value(0),
+    )
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -29,34 +57,55 @@ class IngredientAdmin(admin.ModelAdmin):
     list_filter = ("measurement_unit",)
 
 
+class UnitConversionAdmin(admin.ModelAdmin):
+    list_display = ("unit", "canonical_unit", "factor")
+    search_fields = ("unit", "canonical_unit")
+
+
 class IngredientInRecipeAdmin(admin.TabularInline):
     model = IngredientAmountInRecipe
     fk_name = 'recipe'
+    autocomplete_fields = ("ingredient",)
+    extra = 0
 
 
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("id", "name", "author", "amount_favorites", "amount_shopping")
     list_filter = ("tags",)
+    list_select_related = ("author",)
+    autocomplete_fields = ("author",)
 
     search_fields = (
         "name", "author__username", "author__email"
     )
+    search_lookups = {"pk": matching_recipes}
     inlines = (
         IngredientInRecipeAdmin,
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=count_subquery(FavoriteRecipe),
+            shopping_count=count_subquery(ShoppingCart),
+        )
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_summaries((form.instance,))
+        mark_stale((form.instance.pk,))
+
     @staticmethod
-    @admin.display(description="В избранном, раз")
+    @admin.display(description="В избранном, раз", ordering="favorites_count")
     def amount_favorites(obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
     @staticmethod
-    @admin.display(description="В списке покупок, раз")
+    @admin.display(description="В списке покупок, раз", ordering="shopping_count")
     def amount_shopping(obj):
-        return obj.shopping_cart.count()
+        return obj.shopping_count
 
 
-class IngredientAmountInRecipeAdmin(admin.ModelAdmin):
+class IngredientAmountInRecipeAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "recipe",
@@ -64,38 +113,55 @@ class IngredientAmountInRecipeAdmin(admin.ModelAdmin):
         "amount",
 
     )
+    list_select_related = ("recipe", "ingredient")
+    autocomplete_fields = ("recipe", "ingredient")
     search_fields = (
         "recipe__name", "recipe__author__username", "recipe__author__email"
     )
+    search_lookups = {"recipe": matching_recipes}
 
 
-class FavoriteRecipeAdmin(admin.ModelAdmin):
+class FavoriteRecipeAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "user",
         "recipe",
     )
+    list_select_related = ("user", "recipe")
+    autocomplete_fields = ("user", "recipe")
     search_fields = (
         "recipe__name", "user__username", "user__email"
     )
+    search_lookups = {"recipe": matching_recipes, "user": matching_users}
     list_filter = ("recipe__tags",)
 
 
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "user",
         "recipe",
     )
+    list_select_related = ("user", "recipe")
+    autocomplete_fields = ("user", "recipe")
     search_fields = (
         "recipe__name", "user__username", "user__email"
     )
+    search_lookups = {"recipe": matching_recipes, "user": matching_users}
     list_filter = ("recipe__tags",)
 
 
+class ImageBlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "refcount", "released")
+    search_fields = ("name",)
+    readonly_fields = ("name", "refcount", "released")
+
+
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(ShoppingCart, ShoppingCartAdmin)
 admin.site.register(FavoriteRecipe, FavoriteRecipeAdmin)
 admin.site.register(IngredientAmountInRecipe, IngredientAmountInRecipeAdmin)
+admin.site.register(UnitConversion, UnitConversionAdmin)
+admin.site.register(ImageBlob, ImageBlobAdmin)
@@ -6,3 +6,6 @@ class RecipeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recipe"
     verbose_name = "Рецепты"
+
+    def ready(self):
+        from recipe import signals  # noqa: F401
@@ -0,0 +1,102 @@
+"""Учёт ссылок рецептов на файлы изображений и удаление лишних файлов.
+Хранилище (backend.storage.ContentHashedStorage) не записывает файл
+повторно, если файл с тем же содержимым уже есть, поэтому один файл
+может принадлежать нескольким рецептам. ImageBlob.refcount считает
+рецепты с этим файлом и меняется сигналами Recipe в транзакции
+сохранения рецепта. Файлы без ссылок (изображение заменено, рецепт
+удалён, загрузка не завершилась сохранением рецепта) удаляются
+collect_garbage не раньше, чем через grace после последнего
+использования: при повторной загрузке того же содержимого хранилище
+обновляет время изменения файла. Так же удаляются старые файлы из
+других каталогов, например брошенные прямые загрузки (api.uploads).
+"""
+
+import posixpath
+from datetime import timedelta
+from typing import Iterable, Iterator, Optional
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from recipe.models import ImageBlob, Recipe
+
+
+def image_directory() -> str:
+    return Recipe._meta.get_field("image").upload_to
+
+
+def retain(name: Optional[str]) -> None:
+    if not name:
+        return
+    updated = ImageBlob.objects.filter(name=name).update(
+        refcount=F("refcount") + 1, released=None
+    )
+    if not updated:
+        ImageBlob.objects.bulk_create(
+            (ImageBlob(name=name),), ignore_conflicts=True
+        )
+        ImageBlob.objects.filter(name=name).update(
+            refcount=F("refcount") + 1, released=None
+        )
+
+
+def release(name: Optional[str]) -> None:
+    if not name:
+        return
+    ImageBlob.objects.filter(name=name, refcount__gt=0).update(
+        refcount=F("refcount") - 1,
+        released=Case(
+            When(refcount=1, then=Value(timezone.now())),
+            default=F("released"),
+        ),
+    )
+
+
+def unreferenced_files(cutoff, directories: Iterable[str]) -> Iterator[str]:
+    """Файлы без ссылок: с нулевым счётчиком или файлы каталогов
+    directories без записи ImageBlob (например, загрузка, после
+    которой рецепт не сохранился)."""
+    yield from ImageBlob.objects.filter(
+        refcount=0, released__lt=cutoff
+    ).values_list("name", flat=True).iterator()
+    for directory in directories:
+        if not default_storage.exists(directory):
+            continue
+        _, files = default_storage.listdir(directory)
+        names = [posixpath.join(directory, name) for name in files]
+        for start in range(0, len(names), 1000):
+            batch = names[start:start + 1000]
+            known = set(
+                ImageBlob.objects.filter(name__in=batch)
+                .values_list("name", flat=True)
+            )
+            yield from (name for name in batch if name not in known)
+
+
+def collect_garbage(grace: timedelta, dry_run: bool = False,
+                    directories: Iterable[str] = ()) -> int:
+    """Удаляет файлы изображений без ссылок и файлы каталогов
+    directories, которые не использовались дольше grace. Возвращает
+    количество удалённых файлов."""
+    cutoff = timezone.now() - grace
+    deleted = 0
+    directories = (image_directory(), *directories)
+    for name in list(unreferenced_files(cutoff, directories)):
+        with transaction.atomic():
+            blob = ImageBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount:
+                continue
+            if (
+                default_storage.exists(name)
+                and default_storage.get_modified_time(name) > cutoff
+            ):
+                continue
+            deleted += 1
+            if dry_run:
+                continue
+            if blob is not None:
+                blob.delete()
+            default_storage.delete(name)
+    return deleted
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='summary',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Сводка тегов и ингредиентов'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='summary_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия сводки'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0004_recipe_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='recipe.recipe', verbose_name='Рецепт')),
+                ('trending', models.FloatField(db_index=True, default=0, verbose_name='Тренд')),
+                ('popular', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScoreRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_until', models.DateTimeField(verbose_name='Учтены события до')),
+                ('full', models.BooleanField(default=False, verbose_name='Полный пересчёт')),
+                ('recipes', models.PositiveIntegerField(default=0, verbose_name='Обновлено рецептов')),
+            ],
+            options={
+                'verbose_name': 'Пересчёт рейтингов',
+                'verbose_name_plural': 'Пересчёты рейтингов',
+                'ordering': ('-computed_until',),
+                'get_latest_by': 'computed_until',
+            },
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='added_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='favoriterecipe',
+            name='added_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата добавления'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:19
+
+import django.core.validators
+from django.db import migrations, models
+
+UNIT_CONVERSIONS = (
+    ("г", "г", 1),
+    ("кг", "г", 1000),
+    ("мл", "мл", 1),
+    ("л", "мл", 1000),
+    ("стакан", "мл", 250),
+    ("ст. л.", "мл", 15),
+    ("ч. л.", "мл", 5),
+)
+
+
+def create_conversions(apps, schema_editor):
+    UnitConversion = apps.get_model("recipe", "UnitConversion")
+    UnitConversion.objects.bulk_create(
+        UnitConversion(unit=unit, canonical_unit=canonical_unit, factor=factor)
+        for unit, canonical_unit, factor in UNIT_CONVERSIONS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0006_recipe_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(max_length=30, unique=True, verbose_name='Единица измерения')),
+                ('canonical_unit', models.CharField(max_length=30, verbose_name='Основная единица')),
+                ('factor', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'Перевод единиц измерения',
+                'verbose_name_plural': 'Перевод единиц измерения',
+                'ordering': ('canonical_unit', 'unit'),
+            },
+        ),
+        migrations.AlterField(
+            model_name='ingredientamountinrecipe',
+            name='amount',
+            field=models.PositiveIntegerField(verbose_name='Количество'),
+        ),
+        migrations.RunPython(create_conversions, migrations.RunPython.noop),
+    ]
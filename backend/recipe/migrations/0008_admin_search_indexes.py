@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:22
+
+from django.db import migrations
+
+
+def create_name_index(apps, schema_editor):
+    # name__icontains в PostgreSQL выполняется как
+    # UPPER(name) LIKE UPPER('%x%'), такой поиск ускоряет только
+    # триграммный GIN-индекс по UPPER(name).
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS recipe_name_upper_trgm_idx "
+            "ON recipe_recipe USING gin (UPPER(name) gin_trgm_ops)"
+        )
+
+
+def drop_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS recipe_name_upper_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0007_unit_conversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_index, drop_name_index),
+    ]
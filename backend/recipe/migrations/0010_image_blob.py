@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    ImageBlob = apps.get_model("recipe", "ImageBlob")
+    references = (
+        Recipe.objects.exclude(image="").exclude(image__isnull=True)
+        .values("image").annotate(refcount=models.Count("id")).order_by()
+    )
+    ImageBlob.objects.bulk_create(
+        (ImageBlob(name=row["image"], refcount=row["refcount"])
+         for row in references.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0009_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+                ('released', models.DateTimeField(blank=True, null=True, verbose_name='Без ссылок с')),
+            ],
+            options={
+                'verbose_name': 'Файл изображения',
+                'verbose_name_plural': 'Файлы изображений',
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-19 17:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0010_image_blob'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredientamountinrecipe',
+            options={'ordering': ('id',), 'verbose_name': 'Количество ингредиентов', 'verbose_name_plural': 'Количество ингредиентов'},
+        ),
+    ]
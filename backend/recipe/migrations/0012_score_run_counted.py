@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0011_ingredient_amount_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scorerun',
+            name='counted',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Учтённые события перекрытия'),
+        ),
+    ]
@@ -88,6 +88,36 @@ class Ingredient(models.Model):
         return f"Ингредиент: {self.name} - {self.measurement_unit}"
 
 
+class UnitConversion(models.Model):
+    """Перевод единицы измерения в основную единицу.
+    Используется при суммировании ингредиентов списка покупок,
+    чтобы один продукт в разных единицах попадал в одну строку.
+    Attribute:
+        unit(str):
+            Единица измерения, как в Ingredient.measurement_unit.
+        canonical_unit(str):
+            Основная единица, в которую переводится количество.
+        factor(int):
+            Количество основных единиц в одной единице unit.
+    Examples:
+        UnitConversion("кг", "г", 1000)
+        UnitConversion("стакан", "мл", 250)
+    """
+    unit = models.CharField(_("Единица измерения"), max_length=30, unique=True)
+    canonical_unit = models.CharField(_("Основная единица"), max_length=30)
+    factor = models.PositiveIntegerField(
+        _("Множитель"), validators=(MinValueValidator(1),)
+    )
+
+    class Meta:
+        ordering = ("canonical_unit", "unit")
+        verbose_name = _("Перевод единиц измерения")
+        verbose_name_plural = _("Перевод единиц измерения")
+
+    def __str__(self):
+        return f"1 {self.unit} = {self.factor} {self.canonical_unit}"
+
+
 class Recipe(models.Model):
     """Модель для рецептов.
     Attribute:
@@ -111,6 +141,13 @@ class Recipe(models.Model):
         cooking_time(int):
             Время приготовления рецепта.
             Установлено ограничение по минимальному значению (больше 1-ой минуты)
+        summary(dict):
+            Денормализованная сводка тегов и ингредиентов рецепта
+            (см. recipe.summaries). Используется при чтении рецепта.
+        summary_version(int):
+            Версия формата сводки, 0 - сводка устарела.
+        similarity_stale(bool):
+            Похожие рецепты нужно пересчитать (см. recipe.similarity).
     """
 
     author = models.ForeignKey(
@@ -157,11 +194,33 @@ class Recipe(models.Model):
         _("Дата публикации"),
         auto_now_add=True,
     )
+    summary = models.JSONField(
+        _("Сводка тегов и ингредиентов"),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    summary_version = models.PositiveSmallIntegerField(
+        _("Версия сводки"),
+        default=0,
+        editable=False,
+    )
+    similarity_stale = models.BooleanField(
+        _("Похожие рецепты устарели"),
+        default=True,
+        db_index=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ("-date",)
         verbose_name = _("рецепт")
         verbose_name_plural = _("рецепты")
+        indexes = (
+            models.Index(fields=("-date", "-id"), name="recipe_date_idx"),
+            models.Index(fields=("author", "-date"), name="recipe_author_date_idx"),
+            models.Index(fields=("cooking_time",), name="recipe_cooking_time_idx"),
+        )
 
     def __str__(self):
         return f"{self.name} - Время приготовления {self.cooking_time}"
@@ -192,13 +251,26 @@ class IngredientAmountInRecipe(models.Model):
         related_name="ingredients_in_recipe",
         on_delete=models.RESTRICT
     )
-    amount = models.PositiveSmallIntegerField(
+    amount = models.PositiveIntegerField(
         _("Количество"),
     )
 
     class Meta:
+        # Ингредиенты рецепта отдаются в порядке добавления и в
+        # RecipeSerializer, и в сводке (recipe.summaries.load_ingredients).
+        ordering = ("id",)
         verbose_name = _("Количество ингредиентов")
         verbose_name_plural = _("Количество ингредиентов")
+        # Фильтры ingredients (EXISTS по ингредиенту) и exclude_ingredients
+        # (NOT EXISTS по рецепту) читают только индекс.
+        indexes = (
+            models.Index(
+                fields=("ingredient", "recipe"), name="ingredient_recipe_idx"
+            ),
+            models.Index(
+                fields=("recipe", "ingredient"), name="recipe_ingredient_idx"
+            ),
+        )
 
 
 class FavoriteRecipe(models.Model):
@@ -229,7 +301,7 @@ class FavoriteRecipe(models.Model):
         verbose_name=_("Автор"),
     )
     added_date = models.DateTimeField(
-        auto_now_add=True, verbose_name=_("Дата добавления")
+        auto_now_add=True, db_index=True, verbose_name=_("Дата добавления")
     )
 
     class Meta:
@@ -251,6 +323,8 @@ class ShoppingCart(models.Model):
             Связь с моделью Recipe через ForeignKey.
         user(User):
             Связь с моделью User через ForeignKey.
+        added_date(datetime):
+            Время добавления в корзину. Добавляется автоматически
     Examples:
         ShoppingCart(Recipe instance, User instance)
         ShoppingCart(Recipe instance, User instance)
@@ -267,6 +341,9 @@ class ShoppingCart(models.Model):
         on_delete=models.CASCADE,
         verbose_name=_("Корзина"),
     )
+    added_date = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name=_("Дата добавления")
+    )
 
     class Meta:
         verbose_name = _("Корзина")
@@ -276,3 +353,117 @@ class ShoppingCart(models.Model):
                 fields=("recipe", "user"), name="unique_recipe_in_shopping_cart"
             ),
         )
+
+
+class RecipeScore(models.Model):
+    """Рейтинги рецепта для сортировки по популярности.
+    Пересчитываются командой compute_scores, а не при каждом запросе.
+    Attribute:
+        recipe(Recipe):
+            Рецепт, первичный ключ.
+        trending(float):
+            Сумма добавлений в избранное и корзину с экспоненциальным
+            затуханием по времени (см. recipe.scores).
+        popular(int):
+            Общее количество добавлений в избранное и корзину.
+    """
+    recipe = models.OneToOneField(
+        to=Recipe,
+        primary_key=True,
+        related_name="score",
+        on_delete=models.CASCADE,
+        verbose_name=_("Рецепт"),
+    )
+    trending = models.FloatField(_("Тренд"), default=0, db_index=True)
+    popular = models.PositiveIntegerField(_("Популярность"), default=0, db_index=True)
+
+    class Meta:
+        verbose_name = _("Рейтинг рецепта")
+        verbose_name_plural = _("Рейтинги рецептов")
+
+
+class ScoreRun(models.Model):
+    """Запуск пересчёта рейтингов. Следующий запуск учитывает
+    только события после computed_until последнего запуска и события
+    перекрытия, которых нет в counted.
+    Attribute:
+        counted(dict):
+            Идентификаторы событий за SCORES_OVERLAP_SECONDS секунд до
+            computed_until по типам событий: они уже учтены.
+    """
+    computed_until = models.DateTimeField(_("Учтены события до"))
+    full = models.BooleanField(_("Полный пересчёт"), default=False)
+    recipes = models.PositiveIntegerField(_("Обновлено рецептов"), default=0)
+    counted = models.JSONField(
+        _("Учтённые события перекрытия"), default=dict, blank=True,
+        editable=False,
+    )
+
+    class Meta:
+        ordering = ("-computed_until",)
+        get_latest_by = "computed_until"
+        verbose_name = _("Пересчёт рейтингов")
+        verbose_name_plural = _("Пересчёты рейтингов")
+
+
+class RecipeSimilarity(models.Model):
+    """Похожий рецепт. Таблица соседей заполняется командой
+    compute_similarity, для каждого рецепта хранится не больше
+    SIMILAR_RECIPES_COUNT записей.
+    Attribute:
+        recipe(Recipe):
+            Рецепт, для которого подобраны похожие.
+        similar(Recipe):
+            Похожий рецепт.
+        score(float):
+            Косинусная близость по ингредиентам и тегам.
+    """
+    recipe = models.ForeignKey(
+        to=Recipe,
+        related_name="neighbors",
+        on_delete=models.CASCADE,
+        verbose_name=_("Рецепт"),
+    )
+    similar = models.ForeignKey(
+        to=Recipe,
+        related_name="neighbor_of",
+        on_delete=models.CASCADE,
+        verbose_name=_("Похожий рецепт"),
+    )
+    score = models.FloatField(_("Близость"))
+
+    class Meta:
+        verbose_name = _("Похожий рецепт")
+        verbose_name_plural = _("Похожие рецепты")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("recipe", "similar"), name="unique_recipe_similarity"
+            ),
+        )
+        indexes = (
+            models.Index(fields=("recipe", "-score"), name="recipe_similarity_idx"),
+        )
+
+
+class ImageBlob(models.Model):
+    """Файл изображения рецепта. Хранилище называет файлы по хэшу
+    содержимого, поэтому одинаковые изображения разных рецептов - один
+    файл. Файлы без ссылок удаляет команда collect_images (см. recipe.images).
+    Attribute:
+        name(str):
+            Имя файла в хранилище.
+        refcount(int):
+            Количество рецептов с этим изображением.
+        released(datetime):
+            Когда на файл перестали ссылаться рецепты.
+    """
+    name = models.CharField(_("Файл"), max_length=255, unique=True)
+    refcount = models.PositiveIntegerField(_("Ссылок"), default=0)
+    released = models.DateTimeField(_("Без ссылок с"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Файл изображения")
+        verbose_name_plural = _("Файлы изображений")
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,173 @@
+"""Рейтинги рецептов для сортировки ordering=trending и ordering=popular.
+popular - количество добавлений рецепта в избранное и корзину.
+trending - те же события, но вклад каждого затухает экспоненциально:
+    trending = sum(weight * exp(-ln(2) * age / half_life))
+Поэтому при очередном пересчёте достаточно умножить накопленные значения
+на общий множитель затухания и прибавить вклад новых событий, которые
+группируются в SQL по рецепту и часу.
+Время события (added_date) ставится при создании строки, а видна она
+становится после фиксации транзакции, то есть событие может появиться
+позже пересчёта, уже прошедшего его время. Поэтому каждый пересчёт
+читает события и за последние SCORES_OVERLAP_SECONDS секунд до
+предыдущего и пропускает те, что предыдущий уже учёл (ScoreRun.counted).
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from recipe.models import FavoriteRecipe, RecipeScore, ScoreRun, ShoppingCart
+
+BATCH_SIZE = 500
+# Старше этого числа периодов полураспада события почти не влияют на
+# trending (вклад меньше 0.1%), поэтому при полном пересчёте не читаются.
+HALF_LIVES_WINDOW = 10
+# Сколько последних пересчётов хранится.
+RUNS_KEPT = 100
+
+
+def event_models():
+    """Модели событий и их веса в trending."""
+    return (
+        (FavoriteRecipe, settings.TRENDING_FAVORITE_WEIGHT),
+        (ShoppingCart, settings.TRENDING_CART_WEIGHT),
+    )
+
+
+def event_key(model) -> str:
+    return model._meta.model_name
+
+
+def overlap() -> timedelta:
+    return timedelta(seconds=settings.SCORES_OVERLAP_SECONDS)
+
+
+def decay_factor(elapsed: timedelta) -> float:
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return math.exp(-math.log(2) * elapsed.total_seconds() / half_life)
+
+
+def collect_trending(since: Optional[datetime], until: datetime,
+                     counted: Dict[str, List[int]]) -> Dict[int, float]:
+    """Вклад событий из интервала (since - перекрытие, until], кроме уже
+    учтённых counted, в trending на момент until.
+    Время события округляется до часа, это меньше минимального
+    периода полураспада, который имеет смысл задавать."""
+    window = timedelta(
+        hours=settings.TRENDING_HALF_LIFE_HOURS * HALF_LIVES_WINDOW
+    )
+    since = max(since - overlap(), until - window) if since else until - window
+    trending = defaultdict(float)
+    for model, weight in event_models():
+        rows = (
+            model.objects
+            .filter(added_date__gt=since, added_date__lte=until)
+            .exclude(id__in=counted.get(event_key(model), ()))
+            .annotate(hour=TruncHour("added_date"))
+            .values("recipe_id", "hour")
+            .annotate(events=Count("id"))
+            .values_list("recipe_id", "hour", "events")
+        )
+        for recipe_id, hour, events in rows:
+            trending[recipe_id] += weight * events * decay_factor(until - hour)
+    return trending
+
+
+def touched_recipes(since: Optional[datetime], until: datetime) -> Set[int]:
+    """Рецепты, у которых появились события после since (с перекрытием:
+    popular пересчитывается целиком, повторно учесть событие нельзя)."""
+    recipes = set()
+    for model, _ in event_models():
+        queryset = model.objects.filter(added_date__lte=until)
+        if since is not None:
+            queryset = queryset.filter(added_date__gt=since - overlap())
+        recipes.update(queryset.values_list("recipe_id", flat=True).distinct())
+    return recipes
+
+
+def recent_events(until: datetime) -> Dict[str, List[int]]:
+    """События перекрытия следующего пересчёта. Все видимые сейчас
+    события интервала учтены этим или предыдущими пересчётами."""
+    return {
+        event_key(model): list(
+            model.objects.filter(
+                added_date__gt=until - overlap(), added_date__lte=until
+            ).values_list("id", flat=True)
+        )
+        for model, _ in event_models()
+    }
+
+
+def count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef("recipe"))
+            .order_by().values("recipe").annotate(total=Count("id"))
+            .values("total")
+        ),
+        Value(0),
+    )
+
+
+def update_popular(queryset) -> None:
+    """Пересчитывает popular одним UPDATE с подзапросами."""
+    favorites, carts = (count_subquery(model) for model, _ in event_models())
+    queryset.update(popular=favorites + carts)
+
+
+def add_trending(trending: Dict[int, float], batch_size: int) -> None:
+    """Прибавляет вклад новых событий к уже затухшим значениям."""
+    recipe_ids = list(trending)
+    for start in range(0, len(recipe_ids), batch_size):
+        batch = recipe_ids[start:start + batch_size]
+        scores = RecipeScore.objects.filter(recipe_id__in=batch)
+        for score in scores:
+            score.trending += trending[score.recipe_id]
+        RecipeScore.objects.bulk_update(scores, ("trending",))
+
+
+@transaction.atomic
+def compute_scores(full: bool = False, batch_size: int = BATCH_SIZE) -> ScoreRun:
+    """Обновляет рейтинги с момента предыдущего пересчёта.
+    При full=True рейтинги строятся заново по всем событиям; так
+    учитываются и удалённые из избранного и корзины рецепты."""
+    now = timezone.now()
+    last = None if full else ScoreRun.objects.select_for_update().first()
+    since = last.computed_until if last else None
+    counted = last.counted if last else {}
+    if since is None:
+        RecipeScore.objects.update(trending=0)
+    elif now > since:
+        RecipeScore.objects.update(trending=F("trending") * decay_factor(now - since))
+    recipes = touched_recipes(since, now)
+    RecipeScore.objects.bulk_create(
+        (RecipeScore(recipe_id=recipe_id) for recipe_id in recipes),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    add_trending(collect_trending(since, now, counted), batch_size)
+    if full:
+        update_popular(RecipeScore.objects.all())
+        RecipeScore.objects.filter(popular=0).delete()
+    else:
+        recipe_ids = list(recipes)
+        for start in range(0, len(recipe_ids), batch_size):
+            update_popular(RecipeScore.objects.filter(
+                recipe_id__in=recipe_ids[start:start + batch_size]
+            ))
+    run = ScoreRun.objects.create(
+        computed_until=now, full=full, recipes=len(recipes),
+        counted=recent_events(now),
+    )
+    ScoreRun.objects.filter(pk__in=list(
+        ScoreRun.objects.order_by("-computed_until", "-id")
+        .values_list("id", flat=True)[RUNS_KEPT:]
+    )).delete()
+    return run
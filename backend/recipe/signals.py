@@ -0,0 +1,54 @@
+"""Обработчики сигналов моделей пакета `recipe`."""
+
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from recipe.images import release, retain
+from recipe.models import Ingredient, Recipe, Tag
+from recipe.summaries import invalidate_summaries
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_summaries(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=Tag)
+def tag_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_summaries(Recipe.objects.filter(tags=instance))
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    invalidate_summaries(Recipe.objects.filter(tags=instance))
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_loaded(sender, instance, raw=False, update_fields=None,
+                        **kwargs):
+    """Запоминает сохранённое в базе изображение, чтобы после
+    сохранения поправить счётчики ссылок (см. recipe.images)."""
+    if raw or update_fields is not None and "image" not in update_fields:
+        return
+    instance._stored_image = (
+        Recipe.objects.filter(pk=instance.pk).values_list("image", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, "_stored_image"):
+        return
+    stored = instance.__dict__.pop("_stored_image")
+    if instance.image.name != stored:
+        retain(instance.image.name)
+        release(stored)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_image_deleted(sender, instance, **kwargs):
+    release(instance.image.name)
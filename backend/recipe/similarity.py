@@ -0,0 +1,169 @@
+"""Похожие рецепты по совпадению ингредиентов и тегов.
+Рецепты представляются строками разреженной матрицы рецепт x (ингредиент,
+тег): 1 для ингредиента, SIMILARITY_TAG_WEIGHT для тега. После нормировки
+строк произведение матрицы на транспонированную даёт косинусную близость,
+из каждой строки которой берутся SIMILAR_RECIPES_COUNT лучших соседей.
+Результат хранится в RecipeSimilarity и пересчитывается командой
+compute_similarity: полностью или только для изменённых рецептов
+(Recipe.similarity_stale) и рецептов, чьи соседи могли измениться.
+Для расчёта нужны numpy и scipy.
+"""
+
+from typing import Iterable, Iterator, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from recipe.models import IngredientAmountInRecipe, Recipe, RecipeSimilarity
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+BATCH_SIZE = 1000
+# Предел ненулевых элементов в произведении пачки строк на матрицу:
+# строка произведения почти плотная (общий тег есть у многих рецептов),
+# поэтому число строк в пачке подбирается по числу рецептов.
+PRODUCT_SIZE = 10_000_000
+
+
+class SimilarityMatrix:
+    """Нормированная матрица рецептов и соответствие строк рецептам."""
+
+    def __init__(self):
+        self.recipe_ids = np.fromiter(
+            Recipe.objects.order_by("id").values_list("id", flat=True),
+            dtype=np.int64,
+        )
+        ingredients = self.load_pairs(
+            IngredientAmountInRecipe.objects.values_list("recipe_id", "ingredient_id")
+        )
+        tags = self.load_pairs(
+            Recipe.tags.through.objects.values_list("recipe_id", "tag_id")
+        )
+        matrix = sparse.hstack((
+            self.binary_matrix(ingredients, 1.0),
+            self.binary_matrix(tags, settings.SIMILARITY_TAG_WEIGHT),
+        )).tocsr()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.matrix = sparse.diags(1 / norms) @ matrix
+        self.transposed = self.matrix.T.tocsc()
+
+    @staticmethod
+    def load_pairs(queryset) -> "np.ndarray":
+        return np.array(list(queryset), dtype=np.int64).reshape(-1, 2)
+
+    def rows(self, recipe_ids: Iterable[int]) -> "np.ndarray":
+        """Номера строк матрицы для существующих рецептов."""
+        recipe_ids = np.fromiter(set(recipe_ids), dtype=np.int64)
+        return np.intersect1d(
+            self.recipe_ids, recipe_ids, assume_unique=True, return_indices=True
+        )[1]
+
+    def binary_matrix(self, pairs: "np.ndarray", weight: float):
+        """Матрица рецепт x объект, повторы связи учитываются один раз.
+        Связи рецептов, созданных после чтения списка рецептов, отбрасываются."""
+        pairs = pairs[np.isin(pairs[:, 0], self.recipe_ids)]
+        _, columns = np.unique(pairs[:, 1], return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (
+                np.ones(len(pairs)),
+                (np.searchsorted(self.recipe_ids, pairs[:, 0]), columns.ravel()),
+            ),
+            shape=(len(self.recipe_ids), columns.max() + 1 if len(pairs) else 0),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = weight
+        return matrix
+
+    def neighbors(self, rows: "np.ndarray", count: int
+                  ) -> Iterator[Tuple[int, int, float]]:
+        """Лучшие соседи рецептов в виде (рецепт, похожий, близость).
+        Из каждой строки произведения сразу берутся count лучших, а
+        пачка строк ограничена PRODUCT_SIZE элементами произведения."""
+        batch_size = max(1, PRODUCT_SIZE // max(len(self.recipe_ids), 1))
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            scores = (self.matrix[batch] @ self.transposed).tocsr()
+            for position, row in enumerate(batch):
+                begin, end = scores.indptr[position], scores.indptr[position + 1]
+                columns = scores.indices[begin:end]
+                values = scores.data[begin:end]
+                keep = columns != row
+                columns, values = columns[keep], values[keep]
+                if len(values) > count:
+                    top = np.argpartition(-values, count)[:count]
+                    columns, values = columns[top], values[top]
+                recipe_id = int(self.recipe_ids[row])
+                for column, value in zip(columns, values):
+                    yield recipe_id, int(self.recipe_ids[column]), float(value)
+
+
+def check_dependencies():
+    if np is None or sparse is None:
+        raise ImportError("Для расчёта похожих рецептов установите numpy и scipy")
+
+
+def save_neighbors(matrix: SimilarityMatrix, rows: "np.ndarray",
+                   batch_size: int) -> Set[int]:
+    """Заменяет соседей рецептов из строк rows, каждую пачку - в своей
+    короткой транзакции. Возвращает идентификаторы соседей."""
+    similar_ids = set()
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        neighbors = [
+            RecipeSimilarity(recipe_id=recipe_id, similar_id=similar_id,
+                             score=score)
+            for recipe_id, similar_id, score in matrix.neighbors(
+                batch, settings.SIMILAR_RECIPES_COUNT
+            )
+        ]
+        with transaction.atomic():
+            RecipeSimilarity.objects.filter(
+                recipe_id__in=[int(pk) for pk in matrix.recipe_ids[batch]]
+            ).delete()
+            RecipeSimilarity.objects.bulk_create(neighbors, batch_size=batch_size)
+        similar_ids.update(neighbor.similar_id for neighbor in neighbors)
+    return similar_ids
+
+
+def mark_stale(recipe_ids: Iterable[int]) -> None:
+    """Помечает, что похожие рецепты нужно пересчитать."""
+    Recipe.objects.filter(pk__in=list(recipe_ids)).update(similarity_stale=True)
+
+
+def compute_similarity(full: bool = False, batch_size: int = BATCH_SIZE) -> int:
+    """Пересчитывает таблицу похожих рецептов, возвращает число
+    обработанных рецептов. В инкрементальном режиме пересчитываются
+    изменённые рецепты, рецепты, у которых они были среди соседей,
+    и новые соседи изменённых рецептов.
+    Расчёт не держит общую транзакцию: флаги снимаются отдельной
+    короткой транзакцией, соседи записываются по пачкам, поэтому
+    строки Recipe не блокируются на время расчёта, а читатели видят
+    старых или новых соседей рецепта, но не пустой список."""
+    check_dependencies()
+    stale = Recipe.objects.filter(similarity_stale=True)
+    with transaction.atomic():
+        stale_ids: Set[int] = set(
+            stale.select_for_update().values_list("id", flat=True)
+        )
+        if not stale_ids and not full:
+            return 0
+        # Флаг снимается до чтения данных: рецепт, изменённый во время
+        # расчёта, снова будет помечен и попадёт в следующий запуск.
+        stale.filter(pk__in=stale_ids).update(similarity_stale=False)
+    matrix = SimilarityMatrix()
+    if full:
+        save_neighbors(matrix, np.arange(len(matrix.recipe_ids)), batch_size)
+        return len(matrix.recipe_ids)
+    affected = set(
+        RecipeSimilarity.objects.filter(similar_id__in=stale_ids)
+        .values_list("recipe_id", flat=True)
+    )
+    affected.update(save_neighbors(matrix, matrix.rows(stale_ids), batch_size))
+    affected -= stale_ids
+    save_neighbors(matrix, matrix.rows(affected), batch_size)
+    return len(stale_ids) + len(affected)
@@ -0,0 +1,96 @@
+"""Денормализованная сводка тегов и ингредиентов рецепта.
+Сводка хранится в Recipe.summary и позволяет отдать рецепт без JOIN
+с IngredientAmountInRecipe, Ingredient и Tag. Строки хранятся списками,
+а не объектами, так как jsonb в PostgreSQL не сохраняет порядок ключей:
+    {"tags": [[id, name, color, slug], ...],
+     "ingredients": [[id, name, measurement_unit, amount], ...]}
+Сводка действительна, только если Recipe.summary_version равен
+SUMMARY_VERSION; 0 означает, что сводку нужно пересчитать.
+Устаревшие сводки пересчитывает задача refresh_summaries (recipe.tasks),
+которая ставится в очередь в той же транзакции, что и изменение.
+"""
+
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+
+from jobs.registry import enqueue
+from recipe.models import IngredientAmountInRecipe, Recipe
+
+SUMMARY_VERSION = 1
+BATCH_SIZE = 500
+
+
+def load_tags(recipe_ids: Iterable[int]) -> Dict[int, List[list]]:
+    """Теги рецептов в порядке Tag.Meta.ordering."""
+    tags = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, *row in (
+        Recipe.tags.through.objects.filter(recipe_id__in=tags)
+        .order_by("tag__name")
+        .values_list("recipe_id", "tag_id", "tag__name", "tag__color", "tag__slug")
+    ):
+        tags[recipe_id].append(row)
+    return tags
+
+
+def load_ingredients(recipe_ids: Iterable[int]) -> Dict[int, List[list]]:
+    """Ингредиенты рецептов в порядке IngredientAmountInRecipe.Meta.ordering."""
+    ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, *row in (
+        IngredientAmountInRecipe.objects.filter(recipe_id__in=ingredients)
+        .order_by("id")
+        .values_list(
+            "recipe_id", "ingredient_id", "ingredient__name",
+            "ingredient__measurement_unit", "amount",
+        )
+    ):
+        ingredients[recipe_id].append(row)
+    return ingredients
+
+
+def refresh_summaries(recipes: Iterable[Recipe]):
+    """Пересчитывает сводки переданных рецептов и сохраняет их
+    одним UPDATE на пачку."""
+    recipes = list(recipes)
+    for start in range(0, len(recipes), BATCH_SIZE):
+        batch = recipes[start:start + BATCH_SIZE]
+        ids = [recipe.id for recipe in batch]
+        tags, ingredients = load_tags(ids), load_ingredients(ids)
+        for recipe in batch:
+            recipe.summary = {
+                "tags": tags[recipe.id],
+                "ingredients": ingredients[recipe.id],
+            }
+            recipe.summary_version = SUMMARY_VERSION
+        Recipe.objects.bulk_update(batch, ("summary", "summary_version"))
+
+
+def refresh_stale_summaries(batch_size: int = BATCH_SIZE) -> int:
+    """Пересчитывает все устаревшие сводки, возвращает их количество.
+    Рецепты пачки блокируются до записи сводок, поэтому изменение,
+    зафиксированное во время пересчёта, снова помечает сводку
+    устаревшей, а не перезаписывается ею. Рецепты, заблокированные
+    незавершённым изменением, пропускаются: их пересчитает задача,
+    поставленная этим изменением."""
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Recipe.objects.select_for_update(skip_locked=True)
+                .exclude(summary_version=SUMMARY_VERSION)
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            refresh_summaries(Recipe(id=pk) for pk in ids)
+        total += len(ids)
+
+
+def invalidate_summaries(recipes):
+    """Помечает сводки рецептов устаревшими и ставит в очередь задачу
+    refresh_summaries. Обновляются и уже устаревшие сводки: блокировка
+    их строк не даёт запущенному пересчёту записать сводку по данным
+    до этого изменения. Пока сводка не пересчитана, рецепт отдаётся
+    по живым данным."""
+    if recipes.update(summary_version=0):
+        enqueue("refresh_summaries")
@@ -0,0 +1,23 @@
+"""Фоновые задачи пересчёта данных рецептов, выполняются воркером run_jobs.
+Аргументы задач совпадают с опциями одноимённых команд."""
+
+from jobs.registry import task
+from recipe.scores import compute_scores
+from recipe.similarity import compute_similarity
+from recipe.summaries import refresh_stale_summaries
+
+
+@task("compute_scores")
+def compute_scores_task(job):
+    run = compute_scores(full=job.payload.get("full", False))
+    return {"recipes": run.recipes}
+
+
+@task("compute_similarity")
+def compute_similarity_task(job):
+    return {"recipes": compute_similarity(full=job.payload.get("full", False))}
+
+
+@task("refresh_summaries")
+def refresh_summaries_task(job):
+    return {"recipes": refresh_stale_summaries()}
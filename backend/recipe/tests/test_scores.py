@@ -0,0 +1,103 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from recipe.models import FavoriteRecipe, Recipe, RecipeScore, ScoreRun
+from recipe.scores import RUNS_KEPT, compute_scores
+
+User = get_user_model()
+
+
+@override_settings(
+    SCORES_OVERLAP_SECONDS=600, TRENDING_HALF_LIFE_HOURS=48,
+    TRENDING_FAVORITE_WEIGHT=1, TRENDING_CART_WEIGHT=2,
+)
+class ComputeScoresTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_data", users=3, recipes=3, favorites_per_user=0,
+            cart_per_user=0, subscriptions_per_user=0, stdout=StringIO(),
+        )
+        cls.users = list(User.objects.order_by("id"))
+        cls.recipes = list(Recipe.objects.order_by("id"))
+
+    def favorite(self, user, recipe, added_date=None):
+        favorite = FavoriteRecipe.objects.create(user=user, recipe=recipe)
+        if added_date is not None:
+            FavoriteRecipe.objects.filter(pk=favorite.pk).update(
+                added_date=added_date
+            )
+        return favorite
+
+    def score(self, recipe):
+        return RecipeScore.objects.filter(recipe=recipe).first()
+
+    def test_incremental_run_counts_new_events(self):
+        compute_scores(full=True)
+        self.favorite(self.users[0], self.recipes[0])
+        compute_scores()
+        score = self.score(self.recipes[0])
+        self.assertEqual(score.popular, 1)
+        self.assertAlmostEqual(score.trending, 1, delta=0.05)
+
+    def test_event_committed_after_run_is_counted(self):
+        run = compute_scores(full=True)
+        # Время события раньше предыдущего пересчёта, но строка стала
+        # видна только после него.
+        self.favorite(
+            self.users[0], self.recipes[0],
+            run.computed_until - timedelta(seconds=30),
+        )
+        compute_scores()
+        score = self.score(self.recipes[0])
+        self.assertEqual(score.popular, 1)
+        self.assertAlmostEqual(score.trending, 1, delta=0.05)
+
+    def test_overlap_is_not_counted_twice(self):
+        self.favorite(self.users[0], self.recipes[0])
+        compute_scores()
+        first = self.score(self.recipes[0]).trending
+        compute_scores()
+        compute_scores()
+        score = self.score(self.recipes[0])
+        self.assertLessEqual(score.trending, first)
+        self.assertAlmostEqual(score.trending, 1, delta=0.05)
+        self.assertEqual(score.popular, 1)
+
+    def test_full_run_drops_removed_events(self):
+        favorite = self.favorite(self.users[0], self.recipes[0])
+        compute_scores()
+        favorite.delete()
+        compute_scores(full=True)
+        self.assertIsNone(self.score(self.recipes[0]))
+
+    def test_old_runs_are_pruned(self):
+        now = timezone.now()
+        ScoreRun.objects.bulk_create(
+            ScoreRun(computed_until=now - timedelta(hours=hours))
+            for hours in range(1, RUNS_KEPT + 5)
+        )
+        run = compute_scores()
+        self.assertEqual(ScoreRun.objects.count(), RUNS_KEPT)
+        self.assertEqual(ScoreRun.objects.first(), run)
+
+    def test_unscored_recipes_are_listed_last(self):
+        self.favorite(self.users[0], self.recipes[1])
+        compute_scores(full=True)
+        for ordering in ("trending", "popular"):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(
+                    "/api/recipes/", {"ordering": ordering, "limit": 10}
+                )
+                ids = [recipe["id"] for recipe in response.data["results"]]
+                self.assertEqual(
+                    sorted(ids), sorted(recipe.pk for recipe in self.recipes)
+                )
+                self.assertEqual(ids[0], self.recipes[1].pk)
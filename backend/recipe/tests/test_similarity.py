@@ -0,0 +1,115 @@
+from collections import defaultdict
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from recipe import similarity
+from recipe.models import (Ingredient, IngredientAmountInRecipe, Recipe,
+                           RecipeSimilarity)
+from recipe.similarity import compute_similarity, np
+
+
+def expected_scores(count, tag_weight):
+    """Лучшие count значений косинусной близости каждого рецепта,
+    посчитанные плотной матрицей."""
+    recipe_ids = list(Recipe.objects.order_by("id").values_list("id", flat=True))
+    features = defaultdict(dict)
+    for recipe_id, ingredient_id in IngredientAmountInRecipe.objects.values_list(
+        "recipe_id", "ingredient_id"
+    ):
+        features[recipe_id][("ingredient", ingredient_id)] = 1.0
+    for recipe_id, tag_id in Recipe.tags.through.objects.values_list(
+        "recipe_id", "tag_id"
+    ):
+        features[recipe_id][("tag", tag_id)] = tag_weight
+    columns = sorted({key for row in features.values() for key in row})
+    matrix = np.array([
+        [features[recipe_id].get(column, 0.0) for column in columns]
+        for recipe_id in recipe_ids
+    ])
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1
+    matrix = matrix / norms[:, None]
+    product = matrix @ matrix.T
+    result = {}
+    for row, recipe_id in enumerate(recipe_ids):
+        scores = [
+            value for column, value in enumerate(product[row])
+            if column != row and value > 0
+        ]
+        result[recipe_id] = sorted(scores, reverse=True)[:count]
+    return result
+
+
+def stored_scores():
+    result = defaultdict(list)
+    for recipe_id, score in RecipeSimilarity.objects.values_list(
+        "recipe_id", "score"
+    ):
+        result[recipe_id].append(score)
+    return {
+        recipe_id: sorted(scores, reverse=True)
+        for recipe_id, scores in result.items()
+    }
+
+
+@skipIf(np is None, "нужны numpy и scipy")
+@override_settings(SIMILAR_RECIPES_COUNT=3, SIMILARITY_TAG_WEIGHT=0.5)
+class SimilarityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_data", users=3, recipes=25, favorites_per_user=0,
+            cart_per_user=0, subscriptions_per_user=0, stdout=StringIO(),
+        )
+
+    def assert_matches_dense(self):
+        expected = expected_scores(3, 0.5)
+        stored = stored_scores()
+        for recipe_id, scores in expected.items():
+            with self.subTest(recipe=recipe_id):
+                np.testing.assert_allclose(
+                    stored.get(recipe_id, []), scores, rtol=1e-6
+                )
+        self.assertFalse(RecipeSimilarity.objects.filter(
+            recipe_id=F("similar_id")
+        ).exists())
+
+    def test_full_matches_dense_product(self):
+        self.assertEqual(compute_similarity(full=True), 25)
+        self.assert_matches_dense()
+
+    def test_small_product_batches(self):
+        with mock.patch.object(similarity, "PRODUCT_SIZE", 30):
+            compute_similarity(full=True, batch_size=4)
+        self.assert_matches_dense()
+
+    def test_incremental_updates_stale_recipe(self):
+        compute_similarity(full=True)
+        Recipe.objects.update(similarity_stale=False)
+        recipe = Recipe.objects.order_by("id").first()
+        recipe.ingredients_in_recipe.all().delete()
+        IngredientAmountInRecipe.objects.bulk_create(
+            IngredientAmountInRecipe(recipe=recipe, ingredient=ingredient,
+                                     amount=1)
+            for ingredient in Ingredient.objects.order_by("-id")[:3]
+        )
+        recipe.similarity_stale = True
+        recipe.save(update_fields=("similarity_stale",))
+        self.assertGreater(compute_similarity(), 0)
+        np.testing.assert_allclose(
+            stored_scores().get(recipe.pk, []),
+            expected_scores(3, 0.5)[recipe.pk], rtol=1e-6,
+        )
+        self.assertFalse(
+            Recipe.objects.filter(similarity_stale=True).exists()
+        )
+
+    def test_nothing_stale(self):
+        Recipe.objects.update(similarity_stale=False)
+        self.assertEqual(compute_similarity(), 0)
@@ -0,0 +1,48 @@
+"""Приведение единиц измерения ингредиентов к основным единицам.
+Таблица UnitConversion небольшая, поэтому она превращается в выражения
+CASE, и перевод с суммированием выполняются в одном SQL-запросе.
+Единицы без записи в таблице остаются как есть с множителем 1.
+"""
+
+from typing import Dict, Tuple
+
+from django.db.models import (BigIntegerField, Case, CharField, F, Value,
+                              When)
+
+from recipe.models import UnitConversion
+
+
+def unit_conversions() -> Dict[str, Tuple[str, int]]:
+    """Соответствие единицы паре (основная единица, множитель)."""
+    return {
+        unit: (canonical_unit, factor)
+        for unit, canonical_unit, factor in UnitConversion.objects.values_list(
+            "unit", "canonical_unit", "factor"
+        )
+    }
+
+
+def canonical_unit(field: str, conversions: Dict[str, Tuple[str, int]]) -> Case:
+    """Основная единица измерения для поля с единицей измерения."""
+    return Case(
+        *(
+            When(**{field: unit}, then=Value(canonical))
+            for unit, (canonical, _) in conversions.items()
+            if canonical != unit
+        ),
+        default=F(field),
+        output_field=CharField(),
+    )
+
+
+def unit_factor(field: str, conversions: Dict[str, Tuple[str, int]]) -> Case:
+    """Множитель перевода в основную единицу."""
+    return Case(
+        *(
+            When(**{field: unit}, then=Value(factor))
+            for unit, (_, factor) in conversions.items()
+            if factor != 1
+        ),
+        default=Value(1),
+        output_field=BigIntegerField(),
+    )
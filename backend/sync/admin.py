@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from sync.models import Change
+
+
+class ChangeAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "position", "entity", "object_id", "user", "deleted", "created"
+    )
+    list_filter = ("entity", "deleted")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    show_full_result_count = False
+
+
+admin.site.register(Change, ChangeAdmin)
@@ -0,0 +1,125 @@
+"""Чтение и публикация журнала изменений.
+Записи журнала создаются в транзакциях изменений объектов и получают
+номера (position) только после фиксации: publish_changes под блокировкой
+ChangeCursor нумерует все видимые к этому моменту записи по порядку.
+Транзакция, зафиксированная позже, получит большие номера, поэтому курсор
+клиента никогда не перескакивает через изменения. Публикует отдельный
+процесс (команда publish_changes) раз в SYNC_PUBLISH_INTERVAL секунд,
+а не записавшие изменения запросы: иначе все записи ждали бы друг друга
+на блокировке единственной строки ChangeCursor. Чтение журнала ничего
+не пишет и может идти на реплику.
+Журнал читают клиенты через /api/changes/, но read_changes подходит и для
+других потребителей: инвалидации кэшей, поискового индекса.
+"""
+
+from datetime import timedelta
+from typing import List, NamedTuple, Tuple
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from sync.models import Change, ChangeCursor
+
+BATCH_SIZE = 1000
+
+
+class ChangeEntry(NamedTuple):
+    position: int
+    entity: str
+    object_id: int
+    deleted: bool
+
+
+def publish_changes(batch_size: int = BATCH_SIZE) -> int:
+    """Присваивает номера зафиксированным записям журнала,
+    возвращает их количество. Если курсор заблокирован другим процессом,
+    публикация пропускается: записи опубликует он или следующий вызов."""
+    if not Change.objects.filter(position__isnull=True).exists():
+        return 0
+    published = 0
+    with transaction.atomic():
+        cursor = (
+            ChangeCursor.objects.select_for_update(skip_locked=True)
+            .filter(pk=1).first()
+        )
+        if cursor is None:
+            if ChangeCursor.objects.filter(pk=1).exists():
+                return 0
+            # Строку создаёт миграция, но flush (например, в тестах)
+            # её удаляет.
+            cursor, _ = ChangeCursor.objects.get_or_create(pk=1)
+        while True:
+            pending = list(
+                Change.objects.filter(position__isnull=True)
+                .order_by("id").only("id")[:batch_size]
+            )
+            if not pending:
+                break
+            for change in pending:
+                cursor.position += 1
+                change.position = cursor.position
+            Change.objects.bulk_update(pending, ("position",))
+            published += len(pending)
+        cursor.save(update_fields=("position",))
+    return published
+
+
+def current_position() -> int:
+    return ChangeCursor.objects.filter(pk=1).values_list(
+        "position", flat=True
+    ).first() or 0
+
+
+def is_pruned(since: int) -> bool:
+    """Изменения после since частично удалены prune_changes."""
+    return since < (ChangeCursor.objects.filter(pk=1).values_list(
+        "pruned_until", flat=True
+    ).first() or 0)
+
+
+def read_changes(since: int, user=None, limit: int = BATCH_SIZE
+                 ) -> Tuple[List[ChangeEntry], int, bool]:
+    """Изменения после курсора since, видимые пользователю user: общие
+    объекты и его личные. Несколько изменений одного объекта сжимаются
+    до последнего. Возвращает изменения по порядку, новый курсор и
+    признак того, что изменений больше limit."""
+    latest = current_position()
+    visible = Q(user__isnull=True)
+    if user is not None and user.is_authenticated:
+        visible |= Q(user=user)
+    rows = list(
+        Change.objects.filter(visible, position__gt=since)
+        .order_by("position")
+        .values_list("position", "entity", "object_id", "deleted")[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        cursor = rows[-1][0]
+    else:
+        cursor = max([since, latest] + [row[0] for row in rows[-1:]])
+    compacted = {}
+    for row in rows:
+        entry = ChangeEntry(*row)
+        compacted.pop((entry.entity, entry.object_id), None)
+        compacted[(entry.entity, entry.object_id)] = entry
+    return list(compacted.values()), cursor, has_more
+
+
+@transaction.atomic
+def prune_changes(days: int) -> int:
+    """Удаляет опубликованные изменения старше days дней и запоминает
+    границу удаления. Возвращает количество удалённых записей."""
+    old = Change.objects.filter(
+        position__isnull=False,
+        created__lt=timezone.now() - timedelta(days=days),
+    )
+    until = old.aggregate(until=Max("position"))["until"]
+    if until is None:
+        return 0
+    cursor, _ = ChangeCursor.objects.select_for_update().get_or_create(pk=1)
+    deleted, _ = Change.objects.filter(position__lte=until).delete()
+    cursor.pruned_until = max(cursor.pruned_until, until)
+    cursor.save(update_fields=("pruned_until",))
+    return deleted
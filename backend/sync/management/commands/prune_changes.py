@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sync.feed import prune_changes, publish_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Публикует новые записи журнала изменений и удаляет записи старше "
+        "SYNC_RETENTION_DAYS дней. Клиентам с более старым курсором "
+        "/api/changes/ ответит 410."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int,
+                            default=settings.SYNC_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        published = publish_changes()
+        deleted = prune_changes(options["days"])
+        self.stdout.write(
+            f"Опубликовано изменений: {published}, удалено: {deleted}"
+        )
@@ -0,0 +1,45 @@
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from sync.feed import publish_changes
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Присваивает номера новым записям журнала изменений каждые "
+        "SYNC_PUBLISH_INTERVAL секунд. Пока процесс не запущен, клиенты "
+        "/api/changes/ не получают новых изменений."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float,
+                            default=settings.SYNC_PUBLISH_INTERVAL,
+                            help="Интервал публикации, секунды.")
+        parser.add_argument("--once", action="store_true",
+                            help="Опубликовать записи и завершиться.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            published = publish_changes()
+            self.stdout.write(f"Опубликовано изменений: {published}")
+            return
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        while not self.stopping:
+            try:
+                publish_changes()
+            except DatabaseError:
+                logger.exception("Не удалось опубликовать журнал изменений")
+                close_old_connections()
+            time.sleep(options["interval"])
+
+    def stop(self, signum, frame):
+        self.stopping = True
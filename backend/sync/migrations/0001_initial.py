@@ -0,0 +1,56 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_cursor(apps, schema_editor):
+    ChangeCursor = apps.get_model("sync", "ChangeCursor")
+    ChangeCursor.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveBigIntegerField(default=0)),
+                ('pruned_until', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Курсор журнала',
+                'verbose_name_plural': 'Курсор журнала',
+            },
+        ),
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveBigIntegerField(blank=True, null=True, unique=True, verbose_name='Номер')),
+                ('entity', models.CharField(choices=[('recipe', 'Рецепт'), ('tag', 'Тег'), ('ingredient', 'Ингредиент'), ('favorite', 'Избранное'), ('shopping_cart', 'Список покупок'), ('subscription', 'Подписка')], max_length=20, verbose_name='Объект')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Идентификатор')),
+                ('deleted', models.BooleanField(default=False, verbose_name='Удалён')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='changes', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Изменение',
+                'verbose_name_plural': 'Изменения',
+                'ordering': ('position',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(condition=models.Q(('position__isnull', True)), fields=['id'], name='sync_change_pending_idx'),
+        ),
+        migrations.RunPython(create_cursor, migrations.RunPython.noop),
+    ]
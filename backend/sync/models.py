@@ -0,0 +1,93 @@
+"""Модуль моделей журнала изменений для синхронизации клиентов."""
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class Change(models.Model):
+    """Изменение объекта, записанное в той же транзакции, что и сам объект.
+    Порядковый номер position присваивается уже после фиксации транзакции
+    (sync.feed.publish_changes), поэтому клиент, прочитавший журнал до
+    некоторого номера, не пропустит изменения, зафиксированные позже
+    с меньшим id.
+    Attribute:
+        position(int):
+            Номер в журнале, курсор клиента. Пусто, пока изменение
+            не опубликовано.
+        entity(str):
+            Тип объекта.
+        object_id(int):
+            Идентификатор объекта; для избранного и корзины - рецепта,
+            для подписки - автора.
+        user(User):
+            Владелец личных объектов (избранное, корзина, подписки),
+            только он получает их изменения. Пусто для общих объектов.
+        deleted(bool):
+            Объект удалён.
+    """
+
+    class Entity(models.TextChoices):
+        RECIPE = "recipe", _("Рецепт")
+        TAG = "tag", _("Тег")
+        INGREDIENT = "ingredient", _("Ингредиент")
+        FAVORITE = "favorite", _("Избранное")
+        SHOPPING_CART = "shopping_cart", _("Список покупок")
+        SUBSCRIPTION = "subscription", _("Подписка")
+
+    position = models.PositiveBigIntegerField(
+        _("Номер"), null=True, blank=True, unique=True
+    )
+    entity = models.CharField(_("Объект"), max_length=20, choices=Entity.choices)
+    object_id = models.PositiveBigIntegerField(_("Идентификатор"))
+    user = models.ForeignKey(
+        to=User,
+        related_name="changes",
+        null=True,
+        blank=True,
+        # Изменения записываются и при каскадном удалении пользователя,
+        # поэтому внешнего ключа в базе нет; старые записи удаляет
+        # prune_changes.
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_("Пользователь"),
+    )
+    deleted = models.BooleanField(_("Удалён"), default=False)
+    created = models.DateTimeField(_("Создано"), auto_now_add=True)
+
+    class Meta:
+        ordering = ("position",)
+        verbose_name = _("Изменение")
+        verbose_name_plural = _("Изменения")
+        indexes = (
+            models.Index(
+                fields=("id",),
+                condition=Q(position__isnull=True),
+                name="sync_change_pending_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.entity} {self.object_id}"
+
+
+class ChangeCursor(models.Model):
+    """Единственная строка с последним присвоенным номером журнала.
+    Блокируется при публикации изменений, чтобы номера присваивались
+    по одному процессу за раз.
+    Attribute:
+        position(int):
+            Последний присвоенный номер.
+        pruned_until(int):
+            Изменения с номером не больше этого удалены prune_changes;
+            клиенту с более старым курсором нужна полная синхронизация.
+    """
+    position = models.PositiveBigIntegerField(default=0)
+    pruned_until = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Курсор журнала")
+        verbose_name_plural = _("Курсор журнала")
@@ -0,0 +1,47 @@
+"""Запись изменений в журнал в транзакции изменения объекта.
+Создание и удаление объектов проекта выполняются в транзакции (сериализаторы
+рецептов, get_or_create, удаление через Collector, админка), поэтому запись
+журнала фиксируется или откатывается вместе с объектом. bulk_create и
+QuerySet.update сигналов не отправляют и в журнал не попадают.
+Номера записям присваивает команда publish_changes (sync.feed).
+"""
+
+from django.db.models.signals import post_delete, post_save
+
+from recipe.models import FavoriteRecipe, Ingredient, Recipe, ShoppingCart, Tag
+from sync.models import Change
+from users.models import Subscribe
+
+# Модель: (тип объекта, поле идентификатора, личный ли объект).
+TRACKED_MODELS = {
+    Recipe: (Change.Entity.RECIPE, "pk", False),
+    Tag: (Change.Entity.TAG, "pk", False),
+    Ingredient: (Change.Entity.INGREDIENT, "pk", False),
+    FavoriteRecipe: (Change.Entity.FAVORITE, "recipe_id", True),
+    ShoppingCart: (Change.Entity.SHOPPING_CART, "recipe_id", True),
+    Subscribe: (Change.Entity.SUBSCRIPTION, "author_id", True),
+}
+
+
+def record_change(sender, instance, deleted: bool) -> None:
+    entity, field, private = TRACKED_MODELS[sender]
+    Change.objects.create(
+        entity=entity,
+        object_id=getattr(instance, field),
+        user_id=instance.user_id if private else None,
+        deleted=deleted,
+    )
+
+
+def object_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(sender, instance, deleted=False)
+
+
+def object_deleted(sender, instance, **kwargs):
+    record_change(sender, instance, deleted=True)
+
+
+for model in TRACKED_MODELS:
+    post_save.connect(object_saved, sender=model)
+    post_delete.connect(object_deleted, sender=model)
@@ -0,0 +1,104 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+from recipe.models import Tag
+from sync.feed import (current_position, is_pruned, prune_changes,
+                       publish_changes, read_changes)
+from sync.models import Change, ChangeCursor
+
+
+def create_changes(count):
+    return Change.objects.bulk_create(
+        Change(entity=Change.Entity.TAG, object_id=number)
+        for number in range(count)
+    )
+
+
+class PublishTests(TestCase):
+
+    def test_positions_follow_ids(self):
+        create_changes(5)
+        self.assertEqual(publish_changes(batch_size=2), 5)
+        self.assertEqual(
+            list(Change.objects.order_by("id").values_list("position", flat=True)),
+            [1, 2, 3, 4, 5],
+        )
+        self.assertEqual(current_position(), 5)
+        self.assertEqual(publish_changes(), 0)
+
+    def test_nothing_pending_takes_no_lock(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(publish_changes(), 0)
+
+    def test_later_commits_get_larger_positions(self):
+        create_changes(2)
+        publish_changes()
+        changes, cursor, _ = read_changes(0)
+        self.assertEqual(cursor, 2)
+        create_changes(1)
+        self.assertEqual(read_changes(cursor)[0], [])
+        publish_changes()
+        changes, cursor, _ = read_changes(cursor)
+        self.assertEqual([change.position for change in changes], [3])
+
+    def test_missing_cursor_row(self):
+        ChangeCursor.objects.all().delete()
+        self.assertEqual(current_position(), 0)
+        self.assertFalse(is_pruned(0))
+        create_changes(2)
+        self.assertEqual(publish_changes(), 2)
+        self.assertEqual(current_position(), 2)
+
+    def test_prune(self):
+        create_changes(3)
+        publish_changes()
+        Change.objects.filter(position__lte=2).update(
+            created=timezone.now() - timedelta(days=10)
+        )
+        self.assertEqual(prune_changes(days=5), 2)
+        self.assertTrue(is_pruned(1))
+        self.assertFalse(is_pruned(2))
+
+    def test_publish_command(self):
+        Tag.objects.create(name="Завтрак", color="#E26C2D", slug="breakfast")
+        stdout = StringIO()
+        call_command("publish_changes", once=True, stdout=stdout)
+        self.assertIn("1", stdout.getvalue())
+        self.assertEqual(current_position(), 1)
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+class ConcurrentPublishTests(TransactionTestCase):
+
+    def setUp(self):
+        ChangeCursor.objects.get_or_create(pk=1)
+
+    def test_locked_cursor_is_skipped(self):
+        create_changes(2)
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_cursor():
+            try:
+                with transaction.atomic():
+                    ChangeCursor.objects.select_for_update().get(pk=1)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_cursor)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(publish_changes(), 0)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(publish_changes(), 2)
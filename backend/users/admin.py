@@ -1,11 +1,21 @@
 from django.contrib import admin
 
+from backend.admin import IndexedSearchMixin
 from users.models import CustomUser, Subscribe
 
 
-class CustomUserAdmin(admin.ModelAdmin):
+def matching_users(term: str):
+    """Пользователи по email целиком или по началу username.
+    Оба поиска используют индексы по UPPER(email) и UPPER(username)."""
+    if "@" in term:
+        return CustomUser.objects.filter(email__iexact=term)
+    return CustomUser.objects.filter(username__istartswith=term)
+
+
+class CustomUserAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("id", "username", "email", "first_name", "last_name")
     search_fields = ("username", "email")
+    search_lookups = {"pk": matching_users}
     list_filter = ("is_staff", "is_superuser")
     ordering = ("email",)
     fieldsets = (
@@ -24,13 +34,16 @@ class CustomUserAdmin(admin.ModelAdmin):
     )
 
 
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "user",
         "author",
     )
+    list_select_related = ("user", "author")
+    autocomplete_fields = ("user", "author")
     search_fields = ("user__username", "user__email", "author__username", "author__email")
+    search_lookups = {"user": matching_users, "author": matching_users}
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:22
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def create_username_index(apps, schema_editor):
+    # Поиск по началу username (username__istartswith) в PostgreSQL
+    # выполняется как UPPER(username) LIKE 'X%' и использует индекс
+    # только с классом операторов text_pattern_ops.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS user_username_upper_like_idx "
+            "ON users_customuser (UPPER(username) text_pattern_ops)"
+        )
+
+
+def drop_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS user_username_upper_like_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='user_email_upper_idx'),
+        ),
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
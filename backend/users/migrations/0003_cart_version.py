@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='cart_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='версия списка покупок'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 
@@ -55,6 +56,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
             Установлено ограничение по максимальной длине.
         password(str):
             Пароль для авторизации.
+        cart_version(int):
+            Версия списка покупок, увеличивается при изменении корзины
+            и рецептов в ней. По ней кэшируется выгрузка списка покупок.
     """
 
     username = models.CharField(
@@ -85,6 +89,11 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     )
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    cart_version = models.PositiveBigIntegerField(
+        _("версия списка покупок"),
+        default=0,
+        editable=False,
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ("username", "first_name", "last_name")
@@ -94,6 +103,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _("user")
         verbose_name_plural = _("users")
+        indexes = (
+            # Поиск по email без учёта регистра (email__iexact) в админке.
+            models.Index(Upper("email"), name="user_email_upper_idx"),
+        )
 
     def __str__(self):
         return self.email